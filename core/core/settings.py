@@ -41,16 +41,25 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lifemanager.middleware.RequestLogMiddleware',
+    'lifemanager.middleware.AsgiUrlconfMiddleware',
+    'lifemanager.middleware.SphereVersionMiddleware',
+    'lifemanager.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'lifemanager.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'lifemanager.middleware.UserShardMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
+# Адреса под ASGI (uvicorn core.asgi:application): страницы чтения — async-view
+# из lifemanager/async_views.py, см. AsgiUrlconfMiddleware
+ASGI_URLCONF = 'core.urls_asgi'
 
 TEMPLATES = [
     {
@@ -63,6 +72,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'lifemanager.context_processors.reminders',
+                'lifemanager.context_processors.data_version',
             ],
         },
     },
@@ -84,6 +94,103 @@ DATABASES = {
     }
 }
 
+# Профиль БД: LIFEMANAGER_DB_PROFILE=production включает WAL и прагмы SQLite
+# (применяются при каждом подключении, см. lifemanager/db.py) и держит
+# соединения открытыми между запросами.
+DB_PROFILE = os.environ.get('LIFEMANAGER_DB_PROFILE', 'default')
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # 64 МБ
+    'mmap_size': 268435456,  # 256 МБ
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('LIFEMANAGER_CONN_MAX_AGE', 600))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Реплики только для чтения: LIFEMANAGER_DB_REPLICAS=/path/replica1.sqlite3,/path/replica2.sqlite3
+# Локально это копии db.sqlite3, которые обновляет manage.py sync_replicas.
+DATABASE_REPLICAS = []
+
+for i, replica_path in enumerate(filter(None, os.environ.get('LIFEMANAGER_DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{i}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': replica_path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Шарды пользовательских данных: LIFEMANAGER_DB_SHARDS=/path/shard1.sqlite3,/path/shard2.sqlite3
+# Основная БД остаётся каталогом (User, LifeSphere); перенос — manage.py rebalance_shards.
+DATABASE_SHARDS = []
+
+for i, shard_path in enumerate(filter(None, os.environ.get('LIFEMANAGER_DB_SHARDS', '').split(',')), start=1):
+    alias = f'shard{i}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': shard_path.strip(),
+    }
+    DATABASE_SHARDS.append(alias)
+
+DATABASE_ROUTERS = [
+    'lifemanager.routers.UserShardRouter',
+    'lifemanager.routers.PrimaryReplicaRouter',
+]
+
+# Кэширующий загрузчик шаблонов: при DEBUG = True Django его не включает, поэтому
+# в production-профиле задаём явно — каждый шаблон разбирается один раз на процесс
+if DB_PROFILE == 'production' or not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Кэш default общий для всех процессов: через него web, run_workers и
+# weekly_reports сообщают друг другу о смене версии сфер (spheres.py) и данных
+# пользователя (usercache.py), в нём же сессии cached_db и вёдра throttle.py.
+# LIFEMANAGER_CACHE_URL:
+#   file:///path — файловый кэш, общий для процессов одного хоста (по умолчанию);
+#   redis://host:6379/0 или memcached://host:11211 — для нескольких хостов
+#   (нужны пакеты redis или pymemcache);
+#   locmem:// — кэш внутри процесса, только если процесс один (проверка lifemanager.W001)
+CACHE_URL = os.environ.get('LIFEMANAGER_CACHE_URL', f"file://{BASE_DIR / 'cache'}")
+CACHE_SCHEME, _, CACHE_LOCATION = CACHE_URL.partition('://')
+
+# Фрагменты шаблонов ({% cache ... using="fragments" %}) хранятся отдельно от
+# остального кэша: их можно вынести в общий кэш или выключить (DummyCache).
+# Ключи фрагментов включают версию данных, поэтому кэш процесса им достаточен
+CACHES = {
+    'default': {
+        'BACKEND': {
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'redis': 'django.core.cache.backends.redis.RedisCache',
+            'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+        }[CACHE_SCHEME],
+        'LOCATION': CACHE_URL if CACHE_SCHEME == 'redis' else CACHE_LOCATION,
+        # Файловый кэш по умолчанию держит 300 записей — мало для сессий и меток пользователей
+        'OPTIONS': {'MAX_ENTRIES': 10000} if CACHE_SCHEME in ('file', 'locmem') else {},
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+    },
+}
+
+# Сколько секунд после записи чтения пользователя идут в основную БД
+REPLICA_PIN_SECONDS = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -106,6 +213,57 @@ AUTH_PASSWORD_VALIDATORS = [
 AUTH_USER_MODEL = 'lifemanager.User'
 LOGIN_URL = '/login/'
 
+# Пользователь сессии берётся из кэша процесса (lifemanager/usercache.py).
+# ModelBackend оставлен для сессий, созданных до его появления.
+AUTHENTICATION_BACKENDS = [
+    'lifemanager.backends.CachedModelBackend',
+    # Сессии, открытые до CachedModelBackend, хранят путь ModelBackend
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TTL = int(os.environ.get('LIFEMANAGER_AUTH_USER_CACHE_TTL', 30))
+
+# Лимиты попыток входа, регистрации и сброса пароля — проверяются до хэширования
+# пароля (lifemanager/throttle.py): {вид: (попыток, за секунд)} по email и по IP
+THROTTLE_RATES = {
+    'login': {'email': (5, 300), 'ip': (20, 60)},
+    'register': {'ip': (5, 3600)},
+    'password_reset': {'email': (3, 3600), 'ip': (10, 3600)},
+}
+
+# Хранилище сессий: LIFEMANAGER_SESSIONS=cached_db (по умолчанию) читает сессию
+# из кэша и пишет в БД; signed_cookies хранит её в подписанной cookie без БД,
+# но выход не отзывает копии cookie; db — только БД.
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.environ.get('LIFEMANAGER_SESSIONS', 'cached_db')]
+
+# Сжатие ответов (CompressionMiddleware): выше уровень — меньше байт, но больше
+# процессора на каждый ответ. Соотношение на своих страницах: manage.py bench_compression
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('LIFEMANAGER_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('LIFEMANAGER_BROTLI_QUALITY', 4))
+
+# Сериализатор JSON для ответов API и фильтра safe_json (lifemanager/fastjson.py):
+# auto — orjson, если установлен, иначе стандартный json; stdlib или orjson — явно
+JSON_BACKEND = os.environ.get('LIFEMANAGER_JSON_BACKEND', 'auto')
+
+# Фоновые задачи (lifemanager/taskqueue.py, manage.py run_workers). Новая задача
+# будит воркер UDP-датаграммой на этот адрес; без сигнала воркер проверяет
+# очередь раз в TASK_IDLE_TIMEOUT секунд. Задача, не завершённая за
+# TASK_LEASE_SECONDS, считается брошенной и отдаётся другому воркеру.
+TASK_WAKEUP_ADDRESS = ('127.0.0.1', int(os.environ.get('LIFEMANAGER_TASK_WAKEUP_PORT', 47800)))
+TASK_IDLE_TIMEOUT = 60
+TASK_LEASE_SECONDS = 600
+# По умолчанию задачи выполняются сразу в запросе: без запущенного воркера
+# письма иначе остались бы в очереди. LIFEMANAGER_TASKS_EAGER=0 — ставить задачи
+# в очередь; включать только вместе с run_workers (сервис worker в docker-compose.yml)
+TASK_ALWAYS_EAGER = os.environ.get('LIFEMANAGER_TASKS_EAGER', '1') != '0'
+
+# Первичные ключи новых строк (lifemanager/ids.py): uuid4 — случайные, uuid7 —
+# упорядоченные по времени, вставки идут в конец индекса (manage.py bench_uuid)
+PRIMARY_KEY_UUID = os.environ.get('LIFEMANAGER_PK_UUID', 'uuid4')
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -129,6 +287,21 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Без DEBUG статика собирается collectstatic в STATIC_ROOT: имена файлов с хэшем
+# содержимого, рядом предсжатые .gz и .br. Отдаёт её lifemanager.assets.serve_static
+# с кэшированием на год — при изменении файла меняется и его имя
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+if not DEBUG:
+    STORAGES['staticfiles']['BACKEND'] = 'lifemanager.assets.CompressedManifestStaticFilesStorage'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -141,36 +314,69 @@ import os
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
 os.makedirs(LOG_DIR, exist_ok=True)  # Создаёт папку logs, если её нет
 
+# Запросы только кладут записи в очередь (lifemanager.log.BackgroundQueueHandler),
+# форматирует их и пишет в файлы и консоль фоновый поток. Файлы — JSON-строки
+# с ротацией по размеру. Очередь связывает со своими обработчиками configure_logging.
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOGGING_CONFIG = 'lifemanager.log.configure_logging'
+
+# Access-лог (RequestLogMiddleware) пишется в app.log; в консоль — только с
+# LIFEMANAGER_ACCESS_LOG_CONSOLE=1, иначе строка на каждый запрос забивает вывод
+ACCESS_LOG_CONSOLE = os.environ.get('LIFEMANAGER_ACCESS_LOG_CONSOLE') == '1'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
+        'json': {
+            '()': 'lifemanager.log.JsonFormatter',
         },
         'simple': {
             'format': '{levelname} {message}',
             'style': '{',
         },
     },
+    'filters': {
+        'request_context': {
+            '()': 'lifemanager.log.RequestContextFilter',
+        },
+        'skip_access_log': {
+            '()': 'lifemanager.log.SkipLoggerFilter',
+            'name': 'lifemanager.request',
+        },
+    },
     'handlers': {
         'file_app': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(LOG_DIR, 'app.log'),
-            'formatter': 'verbose',
+            'maxBytes': LOG_MAX_BYTES,
+            'backupCount': LOG_BACKUP_COUNT,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json',
         },
         'file_errors': {
             'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': os.path.join(LOG_DIR, 'errors.log'),
-            'formatter': 'verbose',
+            'maxBytes': LOG_MAX_BYTES,
+            'backupCount': LOG_BACKUP_COUNT,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json',
         },
         'console': {
             'level': 'DEBUG',
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
+            'filters': [] if ACCESS_LOG_CONSOLE else ['skip_access_log'],
+        },
+        'queue': {
+            '()': 'lifemanager.log.BackgroundQueueHandler',
+            'handlers': ['file_app', 'file_errors', 'console'],
+            'filters': ['request_context'],
         },
     },
     'root': {
@@ -178,17 +384,17 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['file_app', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
         'django.request': {
-            'handlers': ['file_errors', 'console'],
+            'handlers': ['queue'],
             'level': 'ERROR',
             'propagate': False,
         },
         'lifemanager': {
-            'handlers': ['file_app', 'file_errors', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': False,
         },
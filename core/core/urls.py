@@ -15,9 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+
+from lifemanager.assets import serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,4 +30,9 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Статику из каталогов приложений отдавал runserver; uvicorn этого не делает
+    urlpatterns += staticfiles_urlpatterns()
+else:
+    # Без DEBUG — собранную collectstatic статику с предсжатыми вариантами
+    urlpatterns += [re_path(rf'^{re.escape(settings.STATIC_URL.lstrip("/"))}(?P<path>.*)$', serve_static)]
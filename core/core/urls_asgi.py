@@ -0,0 +1,14 @@
+"""
+URL configuration for the ASGI entrypoint (core.asgi).
+
+AsgiUrlconfMiddleware routes ASGI requests here: read-heavy pages are served by
+the async views from lifemanager/urls_asgi.py, everything else by core.urls.
+"""
+from django.urls import path, include
+
+from . import urls
+
+urlpatterns = [
+    path('', include('lifemanager.urls_asgi')),
+    *urls.urlpatterns,
+]
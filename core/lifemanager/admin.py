@@ -1,3 +1,51 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-# Register your models here.
+from .models import User, Task
+from .purge import purge_user
+from .taskqueue import notify_workers
+
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ('email', 'name', 'created_at', 'is_active')
+    search_fields = ('email', 'name')
+    readonly_fields = ('created_at',)
+    fields = ('email', 'name', 'is_active', 'is_admin', 'created_at')
+    actions = ['purge_accounts']
+
+    def get_actions(self, request):
+        # Стандартное удаление собирает все связанные строки в одной транзакции
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Страница подтверждения не перечисляет связанные строки: для старого
+        # аккаунта это загрузило бы в память всю его историю
+        return [str(obj) for obj in objs], {User._meta.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        purge_user(obj)
+
+    @admin.action(description="Удалить аккаунты со всеми данными (пакетно)")
+    def purge_accounts(self, request, queryset):
+        for user in queryset:
+            counts = purge_user(user)
+            details = ', '.join(f"{name}: {count}" for name, count in counts.items() if count)
+            self.message_user(request, f"{user.email} удалён. {details or 'Данных не было.'}", messages.SUCCESS)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'created_at')
+    actions = ['retry_tasks']
+
+    @admin.action(description="Повторить сейчас")
+    def retry_tasks(self, request, queryset):
+        count = queryset.update(status=Task.Status.QUEUED, run_at=timezone.now(), attempts=0,
+                                locked_by='', locked_at=None)
+        notify_workers()
+        self.message_user(request, f"Задач поставлено в очередь: {count}", messages.SUCCESS)
@@ -0,0 +1,181 @@
+from datetime import date
+
+import numpy as np
+from django.core.cache import cache
+
+from .spheres import sphere_registry
+from .timeseries import assessment_series
+from .versioning import user_data_version
+
+CACHE_TIMEOUT = 60 * 60 * 24
+MOVING_AVERAGE_WINDOWS = (7, 30)
+# Тренд считается по последним дням, а не по всей истории
+TREND_DAYS = 90
+# Оценка, начиная с которой день продолжает серию
+STREAK_RATING = 7
+# Минимум общих дней, чтобы считать корреляцию пары сфер
+MIN_CORRELATION_DAYS = 5
+TOP_CORRELATIONS = 5
+
+
+def assessment_matrix(user, spheres):
+    """Плотная матрица дата × сфера с оценками пользователя; NaN — оценки нет.
+
+    Ось дат — каждый день от первой оценки до сегодняшнего дня.
+    Возвращает (первый день, матрица float64).
+    """
+    series = assessment_series(user)
+    return series.base_date, series.as_float([sphere.id for sphere in spheres], until=date.today())
+
+
+def moving_average(matrix, window):
+    """Среднее оценок за последние window дней для каждой даты (NaN, если оценок не было)."""
+    rated = ~np.isnan(matrix)
+    sums = np.cumsum(np.where(rated, matrix, 0.0), axis=0)
+    counts = np.cumsum(rated, axis=0)
+    zero = np.zeros((1, matrix.shape[1]))
+    sums = np.vstack([zero, sums])
+    counts = np.vstack([zero, counts])
+    start = np.maximum(np.arange(1, len(matrix) + 1) - window, 0)
+    window_sums = sums[1:] - sums[start]
+    window_counts = counts[1:] - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+
+def linear_trend(matrix):
+    """Наклон линейной регрессии оценки по дням для каждой сферы (единиц в день)."""
+    rated = ~np.isnan(matrix)
+    x = np.arange(len(matrix), dtype=float)[:, None]
+    y = np.where(rated, matrix, 0.0)
+    n = rated.sum(axis=0)
+    sx = (x * rated).sum(axis=0)
+    sy = y.sum(axis=0)
+    sxx = (x * x * rated).sum(axis=0)
+    sxy = (x * y).sum(axis=0)
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where((n >= 2) & (denominator > 0), (n * sxy - sx * sy) / denominator, np.nan)
+
+
+def streaks(matrix, threshold=STREAK_RATING):
+    """Текущая и самая длинная серия оценок >= threshold подряд для каждой сферы.
+
+    Дни без оценки серию не прерывают и не продлевают.
+    """
+    rated = ~np.isnan(matrix)
+    good = rated & (np.nan_to_num(matrix) >= threshold)
+    total = np.cumsum(good, axis=0)
+    # В дни плохой оценки фиксируем счётчик: длина серии — прирост с последнего сброса
+    resets = np.maximum.accumulate(np.where(rated & ~good, total, 0), axis=0)
+    runs = total - resets
+    if not len(runs):
+        return np.zeros(matrix.shape[1], dtype=int), np.zeros(matrix.shape[1], dtype=int)
+    return runs[-1], runs.max(axis=0)
+
+
+def correlations(matrix, min_days=MIN_CORRELATION_DAYS):
+    """Попарные корреляции Пирсона сфер по дням, когда оценены обе сферы."""
+    rated = (~np.isnan(matrix)).astype(float)
+    x = np.where(rated > 0, matrix, 0.0)
+    n = rated.T @ rated
+    sum_x = x.T @ rated            # sum_x[i, j] — сумма оценок i в дни, когда оценена j
+    sum_xx = (x * x).T @ rated
+    sum_xy = x.T @ x
+    sum_y = sum_x.T
+    sum_yy = sum_xx.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (n * sum_xy - sum_x * sum_y) / np.sqrt((n * sum_xx - sum_x ** 2) * (n * sum_yy - sum_y ** 2))
+    # Для сфер с постоянной оценкой знаменатель нулевой
+    r[(n < min_days) | ~np.isfinite(r)] = np.nan
+    return r.clip(-1, 1)
+
+
+def latest_values(matrix):
+    """Последняя поставленная оценка каждой сферы (NaN, если не оценивалась)."""
+    if not len(matrix):
+        return np.full(matrix.shape[1], np.nan)
+    rated = ~np.isnan(matrix)
+    last_index = np.maximum.accumulate(np.where(rated, np.arange(len(matrix))[:, None], -1), axis=0)[-1]
+    return np.where(last_index >= 0, matrix[last_index.clip(0), np.arange(matrix.shape[1])], np.nan)
+
+
+def balance_index(latest):
+    """Индекс баланса 0–100: высокие и ровные последние оценки дают больше.
+
+    Среднее оценок (из 10) умножается на 1 − разброс/4.5, где 4.5 —
+    наибольшее возможное стандартное отклонение оценок от 1 до 10.
+    """
+    latest = latest[~np.isnan(latest)]
+    if not len(latest):
+        return None
+    return round(float(latest.mean() / 10 * (1 - latest.std() / 4.5) * 100))
+
+
+def _number(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def compute_analytics(user):
+    spheres = sphere_registry.all()
+    first_day, matrix = assessment_matrix(user, spheres)
+    rated = ~np.isnan(matrix)
+
+    averages = {window: moving_average(matrix, window)[-1:] for window in MOVING_AVERAGE_WINDOWS}
+    trend = linear_trend(matrix[-TREND_DAYS:])
+    current_streak, longest_streak = streaks(matrix)
+    latest = latest_values(matrix)
+    counts = rated.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(rated, matrix, 0.0).sum(axis=0) / counts
+        variances = (np.where(rated, matrix - means, 0.0) ** 2).sum(axis=0) / counts
+
+    result_spheres = []
+    for i, sphere in enumerate(spheres):
+        result_spheres.append({
+            'title': sphere.title,
+            'count': int(counts[i]),
+            'latest': _number(latest[i], 0),
+            'mean': _number(means[i]),
+            'variance': _number(variances[i]),
+            **{
+                f'ma{window}': _number(average[0, i]) if len(average) else None
+                for window, average in averages.items()
+            },
+            # Наклон в оценках за 30 дней — так его проще читать, чем «в день»
+            'trend_per_month': _number(trend[i] * 30),
+            'current_streak': int(current_streak[i]),
+            'longest_streak': int(longest_streak[i]),
+        })
+
+    r = correlations(matrix)
+    pairs = []
+    for i, j in zip(*np.triu_indices(len(spheres), k=1)):
+        if not np.isnan(r[i, j]):
+            pairs.append({'spheres': [spheres[i].title, spheres[j].title], 'r': _number(r[i, j])})
+    pairs.sort(key=lambda pair: abs(pair['r']), reverse=True)
+
+    return {
+        'since': first_day.isoformat() if rated.any() else None,
+        'days': len(matrix),
+        'balance_index': balance_index(latest),
+        'spheres': result_spheres,
+        'correlations': pairs[:TOP_CORRELATIONS],
+    }
+
+
+def user_analytics(user):
+    """Аналитика по оценкам пользователя, закэшированная до изменения его данных.
+
+    Ось дат идёт до сегодняшнего дня, поэтому в ключе и дата: после полуночи
+    серии, средние и тренды пересчитываются.
+    """
+    key = (
+        f'lifemanager:analytics:{user.pk}:{user_data_version(user)}:{sphere_registry.version}:'
+        f'{date.today().isoformat()}'
+    )
+    result = cache.get(key)
+    if result is None:
+        result = compute_analytics(user)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,176 @@
+from django.db.models import Count, Prefetch, Q
+
+from .charts import SERIES_COLORS
+from .models import Goal, Reminder, DiaryEntry, Note, NoteItem
+from .spheres import sphere_registry
+from .timeseries import assessment_series
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class ApiError(ValueError):
+    pass
+
+
+def _sphere_title(sphere_id):
+    # Названия сфер — из справочника в памяти, без JOIN с lifemanager_lifesphere
+    sphere = sphere_registry.get(sphere_id) if sphere_id else None
+    return sphere.title if sphere else None
+
+
+def latest_assessments(user, fields, limit):
+    """Последняя оценка каждой сферы — из закэшированного ряда оценок, без запросов к БД."""
+    series = assessment_series(user)
+    result = []
+    for sphere in sphere_registry.all():
+        latest = series.sphere(sphere.id).latest(1)
+        if latest:
+            day, value = latest[0]
+            row = {'sphere': sphere.title, 'date': day, 'value': value}
+            result.append({field: row[field] for field in fields})
+    return result
+
+
+def chart_series(user, fields, limit):
+    """Последние limit оценок каждой сферы для графиков."""
+    series = assessment_series(user)
+    result = []
+    for i, sphere in enumerate(sphere_registry.all()):
+        points = series.sphere(sphere.id).latest(limit)
+        if points:
+            row = {'sphere': sphere.title, 'color': SERIES_COLORS[i % len(SERIES_COLORS)], 'points': points}
+            result.append({field: row[field] for field in fields})
+    return result
+
+
+def active_goals(user, fields, limit):
+    goals = Goal.objects.filter(user=user, status=Goal.Status.ACTIVE) \
+        .only('id', *(f for f in fields if f in GOAL_COLUMNS)) \
+        .order_by('-is_pinned', 'deadline')
+    if {'steps_total', 'steps_completed'} & fields:
+        # Счётчики шагов — агрегатом в том же запросе, а не запросом на каждую цель
+        goals = goals.annotate(
+            steps_total=Count('steps'),
+            steps_completed=Count('steps', filter=Q(steps__is_completed=True)),
+        )
+    result = []
+    for goal in goals[:limit]:
+        row = {field: getattr(goal, field) for field in fields if field != 'sphere'}
+        if 'sphere' in fields:
+            row['sphere'] = _sphere_title(goal.sphere_id)
+        result.append(row)
+    return result
+
+
+def enabled_reminders(user, fields, limit):
+    reminders = Reminder.objects.filter(user=user, is_enabled=True).order_by('type', 'time')
+    if 'goal' in fields:
+        reminders = reminders.select_related('goal').only(
+            *(f for f in fields if f in REMINDER_COLUMNS), 'goal__id', 'goal__title',
+        )
+    else:
+        reminders = reminders.only('id', *(f for f in fields if f in REMINDER_COLUMNS))
+    result = []
+    for reminder in reminders[:limit]:
+        row = {field: getattr(reminder, field) for field in fields if field not in ('goal', 'sphere')}
+        if 'goal' in fields:
+            row['goal'] = {'id': reminder.goal.id, 'title': reminder.goal.title} if reminder.goal_id else None
+        if 'sphere' in fields:
+            row['sphere'] = _sphere_title(reminder.sphere_id)
+        result.append(row)
+    return result
+
+
+def recent_diary(user, fields, limit):
+    entries = DiaryEntry.objects.filter(user=user).order_by('-created_at')
+    columns = [f for f in fields if f in DIARY_COLUMNS] + (['media_file'] if 'media_url' in fields else [])
+    if 'goal' in fields:
+        entries = entries.select_related('goal').only(*columns, 'goal__id', 'goal__title')
+    else:
+        entries = entries.only('id', *columns)
+    result = []
+    for entry in entries[:limit]:
+        row = {field: getattr(entry, field) for field in fields if field in ('id', 'text', 'created_at')}
+        if 'sphere' in fields:
+            row['sphere'] = _sphere_title(entry.sphere_id)
+        if 'goal' in fields:
+            row['goal'] = {'id': entry.goal.id, 'title': entry.goal.title} if entry.goal_id else None
+        if 'media_url' in fields:
+            row['media_url'] = entry.media_file.url if entry.media_file else None
+        result.append(row)
+    return result
+
+
+def recent_notes(user, fields, limit):
+    notes = Note.objects.filter(user=user).only('id', *(f for f in fields if f in ('title', 'created_at'))) \
+        .order_by('-created_at')
+    if 'items' in fields:
+        notes = notes.prefetch_related(Prefetch('items', queryset=NoteItem.objects.only('id', 'note', 'text', 'is_completed')))
+    result = []
+    for note in notes[:limit]:
+        row = {field: getattr(note, field) for field in fields if field != 'items'}
+        if 'items' in fields:
+            row['items'] = [
+                {'id': item.id, 'text': item.text, 'is_completed': item.is_completed} for item in note.items.all()
+            ]
+        result.append(row)
+    return result
+
+
+GOAL_COLUMNS = ('title', 'description', 'deadline', 'status', 'progress', 'is_pinned', 'is_overdue', 'sphere')
+REMINDER_COLUMNS = ('type', 'time', 'frequency', 'sphere', 'goal')
+DIARY_COLUMNS = ('text', 'created_at', 'sphere', 'goal')
+
+# Ресурс -> (загрузчик, допустимые поля, поля по умолчанию). Каждый загрузчик
+# делает не больше двух запросов, поэтому число запросов ограничено при любом наборе
+RESOURCES = {
+    'assessments': (latest_assessments, ('sphere', 'date', 'value'), ('sphere', 'date', 'value')),
+    'charts': (chart_series, ('sphere', 'color', 'points'), ('sphere', 'color', 'points')),
+    'goals': (
+        active_goals,
+        ('id', *GOAL_COLUMNS, 'steps_total', 'steps_completed'),
+        ('id', 'title', 'deadline', 'progress', 'is_pinned', 'is_overdue', 'sphere', 'steps_total', 'steps_completed'),
+    ),
+    'reminders': (
+        enabled_reminders,
+        ('id', *REMINDER_COLUMNS),
+        ('id', 'type', 'time', 'goal', 'sphere'),
+    ),
+    'diary': (
+        recent_diary,
+        ('id', 'text', 'created_at', 'sphere', 'goal', 'media_url'),
+        ('id', 'text', 'created_at', 'sphere'),
+    ),
+    'notes': (recent_notes, ('id', 'title', 'created_at', 'items'), ('id', 'title', 'created_at', 'items')),
+}
+
+
+def parse_query(params):
+    """Разбирает GET-параметры API: include, fields[ресурс], limit[ресурс].
+
+    Возвращает [(ресурс, поля, limit)] или бросает ApiError.
+    """
+    include = [name for name in params.get('include', '').split(',') if name] or list(RESOURCES)
+    unknown = set(include) - set(RESOURCES)
+    if unknown:
+        raise ApiError(f"Неизвестные ресурсы: {', '.join(sorted(unknown))}")
+
+    query = []
+    for name in dict.fromkeys(include):
+        _, allowed, default = RESOURCES[name]
+        requested = params.get(f'fields[{name}]')
+        fields = [field for field in requested.split(',') if field] if requested else list(default)
+        unknown = set(fields) - set(allowed)
+        if unknown:
+            raise ApiError(f"{name}: неизвестные поля {', '.join(sorted(unknown))}")
+        try:
+            limit = int(params.get(f'limit[{name}]', DEFAULT_LIMIT))
+        except ValueError:
+            raise ApiError(f"limit[{name}] должно быть числом")
+        query.append((name, dict.fromkeys(fields), min(max(limit, 1), MAX_LIMIT)))
+    return query
+
+
+def build_state(user, query):
+    return {name: RESOURCES[name][0](user, fields.keys(), limit) for name, fields, limit in query}
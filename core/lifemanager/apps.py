@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class LifemanagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lifemanager'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
+
+        from .checks import register_checks
+        register_checks()
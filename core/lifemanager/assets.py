@@ -0,0 +1,98 @@
+import functools
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import brotli, negotiate
+
+# Сжимаем только текстовые форматы: картинки и шрифты уже сжаты
+COMPRESSIBLE = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml')
+# Расширение предсжатого варианта для каждой кодировки
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+
+
+def _compress(data):
+    yield '.gz', gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэширует имена файлов и рядом с каждым хэшированным кладёт .gz и .br.
+
+    Сжатие делается один раз при collectstatic, при отдаче сервер только
+    выбирает готовый вариант. Вариант не сохраняется, если он не меньше исходника.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(COMPRESSIBLE):
+                self._write_variants(hashed_name)
+
+    def _write_variants(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        for suffix, compressed in _compress(data):
+            path = self.path(name + suffix)
+            if len(compressed) < len(data):
+                with open(path, 'wb') as f:
+                    f.write(compressed)
+            elif os.path.exists(path):
+                os.remove(path)
+
+
+@functools.lru_cache(maxsize=None)
+def _hashed_names():
+    # Манифест читается один раз при создании хранилища, поэтому и множество
+    # хэшированных имён строим один раз на процесс
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику из STATIC_ROOT без отдельного веб-сервера.
+
+    Если клиент принимает br или gzip и рядом лежит предсжатый вариант, отдаётся
+    он. Файлы с хэшем в имени кэшируются браузером на год (immutable).
+    """
+    # Выход за пределы STATIC_ROOT (../) safe_join отклоняет с ответом 400
+    fullpath = safe_join(settings.STATIC_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    variants = [coding for coding, suffix in SUFFIXES.items() if os.path.isfile(fullpath + suffix)]
+    encoding = negotiate(request, variants) if variants else None
+    if encoding:
+        fullpath += SUFFIXES[encoding]
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(fullpath, 'rb'), content_type=content_type or 'application/octet-stream',
+            filename=os.path.basename(path),
+        )
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            # CompressionMiddleware не сжимает ответ повторно, если кодировка уже задана
+            response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE if path in _hashed_names() else REVALIDATE
+    return response
@@ -0,0 +1,147 @@
+"""Асинхронные версии страниц чтения для ASGI (core.asgi, core/urls_asgi.py).
+
+Под WSGI работают синхронные view из views.py: async-view там оборачивались бы
+в async_to_sync на каждом запросе. Запросы страниц строятся теми же функциями
+views.py, здесь они выполняются через async ORM, независимые — параллельно.
+"""
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db.models import Avg
+from django.shortcuts import render
+from django.utils import timezone
+
+from .decorators import alogin_required, user_conditional
+from .goals import goal_counters
+from .spheres import sphere_registry
+from .timeseries import assessment_series
+from .views import (
+    assessment_history_queryset, diary_counters, diary_list_queryset, goal_list_queryset, note_list_queryset,
+    profile_stats, recent_chart_series, recent_entries_queryset, recent_goals_queryset, upcoming_goals,
+)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset.aiterator()]
+
+
+async def apaginate(queryset, per_page, page_number, count=None):
+    """Асинхронный аналог Paginator.get_page: объекты страницы загружаются списком."""
+    paginator = Paginator(queryset, per_page)
+    # count — cached_property: подставляем число, посчитанное асинхронно
+    paginator.count = await queryset.acount() if count is None else count
+    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = await alist(page_obj.object_list)
+    return page_obj
+
+
+async def arender(request, template_name, context):
+    # Шаблоны и context processors (напоминания в base.html) ходят в БД синхронно,
+    # поэтому рендерим в потоке ORM
+    return await sync_to_async(render)(request, template_name, context)
+
+
+@alogin_required
+@user_conditional
+async def dashboard(request):
+    user = request.user
+
+    await sphere_registry.aload()
+    series, active_goals = await asyncio.gather(
+        sync_to_async(assessment_series)(user),
+        alist(upcoming_goals(user)),
+    )
+
+    return await arender(request, 'dashboard.html', {
+        'chart_series': recent_chart_series(series),
+        'active_goals': active_goals,
+    })
+
+
+@alogin_required
+async def profile(request):
+    user = request.user
+
+    series, recent_goals, recent_entries = await asyncio.gather(
+        sync_to_async(assessment_series)(user),
+        alist(recent_goals_queryset(user)),
+        alist(recent_entries_queryset(user)),
+    )
+
+    return await arender(request, 'profile/profile.html', {
+        **profile_stats(series),
+        'recent_goals': recent_goals,
+        'recent_entries': recent_entries,
+    })
+
+
+@alogin_required
+@user_conditional
+async def assessment_history(request):
+    assessments = assessment_history_queryset(request.user)
+
+    # Статистика и средняя оценка — независимые запросы, выполняем параллельно
+    week_ago = timezone.now().date() - timedelta(days=7)
+    total_count, last_week_count, avg_result = await asyncio.gather(
+        assessments.acount(),
+        assessments.filter(date__gte=week_ago).acount(),
+        assessments.aaggregate(avg=Avg('value')),
+    )
+    average_score = round(avg_result['avg'], 1) if avg_result['avg'] else 0
+
+    # Пагинация (8 оценок на страницу)
+    page_obj = await apaginate(assessments, 8, request.GET.get('page'), count=total_count)
+
+    return await arender(request, 'spheres/assessment_history.html', {
+        'assessments': page_obj.object_list,
+        'page_obj': page_obj,
+        'total_count': total_count,
+        'last_week_count': last_week_count,
+        'average_score': average_score,
+    })
+
+
+@alogin_required
+@user_conditional
+async def goal_list(request):
+    status_filter = request.GET.get('status')
+    search_query = request.GET.get('search')
+    goals = goal_list_queryset(request.user, status_filter, search_query)
+
+    filtered_count, counters = await asyncio.gather(
+        goals.acount(),
+        sync_to_async(goal_counters)(request.user),
+    )
+
+    page_obj = await apaginate(goals, 5, request.GET.get('page'), count=filtered_count)
+
+    return await arender(request, 'goals/goal_list.html', {
+        'page_obj': page_obj,
+        'total_count': counters['total'],
+        'active_count': counters['active'],
+        'completed_count': counters['completed'],
+        'overdue_count': counters['overdue'],
+        'current_status': status_filter or 'all',
+        'search_query': search_query or '',
+    })
+
+
+@alogin_required
+@user_conditional
+async def diary_list(request):
+    entries = diary_list_queryset(request.user)
+
+    # Счётчики считаются при рендеринге, только если фрагмент статистики не в кэше
+    return await arender(request, 'diary/diary_list.html', {
+        'entries': await alist(entries),
+        **diary_counters(entries),
+    })
+
+
+@alogin_required
+@user_conditional
+async def note_list(request):
+    notes = await alist(note_list_queryset(request.user))
+    return await arender(request, 'notes/note_list.html', {'notes': notes})
@@ -0,0 +1,14 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .usercache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша процесса (см. usercache.py).
+
+    AuthenticationMiddleware вызывает get_user() на каждом запросе — с кэшем
+    это обходится без SELECT из lifemanager_user.
+    """
+
+    def get_user(self, user_id):
+        return get_cached_user(user_id, super().get_user)
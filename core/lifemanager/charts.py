@@ -0,0 +1,117 @@
+from datetime import date
+
+from django.db.models import Avg, F
+from django.db.models.functions import TruncMonth, TruncWeek
+
+# Период агрегации -> выражение начала периода
+RESOLUTIONS = {
+    'day': lambda: F('date'),
+    'week': lambda: TruncWeek('date'),
+    'month': lambda: TruncMonth('date'),
+}
+
+SERIES_COLORS = ['#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#3498db', '#e67e22', '#34495e']
+
+
+def bucketed_averages(assessments, resolution):
+    """Средние оценки по (период, сфера) — группировка выполняется в БД.
+
+    Возвращает values-queryset со строками {'bucket', 'sphere_id', 'avg'},
+    от новых периодов к старым.
+    """
+    return assessments.annotate(bucket=RESOLUTIONS[resolution]()) \
+        .values('bucket', 'sphere_id') \
+        .annotate(avg=Avg('value')) \
+        .order_by('-bucket')
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets: прореживает ряд до threshold точек.
+
+    points — список (x, y), отсортированный по x. Из каждой корзины берётся
+    точка, образующая наибольший треугольник с уже выбранной точкой и средним
+    следующей корзины, поэтому пики и провалы графика сохраняются.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+
+        next_points = points[end:next_end]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        ax, ay = points[selected]
+        selected = max(
+            range(start, end),
+            key=lambda j: abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay)),
+        )
+        sampled.append(points[selected])
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def thin_dates(dates, max_points):
+    """Равномерно выбирает max_points периодов, сохраняя первый и последний."""
+    if not max_points or len(dates) <= max_points:
+        return dates
+    step = (len(dates) - 1) / (max(max_points, 2) - 1)
+    return [dates[round(i * step)] for i in range(max_points)]
+
+
+def chart_payload(rows, spheres, resolution, max_points=None):
+    """Данные для колеса жизни и графиков динамики из строк bucketed_averages.
+
+    max_points ограничивает и ряды series (LTTB), и периоды dates/by_date
+    для навигации по колесу — размер ответа не растёт с возрастом аккаунта.
+    """
+    titles = {sphere.id: sphere.title for sphere in spheres}
+    by_date = {}
+    for row in rows:
+        title = titles.get(row['sphere_id'])
+        if title is None:
+            continue
+        values = by_date.setdefault(row['bucket'].isoformat(), dict.fromkeys(titles.values(), 0))
+        values[title] = round(row['avg'], 1)
+
+    # Строки уже отсортированы от новых к старым, dict сохраняет порядок
+    dates = list(by_date)
+
+    series = []
+    for i, title in enumerate(titles.values()):
+        points = [
+            (day, by_date[day][title]) for day in reversed(dates) if by_date[day][title]
+        ]
+        if max_points:
+            # LTTB работает с числовой осью x — берём порядковый номер дня
+            indexed = [(date.fromisoformat(day).toordinal(), value) for day, value in points]
+            kept = {x for x, _ in lttb(indexed, max_points)}
+            points = [(day, value) for (x, _), (day, value) in zip(indexed, points) if x in kept]
+        if points:
+            series.append({
+                'label': title,
+                'color': SERIES_COLORS[i % len(SERIES_COLORS)],
+                'points': points,
+            })
+
+    # Прореживаем после построения series: LTTB нужен полный ряд
+    dates = thin_dates(dates, max_points)
+    if len(dates) < len(by_date):
+        by_date = {day: by_date[day] for day in dates}
+
+    return {
+        'resolution': resolution,
+        'spheres': list(titles.values()),
+        'dates': dates,
+        'by_date': by_date,
+        'series': series,
+    }
+
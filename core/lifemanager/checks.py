@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backend'ы, данные которых не видны другим процессам
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Сброс каталога сфер и кэша пользователей между процессами идёт через кэш default."""
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        "Кэш default не общий для процессов: после изменения сфер или данных "
+        "пользователя в одном процессе остальные продолжат отдавать устаревшие копии.",
+        hint="Запускайте один процесс (без run_workers и нескольких воркеров сервера) "
+             "или задайте LIFEMANAGER_CACHE_URL=file://…, redis://… или memcached://….",
+        id='lifemanager.W001',
+    )]
+
+
+def register_checks():
+    register(check_shared_cache)
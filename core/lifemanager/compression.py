@@ -0,0 +1,153 @@
+import re
+import secrets
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него ответы сжимаются только gzip
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Сжимаем только текст: картинки, видео и архивы уже сжаты, повторное сжатие
+# тратит процессор и почти не уменьшает размер
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|csv|x-ndjson)|image/svg\+xml)', re.IGNORECASE,
+)
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых через q=0."""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not re.search(r'q=0(\.0*)?\s*$', params):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def available_encodings():
+    """Поддерживаемые кодировки в порядке предпочтения."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(request, available=None):
+    """Лучшая кодировка из available, которую принимает клиент, или None."""
+    accepted = accepted_encodings(request)
+    for coding in available or available_encodings():
+        if coding in accepted:
+            return coding
+    return None
+
+
+def compression_level(coding):
+    if coding == 'br':
+        return getattr(settings, 'COMPRESSION_BROTLI_QUALITY', BROTLI_QUALITY)
+    return getattr(settings, 'COMPRESSION_GZIP_LEVEL', GZIP_LEVEL)
+
+
+def _gzip_padding(header, length):
+    # Случайное имя файла в заголовке gzip (флаг FNAME), как в django.utils.text.compress_string
+    header = bytearray(header)
+    header[3] |= 0x08
+    return bytes(header) + b'a' * length + b'\0'
+
+
+def _brotli_padding(length):
+    # Блок метаданных brotli (RFC 7932, 9.2), который декодер пропускает:
+    # ISLAST=0, MNIBBLES=0 (код 11), MSKIPBYTES=1, затем MSKIPLEN-1 и сами байты
+    if not length:
+        return b''
+    return (0b0110 | 1 << 4 | (length - 1) << 6).to_bytes(2, 'little') + bytes(length)
+
+
+class Compressor:
+    """Потоковый компрессор: compress() отдаёт сжатые данные сразу после каждого куска.
+
+    Кусок сбрасывается в выход целиком (Z_SYNC_FLUSH / flush brotli), поэтому
+    клиент получает строки потокового ответа без задержки на буферизацию.
+
+    С max_random_bytes в начало потока добавляется от 0 до max_random_bytes-1
+    лишних байт вне сжатых данных (защита от BREACH, как max_random_bytes в
+    GZipMiddleware): длина ответа перестаёт точно отражать, насколько хорошо
+    сжалась секретная строка вместе с подставленной атакующим.
+    """
+
+    max_padding = 256  # длина метаданных brotli хранится в одном байте
+
+    def __init__(self, coding, level=None, max_random_bytes=0):
+        level = compression_level(coding) if level is None else level
+        padding = secrets.randbelow(min(max_random_bytes, self.max_padding)) if max_random_bytes else None
+        if coding == 'br':
+            self._brotli = brotli.Compressor(quality=level)
+            self._zlib = None
+            # Метаданные вставляются после пустого flush: с него поток выровнен по байту
+            self._header = b'' if padding is None else self._brotli.flush() + _brotli_padding(padding)
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            # Первый вызов возвращает 10-байтный заголовок gzip
+            header = self._zlib.compress(b'')
+            self._header = header if padding is None else _gzip_padding(header, padding)
+
+    def _take_header(self):
+        header, self._header = self._header, b''
+        return header
+
+    def compress(self, data, flush=True):
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            out = out + self._brotli.flush() if flush else out
+        else:
+            out = self._zlib.compress(data)
+            out = out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+        return self._take_header() + out
+
+    def finish(self):
+        if self._brotli is not None:
+            return self._take_header() + self._brotli.finish()
+        return self._take_header() + self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data, coding, level=None, max_random_bytes=0):
+    compressor = Compressor(coding, level, max_random_bytes)
+    return compressor.compress(data, flush=False) + compressor.finish()
+
+
+def compress_stream(chunks, coding, level=None, max_random_bytes=0):
+    compressor = Compressor(coding, level, max_random_bytes)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, coding, level=None, max_random_bytes=0):
+    compressor = Compressor(coding, level, max_random_bytes)
+    async for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.finish()
+
+
+_END = object()
+
+
+async def aiterate(chunks):
+    """Синхронный итератор как асинхронный: каждый кусок берётся в потоке sync_to_async.
+
+    Синхронный поток под ASGI Django сначала собирает в список целиком; так же
+    первый кусок уходит клиенту, пока следующие ещё читаются из БД. Все next()
+    выполняются в одном потоке (thread_sensitive) — курсор итератора остаётся
+    в своём соединении.
+    """
+    pull = sync_to_async(next, thread_sensitive=True)
+    iterator = iter(chunks)
+    while (chunk := await pull(iterator, _END)) is not _END:
+        yield chunk
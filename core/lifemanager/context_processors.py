@@ -1,9 +1,21 @@
+from django.core.cache import cache
+
 from .models import Reminder
+from .spheres import sphere_registry
+from .versioning import user_data_version
 import json
 from django.utils.safestring import mark_safe
 
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
 def reminders(request):
     if request.user.is_authenticated:
+        # Список меняется только вместе с данными пользователя — не запрашиваем его на каждой странице
+        key = f'lifemanager:active_reminders:{request.user.pk}:{user_data_version(request.user)}:{sphere_registry.version}'
+        reminders_list = cache.get(key)
+        if reminders_list is not None:
+            return {'active_reminders': reminders_list}
         reminders_list = []
         for r in Reminder.objects.filter(user=request.user, is_enabled=True):
             reminder_dict = {
@@ -24,5 +36,13 @@ def reminders(request):
                     'title': r.sphere.title
                 }
             reminders_list.append(reminder_dict)
+        cache.set(key, reminders_list, CACHE_TIMEOUT)
         return {'active_reminders': reminders_list}
-    return {'active_reminders': []}
\ No newline at end of file
+    return {'active_reminders': []}
+
+
+def data_version(request):
+    """Версия данных пользователя для ключей {% cache %}: меняется при любом изменении его данных или сфер."""
+    if request.user.is_authenticated:
+        return {'data_version': f'{user_data_version(request.user)}:{sphere_registry.version}'}
+    return {'data_version': ''}
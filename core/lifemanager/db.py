@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Применяет settings.SQLITE_PRAGMAS к каждому новому соединению SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+def toggle_boolean(queryset, field_name, current=None):
+    """Инвертирует булево поле одним UPDATE и возвращает новое значение.
+
+    current — значение, которое видел клиент: UPDATE меняет строку, только если
+    оно не изменилось, и новое значение известно без чтения. Без current поле
+    инвертируется через CASE, а новое значение дочитывается; так же — если
+    строку успели изменить, тогда она остаётся как есть. None — под фильтр не
+    попала ни одна строка. Сигналы post_save не отправляются.
+    """
+    if current is not None:
+        if queryset.filter(**{field_name: current}).update(**{field_name: not current}):
+            return not current
+    else:
+        flipped = Case(When(**{field_name: True}, then=Value(False)), default=Value(True))
+        if not queryset.update(**{field_name: flipped}):
+            return None
+    return queryset.values_list(field_name, flat=True).first()
+
+
+def update_in_chunks(queryset, chunk_size, **values):
+    """UPDATE строк queryset порциями по chunk_size первичных ключей.
+
+    Каждая порция — отдельная короткая транзакция, поэтому ночной проход по
+    всем пользователям не держит блокировку таблицы. Фильтр queryset должен
+    исключать уже обновлённые строки: следующая порция выбирается тем же
+    фильтром. Если в неё снова попала строка предыдущей — ValueError вместо
+    бесконечного цикла. Возвращает множество user_id затронутых строк.
+    """
+    queryset = queryset.order_by()
+    queryset._for_write = True
+    alias = queryset.db
+    manager = queryset.model._base_manager.using(alias)
+    user_ids = set()
+    previous = set()
+    while True:
+        with transaction.atomic(using=alias):
+            chunk = list(queryset.values_list('pk', 'user_id')[:chunk_size])
+            if not chunk:
+                break
+            pks = {pk for pk, _ in chunk}
+            if pks & previous:
+                raise ValueError(
+                    f"update_in_chunks: фильтр {queryset.model.__name__} не исключает обновлённые строки {values}"
+                )
+            manager.filter(pk__in=pks).update(**values)
+        user_ids.update(user_id for _, user_id in chunk)
+        previous = pks
+    return user_ids
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import math
+from datetime import date, datetime, time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.contrib import messages
+from django.contrib.messages import get_messages
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .spheres import sphere_registry
+from .throttle import check_throttle
+from .versioning import user_data_version
+
+logger = logging.getLogger('lifemanager')
+
+
+def _is_cacheable(request):
+    # Flash-сообщения выводятся в base.html один раз — такую страницу нельзя отдавать из кэша
+    return request.user.is_authenticated and not len(get_messages(request))
+
+
+def user_data_etag(request, *args, **kwargs):
+    if not _is_cacheable(request):
+        return None
+    user = request.user
+    key = '|'.join([
+        str(user.pk),
+        user_data_version(user),
+        sphere_registry.version,
+        user.name,
+        date.today().isoformat(),
+        request.get_full_path(),
+        # Формы на странице содержат CSRF-токен, привязанный к этой cookie
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ])
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def user_data_last_modified(request, *args, **kwargs):
+    if not _is_cacheable(request):
+        return None
+    user = request.user
+    midnight = timezone.make_aware(datetime.combine(date.today(), time.min))
+    return max(filter(None, [user.data_changed_at, user.last_login, midnight]))
+
+
+def user_conditional(view_func):
+    """Условный GET (ETag/Last-Modified) по маркеру изменений данных пользователя.
+
+    Валидаторы считаются по уже загруженному request.user, поэтому
+    неизменившаяся страница отдаётся как 304 без запуска view.
+    """
+    view_func = condition(etag_func=user_data_etag, last_modified_func=user_data_last_modified)(view_func)
+    return cache_control(private=True, no_cache=True)(view_func)
+
+
+def alogin_required(view_func):
+    """login_required для async-view: в Django 5.0 он поддерживает только синхронные.
+
+    Пользователь загружается через request.auser() и подставляется в request.user,
+    чтобы синхронный код после него (условный GET, шаблоны, логи) не обращался
+    к БД из event loop.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        user = await request.auser()
+        request.user = request._cached_user = user
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
+
+
+def throttle_post(scope, template_name):
+    """Ограничивает POST-попытки по email и IP до запуска view (см. throttle.py).
+
+    Отклонённая попытка не доходит до хэширования пароля: страница с формой
+    отдаётся сразу со статусом 429 и заголовком Retry-After.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method == 'POST':
+                email = request.POST.get('email')
+                retry_after = math.ceil(check_throttle(request, scope, email))
+                if retry_after:
+                    logger.warning("Превышен лимит попыток %s: %s, %s", scope, email, request.META.get('REMOTE_ADDR'))
+                    messages.error(request, f"Слишком много попыток. Повторите через {retry_after} с.")
+                    response = render(request, template_name, {'email': email}, status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,133 @@
+import datetime
+import decimal
+import json
+import math
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него — стандартный json с тем же результатом
+    orjson = None
+
+# Символы, которые нельзя оставлять как есть внутри <script>: </script> и <!--
+# закрывают или ломают тег, U+2028/U+2029 — переводы строки для старых движков JS
+SCRIPT_ESCAPES = (
+    ('<', '\\u003C'),
+    ('>', '\\u003E'),
+    ('&', '\\u0026'),
+    ('\u2028', '\\u2028'),
+    ('\u2029', '\\u2029'),
+)
+_SCRIPT_ESCAPES_BYTES = tuple((char.encode(), escaped.encode()) for char, escaped in SCRIPT_ESCAPES)
+
+
+# Точное совпадение типа проверяется словарём — быстрее цепочки isinstance
+# на каждой дате в больших рядах графиков
+_CONVERTERS = {
+    datetime.date: datetime.date.isoformat,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.time: datetime.time.isoformat,
+    uuid.UUID: str,
+}
+
+
+def _default(value):
+    # Вызывается только для типов, которых нет в JSON, — даты сразу в ISO-строку
+    convert = _CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return duration_iso_string(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(value)
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+# Кодировщик создаётся один раз: без подкласса JSONEncoder и без отступов
+# json использует C-реализацию, из Python вызывается только _default.
+# Как orjson: не-ASCII символы как есть в UTF-8, NaN — не молча в невалидный JSON
+_encoder = json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+
+
+def _key(key):
+    if isinstance(key, (str, int, float, bool)) or key is None:
+        return key
+    # Как OPT_NON_STR_KEYS в orjson: ключами могут быть ещё даты, время и UUID
+    convert = _CONVERTERS.get(type(key))
+    if convert is None:
+        raise TypeError(f"Ключ типа {type(key).__name__} не сериализуется в JSON")
+    return convert(key)
+
+
+def _like_orjson(value):
+    """Копия value в том виде, в каком её пишет orjson: NaN и бесконечности — null, ключи-даты и UUID — строки."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {_key(key): _like_orjson(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_like_orjson(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(value):
+    try:
+        return _encoder.encode(value).encode()
+    except (TypeError, ValueError):
+        # Редкий случай — NaN или ключ-дата: приводим данные обходом в Python и кодируем снова.
+        # Неподдерживаемый тип значения снова вызовет TypeError из _default
+        return _encoder.encode(_like_orjson(value)).encode()
+
+
+def _orjson_dumps(value):
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+BACKENDS = {
+    'stdlib': _stdlib_dumps,
+    'orjson': _orjson_dumps,
+}
+
+
+def backend_name():
+    """Сериализатор из settings.JSON_BACKEND; auto — orjson, если установлен."""
+    name = getattr(settings, 'JSON_BACKEND', 'auto')
+    if name == 'auto':
+        return 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        raise ImportError("JSON_BACKEND = 'orjson', но пакет orjson не установлен")
+    return name
+
+
+def dumps(value):
+    """JSON в байтах UTF-8. Даты и время — ISO-строки, Decimal и UUID — строки.
+
+    Оба сериализатора дают одни и те же байты: не-ASCII символы без экранирования,
+    NaN и бесконечности — null, ключи-числа, даты и UUID — строки. Различаются
+    только ошибки: целые за пределами 64 бит orjson не принимает.
+    """
+    return BACKENDS[backend_name()](value)
+
+
+def dumps_for_script(value):
+    """JSON для вставки в <script>: <, >, & и U+2028/U+2029 заменены на \\u-последовательности."""
+    data = dumps(value)
+    for char, escaped in _SCRIPT_ESCAPES_BYTES:
+        if char in data:
+            data = data.replace(char, escaped)
+    return data.decode()
+
+
+class JsonResponse(HttpResponse):
+    """Замена django.http.JsonResponse на сериализаторе dumps()."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
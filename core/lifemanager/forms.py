@@ -0,0 +1,16 @@
+from django.contrib.auth.forms import PasswordResetForm
+from django.template.loader import render_to_string
+
+from .tasks import send_email
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо сброса пароля отправляет фоновый воркер: ответ не ждёт SMTP-сервер."""
+
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email,
+                  html_email_template_name=None):
+        # Шаблоны рендерим здесь: в контексте объект пользователя, в очередь идёт готовый текст
+        subject = ''.join(render_to_string(subject_template_name, context).splitlines())
+        body = render_to_string(email_template_name, context)
+        html_body = render_to_string(html_email_template_name, context) if html_email_template_name else None
+        send_email.delay(subject, body, [to_email], from_email, html_body)
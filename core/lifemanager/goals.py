@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .db import update_in_chunks
+from .models import Goal, Reminder
+from .versioning import user_data_version
+
+CACHE_TIMEOUT = 60 * 60 * 24
+CHUNK_SIZE = 1000
+
+
+def flag_overdue_goals(today=None, chunk_size=CHUNK_SIZE):
+    """Выставляет Goal.is_overdue активным целям с прошедшим дедлайном и снимает с остальных.
+
+    Возвращает множество user_id, у которых флаг изменился.
+    """
+    today = today or date.today()
+    overdue = Q(status=Goal.Status.ACTIVE, deadline__lt=today)
+    user_ids = update_in_chunks(Goal.objects.filter(overdue, is_overdue=False), chunk_size, is_overdue=True)
+    # Флаг, оставшийся после массовых UPDATE в обход save()
+    user_ids |= update_in_chunks(Goal.objects.filter(~overdue, is_overdue=True), chunk_size, is_overdue=False)
+    return user_ids
+
+
+def disable_finished_reminders(today=None, chunk_size=CHUNK_SIZE):
+    """Выключает напоминания по дедлайну для выполненных и просроченных целей."""
+    today = today or date.today()
+    reminders = Reminder.objects.filter(type=Reminder.Type.DEADLINE_BASED, is_enabled=True).filter(
+        Q(goal__status=Goal.Status.COMPLETED) | Q(goal__deadline__lt=today)
+    )
+    return update_in_chunks(reminders, chunk_size, is_enabled=False)
+
+
+def count_goals(user_id):
+    return Goal.objects.filter(user_id=user_id).order_by().aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(status=Goal.Status.ACTIVE)),
+        completed=Count('pk', filter=Q(status=Goal.Status.COMPLETED)),
+        overdue=Count('pk', filter=Q(is_overdue=True)),
+    )
+
+
+def goal_counters(user):
+    """Счётчики целей для goal_list, закэшированные до изменения данных пользователя.
+
+    Ночная команда nightly_goals меняет is_overdue и отмечает изменение данных,
+    поэтому счётчик просроченных не устаревает со сменой дня.
+    """
+    key = f'lifemanager:goal_counters:{user.pk}:{user_data_version(user)}'
+    counters = cache.get(key)
+    if counters is None:
+        counters = count_goals(user.pk)
+        cache.set(key, counters, CACHE_TIMEOUT)
+    return counters
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+
+# UUIDv7 (RFC 9562): 48 бит — миллисекунды Unix, 4 — версия, 12 — счётчик
+# внутри миллисекунды, 2 — вариант, 62 — случайные. Ключи растут со временем,
+# и новые строки дописываются в конец индекса первичного ключа, а не в
+# случайную страницу B-дерева, как у uuid4.
+_COUNTER_MAX = 0xFFF
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def _pack(ms, counter, rand):
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand)
+
+
+def uuid7(timestamp_ms=None):
+    """UUIDv7. Без timestamp_ms ключи одного процесса строго возрастают,
+    даже если в одну миллисекунду их выдано несколько."""
+    global _last_ms, _counter
+    rand = int.from_bytes(os.urandom(8), 'big') >> 2
+    if timestamp_ms is not None:
+        return _pack(timestamp_ms, rand & _COUNTER_MAX, rand)
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Счётчик стартует со случайного значения в младшей половине — запас на рост
+            _last_ms, _counter = ms, rand & (_COUNTER_MAX >> 1)
+        elif _counter < _COUNTER_MAX:
+            _counter += 1
+        else:
+            # Счётчик исчерпан (или часы пошли назад) — занимаем следующую миллисекунду
+            _last_ms, _counter = _last_ms + 1, 0
+        return _pack(_last_ms, _counter, rand)
+
+
+def uuid7_at(moment):
+    """Наименьший UUIDv7 для момента времени — граница для выборки диапазона по первичному ключу.
+
+    moment — datetime с часовым поясом: наивный datetime.timestamp() считал бы
+    местным временем сервера, и граница сдвигалась бы на его смещение от UTC.
+    """
+    if moment.utcoffset() is None:
+        raise ValueError("uuid7_at: нужен datetime с часовым поясом")
+    # Целочисленно: timestamp() * 1000 во float после 2038 года теряет миллисекунду
+    return _pack((moment - _EPOCH) // timedelta(milliseconds=1), 0, 0)
+
+
+GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+def new_id():
+    """Default первичных ключей моделей lifemanager: settings.PRIMARY_KEY_UUID — uuid4 или uuid7.
+
+    Обе схемы дают обычный UUID, так что существующие строки, конвертеры <uuid:>
+    в URL и формат хранения не меняются; переключение касается только новых строк.
+    """
+    return GENERATORS[getattr(settings, 'PRIMARY_KEY_UUID', 'uuid4')]()
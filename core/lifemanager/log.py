@@ -0,0 +1,147 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.config
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Контекст текущего запроса для логов: request_id и сам request (user_id берём лениво)
+_log_context = contextvars.ContextVar('lifemanager_log_context', default=None)
+
+
+def bind_request(request, request_id):
+    return _log_context.set({'request': request, 'request_id': request_id})
+
+
+def unbind_request(token):
+    _log_context.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет к записи request_id и user_id текущего запроса.
+
+    Подключается к очереди, а не к файловым обработчикам: фильтры очереди
+    выполняются в потоке запроса, где контекст ещё доступен.
+    """
+
+    def filter(self, record):
+        context = _log_context.get()
+        if context is None:
+            record.request_id = getattr(record, 'request_id', None)
+            record.user_id = getattr(record, 'user_id', None)
+            return True
+        record.request_id = context['request_id']
+        # Не загружаем пользователя ради лога — только если middleware уже это сделал
+        user = getattr(context['request'], '_cached_user', None)
+        record.user_id = str(user.pk) if user is not None and user.is_authenticated else None
+        return True
+
+
+class SkipLoggerFilter(logging.Filter):
+    """Отбрасывает записи логгера name и его потомков — обратный logging.Filter."""
+
+    def filter(self, record):
+        return not super().filter(record)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """Кладёт записи в очередь; форматирование и ввод-вывод делает фоновый QueueListener.
+
+    handlers — имена обработчиков из LOGGING['handlers']. Связывает их с очередью
+    configure_logging (settings.LOGGING_CONFIG), когда dictConfig создал все
+    обработчики, — порядок их создания не важен. Поток-писатель запускается
+    при первой записи.
+    """
+
+    def __init__(self, handlers=(), maxsize=10000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.target_names = list(handlers)
+        self.targets = []
+        self.listener = None
+
+    def connect(self, handlers):
+        """Подключает обработчики очереди по именам из словаря {имя: обработчик}."""
+        missing = [name for name in self.target_names if name not in handlers]
+        if missing:
+            raise ValueError(f"Обработчики очереди {self.name!r} не описаны в LOGGING: {', '.join(missing)}")
+        # Держим сильные ссылки: реестр logging хранит обработчики слабо, а эти
+        # обработчики не подключены ни к одному логгеру напрямую
+        self.targets = [handlers[name] for name in self.target_names]
+
+    def _start_listener(self):
+        if self.target_names and not self.targets:
+            raise RuntimeError(
+                f"Очередь {self.name!r} не подключена к обработчикам: "
+                "LOGGING_CONFIG = 'lifemanager.log.configure_logging'"
+            )
+        self.listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def _stop_listener(self):
+        # Дописывает оставшиеся в очереди записи и останавливает поток
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        # Базовый prepare() форматирует сообщение и traceback в потоке запроса.
+        # Записи не покидают процесс, поэтому отдаём их как есть: сообщение
+        # соберут форматтеры обработчиков в потоке QueueListener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Лучше потерять запись, чем блокировать запрос на диске
+            pass
+
+    def emit(self, record):
+        if self.listener is None:
+            self._start_listener()
+        super().emit(record)
+
+    def close(self):
+        self._stop_listener()
+        super().close()
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON."""
+
+    FIELDS = ('request_id', 'user_id', 'duration_ms', 'method', 'path', 'status')
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage(),
+        }
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(config):
+    """LOGGING_CONFIG: dictConfig и подключение очередей к их обработчикам.
+
+    Обработчики из конфигурации dictConfig никуда не сохраняет; берём их у
+    конфигуратора, пока он жив, и передаём очередям.
+    """
+    configurator = logging.config.DictConfigurator(config)
+    configurator.configure()
+    handlers = configurator.config.get('handlers', {})
+    for handler in handlers.values():
+        if isinstance(handler, BackgroundQueueHandler):
+            handler.connect(handlers)
@@ -0,0 +1,181 @@
+import asyncio
+import io
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+
+from lifemanager.models import User, LifeSphere, SphereAssessment, Goal, DiaryEntry, Note, NoteItem
+from lifemanager.sharding import use_shard
+
+VIEWS = ('dashboard', 'goal_list', 'diary_list', 'note_list', 'profile', 'assessment_history')
+SPHERES = ('Здоровье', 'Карьера', 'Финансы', 'Отношения', 'Семья', 'Друзья', 'Отдых', 'Саморазвитие')
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность read-страниц при параллельных запросах "
+        "под ASGI (async-view из async_views.py, одна event loop) и под WSGI "
+        "(синхронные view из views.py, пул потоков). Запросы подаются прямо в "
+        "обработчики Django, без сети, на временной копии схемы с тестовыми "
+        "данными. В бою ASGI-приложение запускается сервером (Dockerfile): "
+        "uvicorn core.asgi:application --workers 4"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32, help="одновременных запросов")
+        parser.add_argument('--requests', type=int, default=600, help="запросов на каждый вариант")
+        parser.add_argument('--days', type=int, default=180, help="дней истории оценок у пользователя")
+
+    def handle(self, *args, **options):
+        # Access-лог на каждый запрос мерил бы очередь логов, а не view
+        logging.disable(logging.INFO)
+        with tempfile.TemporaryDirectory() as tmp:
+            self._use_temp_databases(tmp)
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                cookie = self._seed(options['days'])
+                paths = [reverse(name) for name in VIEWS]
+                results = {
+                    'wsgi': self._run_wsgi(paths, cookie, options),
+                    'asgi': asyncio.run(self._run_asgi(paths, cookie, options)),
+                }
+            finally:
+                connections.close_all()
+                teardown_databases(old_config, verbosity=0)
+                logging.disable(logging.NOTSET)
+
+        self.stdout.write(f"{'сервер':<8}{'запросов/с':>12}{'p50, мс':>10}{'p95, мс':>10}{'ошибок':>8}")
+        for server, (elapsed, latencies, errors) in results.items():
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+            self.stdout.write(
+                f"{server:<8}{len(latencies) / elapsed:>12.0f}"
+                f"{statistics.median(latencies or [0]) * 1000:>10.1f}{p95 * 1000:>10.1f}{errors:>8}"
+            )
+
+    def _use_temp_databases(self, tmp):
+        # Файловые тестовые БД: in-memory SQLite не выдерживает параллельных потоков
+        for alias in connections:
+            settings_dict = connections[alias].settings_dict
+            if settings_dict['ENGINE'].endswith('sqlite3') and not settings_dict['TEST'].get('MIRROR'):
+                settings_dict['TEST']['NAME'] = os.path.join(tmp, f'{alias}.sqlite3')
+
+    def _seed(self, days):
+        user = User.objects.create_user('bench@example.com', 'Bench', 'Bench.pass1')
+        spheres = [LifeSphere.objects.get_or_create(title=title)[0] for title in SPHERES]
+        today = date.today()
+        with use_shard(user.shard or DEFAULT_DB_ALIAS):
+            SphereAssessment.objects.bulk_create(
+                SphereAssessment(user=user, sphere=sphere, date=today - timedelta(days=day), value=random.randint(1, 10))
+                for day in range(days) for sphere in spheres
+            )
+            goals = Goal.objects.bulk_create(
+                Goal(user=user, sphere=random.choice(spheres), title=f"Цель {i}",
+                     deadline=today + timedelta(days=i - 10), status=random.choice(['active', 'completed']))
+                for i in range(30)
+            )
+            DiaryEntry.objects.bulk_create(
+                DiaryEntry(user=user, text=f"Запись {i}", sphere=random.choice(spheres), goal=random.choice(goals))
+                for i in range(50)
+            )
+            notes = Note.objects.bulk_create(Note(user=user, title=f"Заметка {i}") for i in range(20))
+            NoteItem.objects.bulk_create(NoteItem(note=note, text=f"Пункт {i}") for note in notes for i in range(4))
+
+        client = Client()
+        client.force_login(user)
+        return '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+
+    def _run_wsgi(self, paths, cookie, options):
+        handler = WSGIHandler()
+
+        def request(i):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': paths[i % len(paths)],
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': io.StringIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            status = []
+            started = time.perf_counter()
+            body = handler(environ, lambda s, headers, exc_info=None: status.append(s))
+            b''.join(body)
+            body.close()
+            return time.perf_counter() - started, status[0].startswith('200')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(request, range(options['requests'])))
+        return self._collect(time.perf_counter() - started, results)
+
+    async def _run_asgi(self, paths, cookie, options):
+        handler = ASGIHandler()
+        queue = asyncio.Queue()
+        for i in range(options['requests']):
+            queue.put_nowait(paths[i % len(paths)])
+        results = []
+
+        async def request(path):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': ('localhost', 80),
+            }
+            received = False
+            status = []
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Клиент не отключается: Django отменит ожидание после ответа
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            return time.perf_counter() - started, status[0] == 200
+
+        async def worker():
+            while not queue.empty():
+                results.append(await request(queue.get_nowait()))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+        return self._collect(time.perf_counter() - started, results)
+
+    def _collect(self, elapsed, results):
+        latencies = [latency for latency, ok in results if ok]
+        return elapsed, latencies, len(results) - len(latencies)
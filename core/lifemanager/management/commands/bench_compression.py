@@ -0,0 +1,109 @@
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+
+from lifemanager.compression import available_encodings, compress_bytes, compress_stream
+from lifemanager.models import User, LifeSphere, SphereAssessment, Goal, GoalStep, DiaryEntry
+from lifemanager.sharding import use_shard
+
+PAGES = ('dashboard', 'goal_list', 'diary_list', 'api_state', 'export_data')
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 6, 11)}
+SPHERES = ('Здоровье', 'Карьера', 'Финансы', 'Отношения', 'Семья', 'Друзья', 'Отдых', 'Саморазвитие')
+
+
+class Command(BaseCommand):
+    help = (
+        "Процессор против байтов: сжимает реальные ответы (страницы, API, поток CSV "
+        "экспорта) gzip и brotli на разных уровнях и печатает размер и время сжатия. "
+        "По результату выбирают COMPRESSION_GZIP_LEVEL и COMPRESSION_BROTLI_QUALITY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="сжатий каждого ответа на уровень")
+
+    def handle(self, *args, **options):
+        logging.disable(logging.INFO)
+        with tempfile.TemporaryDirectory() as tmp:
+            for alias in connections:
+                settings_dict = connections[alias].settings_dict
+                if settings_dict['ENGINE'].endswith('sqlite3') and not settings_dict['TEST'].get('MIRROR'):
+                    settings_dict['TEST']['NAME'] = os.path.join(tmp, f'{alias}.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                bodies = self._responses()
+            finally:
+                connections.close_all()
+                teardown_databases(old_config, verbosity=0)
+                logging.disable(logging.NOTSET)
+
+        raw = sum(sum(map(len, chunks)) for chunks in bodies.values())
+        self.stdout.write("ответы без сжатия: " + ", ".join(
+            f"{name} {sum(map(len, chunks)) / 1024:.1f} КБ" for name, chunks in bodies.items()
+        ))
+        self.stdout.write(f"{'кодировка':<11}{'уровень':>8}{'КБ':>9}{'доля':>8}{'CPU, мс/ответ':>15}{'МБ/с':>8}")
+        for coding in available_encodings():
+            for level in LEVELS[coding]:
+                size, cpu = self._measure(bodies, coding, level, options['repeat'])
+                per_response = cpu / len(bodies) * 1000
+                self.stdout.write(
+                    f"{coding:<11}{level:>8}{size / 1024:>9.1f}{size / raw:>8.1%}"
+                    f"{per_response:>15.2f}{raw / cpu / 2 ** 20:>8.1f}"
+                )
+
+    def _measure(self, bodies, coding, level, repeat):
+        size = 0
+        started = time.process_time()
+        for _ in range(repeat):
+            for name, chunks in bodies.items():
+                if len(chunks) > 1:
+                    # Потоковый ответ сжимается так же, как в CompressionMiddleware — по кускам
+                    size += sum(map(len, compress_stream(chunks, coding, level)))
+                else:
+                    size += len(compress_bytes(chunks[0], coding, level))
+        return size // repeat, (time.process_time() - started) / repeat
+
+    def _responses(self):
+        client = self._seed()
+        bodies = {}
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['localhost']):
+            for name in PAGES:
+                response = client.get(reverse(name), HTTP_ACCEPT_ENCODING='identity')
+                assert response.status_code == 200, (name, response.status_code)
+                bodies[name] = list(response.streaming_content) if response.streaming else [response.content]
+        return bodies
+
+    def _seed(self):
+        user = User.objects.create_user('bench@example.com', 'Bench', 'Bench.pass1')
+        spheres = [LifeSphere.objects.get_or_create(title=title)[0] for title in SPHERES]
+        today = date.today()
+        with use_shard(user.shard or DEFAULT_DB_ALIAS):
+            SphereAssessment.objects.bulk_create(
+                SphereAssessment(user=user, sphere=sphere, date=today - timedelta(days=day), value=random.randint(1, 10))
+                for day in range(365) for sphere in spheres
+            )
+            goals = Goal.objects.bulk_create(
+                Goal(user=user, sphere=random.choice(spheres), title=f"Цель {i}", description=f"Описание цели {i}",
+                     deadline=today + timedelta(days=i - 10), status=random.choice(['active', 'completed']))
+                for i in range(60)
+            )
+            GoalStep.objects.bulk_create(
+                GoalStep(goal=goal, title=f"Шаг {i}", is_completed=random.random() < 0.5) for goal in goals for i in range(5)
+            )
+            DiaryEntry.objects.bulk_create(
+                DiaryEntry(user=user, text=f"Запись {i}: " + "сегодня был хороший день. " * random.randint(1, 10),
+                           sphere=random.choice(spheres), goal=random.choice(goals))
+                for i in range(500)
+            )
+
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        return client
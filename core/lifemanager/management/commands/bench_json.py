@@ -0,0 +1,80 @@
+import json
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import override_settings
+
+from lifemanager.charts import SERIES_COLORS, chart_payload
+from lifemanager.fastjson import BACKENDS, dumps_for_script, orjson
+from lifemanager.models import LifeSphere
+
+SPHERES = ('Здоровье', 'Карьера', 'Финансы', 'Отношения', 'Семья', 'Друзья', 'Отдых', 'Саморазвитие')
+
+
+def _django_dumps(value):
+    # Прежний путь safe_json и JsonResponse: подкласс JSONEncoder, дата за датой через default()
+    return json.dumps(value, cls=DjangoJSONEncoder).encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Микробенчмарк сериализации JSON на больших данных графиков: прежний "
+        "json + DjangoJSONEncoder против stdlib-пути и orjson из lifemanager/fastjson.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=10, help="лет ежедневных оценок в данных")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        payloads = self._payloads(options['years'])
+        variants = [('json + DjangoJSONEncoder', _django_dumps), ('stdlib', BACKENDS['stdlib'])]
+        if orjson is not None:
+            variants.append(('orjson', BACKENDS['orjson']))
+        else:
+            self.stdout.write("orjson не установлен — вариант пропущен")
+
+        for name, payload in payloads.items():
+            size = len(_django_dumps(payload))
+            self.stdout.write(f"\n{name}: {size / 1024:.0f} КБ JSON")
+            self.stdout.write(f"{'сериализатор':<28}{'мс':>9}{'МБ/с':>9}{'ускорение':>11}")
+            baseline = None
+            for variant, dumps in variants:
+                elapsed = self._time(dumps, payload, options['repeat'])
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"{variant:<28}{elapsed * 1000:>9.2f}{size / elapsed / 2 ** 20:>9.1f}{baseline / elapsed:>10.1f}x"
+                )
+
+        # Экранирование для <script> поверх сериализации — сколько оно добавляет
+        payload = payloads['charts (API, даты в точках)']
+        with override_settings(JSON_BACKEND='auto'):
+            escaped = self._time(dumps_for_script, payload, options['repeat'])
+            plain = self._time(BACKENDS['orjson' if orjson is not None else 'stdlib'], payload, options['repeat'])
+        self.stdout.write(f"\nsafe_json (с экранированием для <script>): {escaped * 1000:.2f} мс, без — {plain * 1000:.2f} мс")
+
+    def _time(self, dumps, payload, repeat):
+        dumps(payload)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            dumps(payload)
+        return (time.perf_counter() - started) / repeat
+
+    def _payloads(self, years):
+        # Несохранённые сферы: нужны только id и title, БД бенчмарку не нужна
+        spheres = [LifeSphere(title=title) for title in SPHERES]
+        start = date.today() - timedelta(days=365 * years)
+        days = [start + timedelta(days=d) for d in range(365 * years)]
+        rows = [
+            {'sphere_id': sphere.id, 'bucket': day, 'avg': (d * 7 + i) % 10 + 1.0}
+            for d, day in enumerate(reversed(days)) for i, sphere in enumerate(spheres)
+        ]
+        return {
+            'chart_data (день, без прореживания)': chart_payload(rows, spheres, 'day'),
+            'charts (API, даты в точках)': {'charts': [
+                {'sphere': sphere.title, 'color': SERIES_COLORS[i], 'points': [(day, (d + i) % 10 + 1) for d, day in enumerate(days)]}
+                for i, sphere in enumerate(spheres)
+            ]},
+        }
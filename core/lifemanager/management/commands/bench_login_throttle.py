@@ -0,0 +1,91 @@
+import logging
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+
+from lifemanager.models import User
+
+PASSWORD = 'Bench.pass1'
+REAL_USERS = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Имитирует подбор паролей к /login/ и меряет процессорное время воркера "
+        "без ограничения попыток и с ним (settings.THROTTLE_RATES). Параллельно "
+        "входят настоящие пользователи — видно, как атака влияет на их задержку."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=120, help="попыток атакующего на каждый вариант")
+        parser.add_argument('--concurrency', type=int, default=4, help="параллельных атакующих")
+        parser.add_argument('--emails', type=int, default=20, help="атакуемых email")
+        parser.add_argument('--ips', type=int, default=4, help="IP-адресов атакующего")
+
+    def handle(self, *args, **options):
+        logging.disable(logging.WARNING)
+        with tempfile.TemporaryDirectory() as tmp:
+            for alias in connections:
+                settings_dict = connections[alias].settings_dict
+                if settings_dict['ENGINE'].endswith('sqlite3') and not settings_dict['TEST'].get('MIRROR'):
+                    settings_dict['TEST']['NAME'] = os.path.join(tmp, f'{alias}.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                for i in range(REAL_USERS):
+                    User.objects.create_user(f'real{i}@example.com', 'Real', PASSWORD)
+                with override_settings(THROTTLE_RATES={}):
+                    unlimited = self._attack(options)
+                cache.clear()
+                limited = self._attack(options)
+            finally:
+                connections.close_all()
+                teardown_databases(old_config, verbosity=0)
+                logging.disable(logging.NOTSET)
+
+        self.stdout.write(
+            f"{'вариант':<16}{'CPU, с':>8}{'CPU/попытку, мс':>17}{'отклонено':>11}{'вход p50, мс':>14}"
+        )
+        for name, (cpu, rejected, logins) in (('без лимита', unlimited), ('с лимитом', limited)):
+            self.stdout.write(
+                f"{name:<16}{cpu:>8.2f}{cpu / options['attempts'] * 1000:>17.1f}{rejected:>11}"
+                f"{statistics.median(logins) * 1000:>14.1f}"
+            )
+
+    def _attack(self, options):
+        login_url = reverse('login')
+        logins = []
+        stop = False
+
+        def attempt(i):
+            client = Client(HTTP_HOST='localhost', REMOTE_ADDR=f'203.0.113.{i % options["ips"] + 1}')
+            response = client.post(login_url, {'email': f'victim{i % options["emails"]}@example.com', 'password': 'guess'})
+            return response.status_code == 429
+
+        def real_users():
+            # Настоящие пользователи входят со своих адресов, пока идёт атака; по
+            # несколько раз каждый — в пределах лимита на email
+            for i in range(REAL_USERS * 4):
+                if stop:
+                    break
+                client = Client(HTTP_HOST='localhost', REMOTE_ADDR=f'198.51.100.{i % REAL_USERS + 1}')
+                started = time.perf_counter()
+                client.post(login_url, {'email': f'real{i % REAL_USERS}@example.com', 'password': PASSWORD})
+                logins.append(time.perf_counter() - started)
+                time.sleep(0.05)
+
+        cpu_started = time.process_time()
+        with ThreadPoolExecutor(max_workers=options['concurrency'] + 1) as pool:
+            legit = pool.submit(real_users)
+            rejected = sum(pool.map(attempt, range(options['attempts'])))
+            stop = True
+            legit.result()
+        return time.process_time() - cpu_started, rejected, logins or [0]
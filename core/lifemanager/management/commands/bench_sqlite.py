@@ -0,0 +1,118 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lifemanager.db import pragma_statements
+
+USERS = 200
+SPHERES = 8
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест SQLite: параллельные чтения и записи в профиле по умолчанию "
+        "(rollback journal, новое соединение на запрос) и в production-профиле "
+        "(WAL, прагмы, постоянные соединения)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5.0, help="секунд на каждый профиль")
+        parser.add_argument('--rows', type=int, default=50000, help="начальное число оценок")
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in ('default', 'production'):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._seed(path, options['rows'])
+                results[profile] = self._run(path, profile, options)
+
+        self.stdout.write(f"{'профиль':<12}{'чтений/с':>12}{'записей/с':>12}{'ошибок':>10}")
+        for profile, (reads, writes, errors) in results.items():
+            duration = options['duration']
+            self.stdout.write(f"{profile:<12}{reads / duration:>12.0f}{writes / duration:>12.0f}{errors:>10}")
+
+    def _seed(self, path, rows):
+        conn = sqlite3.connect(path)
+        conn.execute(
+            'CREATE TABLE assessment (id INTEGER PRIMARY KEY, user_id INTEGER, '
+            'sphere_id INTEGER, date TEXT, value INTEGER)'
+        )
+        conn.execute('CREATE INDEX assessment_user_date ON assessment (user_id, date DESC)')
+        start = date(2015, 1, 1)
+        conn.executemany(
+            'INSERT INTO assessment (user_id, sphere_id, date, value) VALUES (?, ?, ?, ?)',
+            (
+                (i % USERS, i % SPHERES, (start + timedelta(days=i // USERS)).isoformat(), random.randint(1, 10))
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+        conn.close()
+
+    def _connect(self, path, profile):
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        if profile == 'production':
+            for statement in pragma_statements(settings.SQLITE_PRODUCTION_PRAGMAS):
+                conn.execute(statement)
+        return conn
+
+    def _run(self, path, profile, options):
+        counters = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+        persistent = profile == 'production'
+
+        if persistent:
+            # journal_mode=WAL сохраняется в файле БД — включаем один раз до старта потоков
+            self._connect(path, profile).close()
+
+        def worker(operation):
+            conn = self._connect(path, profile) if persistent else None
+            done = errors = 0
+            while time.perf_counter() < deadline:
+                current = conn or self._connect(path, profile)
+                try:
+                    operation(current)
+                    done += 1
+                except sqlite3.OperationalError:
+                    errors += 1
+                finally:
+                    if not persistent:
+                        current.close()
+            if conn:
+                conn.close()
+            key = 'reads' if operation is read else 'writes'
+            with lock:
+                counters[key] += done
+                counters['errors'] += errors
+
+        def read(conn):
+            conn.execute(
+                'SELECT date, sphere_id, value FROM assessment WHERE user_id = ? ORDER BY date DESC LIMIT 50',
+                (random.randrange(USERS),),
+            ).fetchall()
+
+        def write(conn):
+            conn.execute(
+                'INSERT INTO assessment (user_id, sphere_id, date, value) VALUES (?, ?, ?, ?)',
+                (random.randrange(USERS), random.randrange(SPHERES), date.today().isoformat(), random.randint(1, 10)),
+            )
+            conn.commit()
+
+        threads = [threading.Thread(target=worker, args=(read,)) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=(write,)) for _ in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counters['reads'], counters['writes'], counters['errors']
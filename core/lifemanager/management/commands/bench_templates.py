@@ -0,0 +1,107 @@
+import copy
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, time as day_time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+
+from lifemanager.models import User, LifeSphere, SphereAssessment, Goal, DiaryEntry, Reminder, Note, NoteItem
+from lifemanager.sharding import use_shard
+
+VIEWS = ('dashboard', 'goal_list', 'diary_list', 'reminder_list', 'note_list', 'profile', 'assessment_history')
+SPHERES = ('Здоровье', 'Карьера', 'Финансы', 'Отношения', 'Семья', 'Друзья', 'Отдых', 'Саморазвитие')
+
+
+class Command(BaseCommand):
+    help = (
+        "Время ответа страниц по шаблонам до и после кэширования: «до» — загрузчик "
+        "без кэша и выключенные фрагменты {% cache %}, «после» — cached.Loader и "
+        "фрагменты в кэше. Страницы запрашиваются повторно, как при обычной навигации."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help="запросов на страницу в каждом варианте")
+
+    def handle(self, *args, **options):
+        logging.disable(logging.INFO)
+        with tempfile.TemporaryDirectory() as tmp:
+            for alias in connections:
+                settings_dict = connections[alias].settings_dict
+                if settings_dict['ENGINE'].endswith('sqlite3') and not settings_dict['TEST'].get('MIRROR'):
+                    settings_dict['TEST']['NAME'] = os.path.join(tmp, f'{alias}.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                client = self._seed()
+                before = self._measure(client, options['repeat'], cached=False)
+                after = self._measure(client, options['repeat'], cached=True)
+            finally:
+                connections.close_all()
+                teardown_databases(old_config, verbosity=0)
+                logging.disable(logging.NOTSET)
+
+        self.stdout.write(f"{'страница':<22}{'до, мс':>10}{'после, мс':>12}{'ускорение':>12}")
+        for name in VIEWS:
+            self.stdout.write(
+                f"{name:<22}{before[name] * 1000:>10.1f}{after[name] * 1000:>12.1f}{before[name] / after[name]:>11.1f}x"
+            )
+
+    def _measure(self, client, repeat, cached):
+        templates = copy.deepcopy(settings.TEMPLATES)
+        templates[0]['APP_DIRS'] = False
+        loaders = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']
+        templates[0]['OPTIONS']['loaders'] = [('django.template.loaders.cached.Loader', loaders)] if cached else loaders
+        caches = copy.deepcopy(settings.CACHES)
+        if not cached:
+            caches['fragments'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+        timings = {}
+        with override_settings(TEMPLATES=templates, CACHES=caches, DEBUG=False, ALLOWED_HOSTS=['localhost']):
+            for name in VIEWS:
+                path = reverse(name)
+                client.get(path)  # прогрев: кэши данных и фрагментов, разбор шаблонов
+                samples = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    samples.append(time.perf_counter() - started)
+                    assert response.status_code == 200, (path, response.status_code)
+                timings[name] = statistics.median(samples)
+        return timings
+
+    def _seed(self):
+        user = User.objects.create_user('bench@example.com', 'Bench', 'Bench.pass1')
+        spheres = [LifeSphere.objects.get_or_create(title=title)[0] for title in SPHERES]
+        today = date.today()
+        with use_shard(user.shard or DEFAULT_DB_ALIAS):
+            SphereAssessment.objects.bulk_create(
+                SphereAssessment(user=user, sphere=sphere, date=today - timedelta(days=day), value=random.randint(1, 10))
+                for day in range(90) for sphere in spheres
+            )
+            goals = Goal.objects.bulk_create(
+                Goal(user=user, sphere=random.choice(spheres), title=f"Цель {i}",
+                     deadline=today + timedelta(days=i - 10), status=random.choice(['active', 'completed']))
+                for i in range(30)
+            )
+            DiaryEntry.objects.bulk_create(
+                DiaryEntry(user=user, text=f"Запись {i}", sphere=random.choice(spheres), goal=random.choice(goals))
+                for i in range(50)
+            )
+            Reminder.objects.bulk_create(
+                Reminder(user=user, type=random.choice(['daily', 'weekly']), time=day_time(9 + i % 10))
+                for i in range(12)
+            )
+            notes = Note.objects.bulk_create(Note(user=user, title=f"Заметка {i}") for i in range(20))
+            NoteItem.objects.bulk_create(NoteItem(note=note, text=f"Пункт {i}") for note in notes for i in range(4))
+
+        client = Client(HTTP_HOST='localhost')
+        client.force_login(user)
+        return client
@@ -0,0 +1,153 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lifemanager.db import pragma_statements
+from lifemanager.ids import uuid7, uuid7_at
+
+USERS = 1000
+TEXT = 'Запись в дневнике о прошедшем дне. ' * 5
+
+# Схема повторяет таблицу DiaryEntry на SQLite: UUID хранится как char(32) в hex,
+# первичный ключ — отдельный уникальный индекс, плюс индексы внешнего ключа и ленты
+SCHEMA = (
+    'CREATE TABLE diary (id char(32) NOT NULL PRIMARY KEY, user_id char(32) NOT NULL, '
+    'created_at datetime NOT NULL, text text NOT NULL)',
+    'CREATE INDEX diary_user_id ON diary (user_id)',
+    'CREATE INDEX diary_user_created_idx ON diary (user_id, created_at DESC)',
+)
+TIME_INDEX = 'CREATE INDEX diary_created_at ON diary (created_at)'
+
+# (название, генератор ключей, есть ли отдельный индекс по created_at)
+VARIANTS = (
+    ('uuid4', 'uuid4', False),
+    ('uuid4 + индекс created_at', 'uuid4', True),
+    ('uuid7', 'uuid7', False),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк первичных ключей на SQLite: вставка нескольких миллионов строк с uuid4 "
+        "и uuid7 (lifemanager/ids.py) и выборки диапазонов по времени. С uuid7 окно по "
+        "времени выбирается по первичному ключу, без отдельного индекса по created_at."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000)
+        parser.add_argument('--batch', type=int, default=10_000, help="строк в одной транзакции")
+        parser.add_argument('--days', type=int, default=3 * 365, help="за сколько дней распределены строки")
+        parser.add_argument('--scans', type=int, default=20, help="выборок каждого вида")
+        parser.add_argument('--window', type=int, default=60, help="окно выборки по времени, минут")
+        parser.add_argument('--production', action='store_true',
+                            help="прагмы SQLITE_PRODUCTION_PRAGMAS (WAL, кэш 64 МБ) вместо значений SQLite по умолчанию")
+
+    def handle(self, *args, **options):
+        self._ids(options)
+        end = datetime.now(timezone.utc).replace(microsecond=0)
+        start = end - timedelta(days=options['days'])
+        users = [uuid.uuid4().hex for _ in range(USERS)]
+
+        results = []
+        for name, scheme, time_index in VARIANTS:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self.stdout.write(f"\n{name}: вставка {options['rows']:,} строк…")
+                total, tail = self._insert(path, scheme, time_index, start, end, users, options)
+                size = os.path.getsize(path)
+                window, latest = self._scan(path, scheme, start, end, options)
+                results.append((name, total, tail, size, window, latest))
+
+        self.stdout.write(
+            f"\n{'схема':<28}{'вставок/с':>12}{'посл. 10%':>12}{'размер, МБ':>12}"
+            f"{'окно, мс':>11}{'последние, мс':>15}"
+        )
+        for name, total, tail, size, window, latest in results:
+            self.stdout.write(
+                f"{name:<28}{total:>12,.0f}{tail:>12,.0f}{size / 2 ** 20:>12.0f}"
+                f"{window * 1000:>11.2f}{latest * 1000:>15.2f}"
+            )
+
+    def _ids(self, options):
+        count = 100_000
+        for name, generate in (('uuid4', uuid.uuid4), ('uuid7', uuid7)):
+            started = time.perf_counter()
+            for _ in range(count):
+                generate()
+            self.stdout.write(f"генерация {name}: {(time.perf_counter() - started) / count * 1e6:.2f} мкс на ключ")
+
+    def _connect(self, path, options):
+        conn = sqlite3.connect(path)
+        if options['production']:
+            for statement in pragma_statements(settings.SQLITE_PRODUCTION_PRAGMAS):
+                conn.execute(statement)
+        return conn
+
+    def _insert(self, path, scheme, time_index, start, end, users, options):
+        conn = self._connect(path, options)
+        for statement in SCHEMA + ((TIME_INDEX,) if time_index else ()):
+            conn.execute(statement)
+        conn.commit()
+
+        rows, batch = options['rows'], options['batch']
+        start_ms = int(start.timestamp() * 1000)
+        step_ms = (end - start).total_seconds() * 1000 / rows
+        elapsed = tail_elapsed = 0.0
+        tail_rows = 0
+        tail_from = rows - rows // 10
+        for offset in range(0, rows, batch):
+            # Строки готовятся вне замера: время — только на вставку в B-деревья
+            values = []
+            for i in range(offset, min(offset + batch, rows)):
+                ms = start_ms + int(i * step_ms)
+                key = uuid7(ms) if scheme == 'uuid7' else uuid.uuid4()
+                created_at = datetime.fromtimestamp(ms / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')
+                values.append((key.hex, users[i % USERS], created_at, TEXT))
+            started = time.perf_counter()
+            conn.executemany('INSERT INTO diary (id, user_id, created_at, text) VALUES (?, ?, ?, ?)', values)
+            conn.commit()
+            spent = time.perf_counter() - started
+            elapsed += spent
+            if offset >= tail_from:
+                tail_elapsed += spent
+                tail_rows += len(values)
+        conn.close()
+        return rows / elapsed, tail_rows / tail_elapsed if tail_elapsed else 0.0
+
+    def _scan(self, path, scheme, start, end, options):
+        conn = self._connect(path, options)
+        window = timedelta(minutes=options['window'])
+        span = (end - start - window).total_seconds()
+        moments = [start + timedelta(seconds=random.uniform(0, span)) for _ in range(options['scans'])]
+
+        def window_query(moment):
+            if scheme == 'uuid7':
+                # Границы окна — наименьшие UUIDv7 его начала и конца: диапазон по первичному ключу
+                bounds = (uuid7_at(moment).hex, uuid7_at(moment + window).hex)
+                sql = 'SELECT count(*), sum(length(text)) FROM diary WHERE id >= ? AND id < ?'
+            else:
+                fmt = '%Y-%m-%d %H:%M:%S.%f'
+                bounds = (moment.strftime(fmt), (moment + window).strftime(fmt))
+                sql = 'SELECT count(*), sum(length(text)) FROM diary WHERE created_at >= ? AND created_at < ?'
+            return conn.execute(sql, bounds).fetchone()
+
+        def latest_query(_):
+            order = 'id' if scheme == 'uuid7' else 'created_at'
+            return conn.execute(f'SELECT id, created_at, text FROM diary ORDER BY {order} DESC LIMIT 100').fetchall()
+
+        timings = []
+        for query in (window_query, latest_query):
+            query(moments[0])
+            started = time.perf_counter()
+            for moment in moments:
+                query(moment)
+            timings.append((time.perf_counter() - started) / len(moments))
+        conn.close()
+        return timings
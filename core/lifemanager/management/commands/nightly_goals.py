@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from lifemanager.goals import CHUNK_SIZE, disable_finished_reminders, flag_overdue_goals, goal_counters
+from lifemanager.models import User
+from lifemanager.sharding import data_aliases, use_shard
+from lifemanager.versioning import touch_user_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Ночное обслуживание целей всех пользователей: отмечает просроченные цели, "
+        "выключает напоминания по дедлайну для выполненных и просроченных целей и "
+        "обновляет закэшированные счётчики целей. Работает set-based UPDATE порциями "
+        "на каждом шарде. Запускайте раз в сутки вскоре после полуночи, например "
+        "из cron: 5 0 * * * python manage.py nightly_goals"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="строк в одном UPDATE")
+
+    def handle(self, *args, **options):
+        today = date.today()
+        chunk_size = options['chunk_size']
+        for alias in data_aliases():
+            with use_shard(alias):
+                goal_users = flag_overdue_goals(today, chunk_size)
+                reminder_users = disable_finished_reminders(today, chunk_size)
+                changed = goal_users | reminder_users
+                self._refresh_users(list(changed), chunk_size)
+            self.stdout.write(
+                f"{alias}: цели изменены у {len(goal_users)}, напоминания — у {len(reminder_users)} пользователей"
+            )
+        self.stdout.write(self.style.SUCCESS("Готово"))
+
+    def _refresh_users(self, user_ids, chunk_size):
+        # UPDATE шли в обход сигналов — отмечаем изменение данных сами и
+        # сразу пересчитываем счётчики под новой версией
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            touch_user_data(pk__in=chunk)
+            users = User.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=chunk).only('pk', 'data_changed_at')
+            for user in users:
+                goal_counters(user)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from lifemanager.management.users import user_identifiers_q
+from lifemanager.models import User
+from lifemanager.purge import BATCH_SIZE, purge_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет аккаунты вместе со всеми данными и файлами дневника пакетами "
+        "по диапазонам id в коротких транзакциях — в отличие от user.delete(), "
+        "не блокирует базу на время удаления большого аккаунта."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='+', help="id или email пользователя")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="строк в одном DELETE")
+
+    def handle(self, *args, **options):
+        users = list(User.objects.using(DEFAULT_DB_ALIAS).filter(user_identifiers_q(options['users'])))
+        if not users:
+            raise CommandError("Пользователи не найдены")
+
+        for user in users:
+            self.stdout.write(f"{user.email}:")
+            counts = purge_user(user, options['batch_size'], progress=self._progress)
+            self.stdout.write(self.style.SUCCESS(f"{user.email}: удалено строк {sum(counts.values())}"))
+
+    def _progress(self, model, deleted):
+        self.stdout.write(f"  {model.__name__}: {deleted}")
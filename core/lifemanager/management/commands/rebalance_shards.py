@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from lifemanager.management.users import user_identifiers_q
+from lifemanager.models import User, LifeSphere
+from lifemanager.sharding import (
+    copy_reference_rows, delete_user_rows, forget_user_shard, insert_rows, pick_shard, shard_aliases,
+    user_data_models,
+)
+from lifemanager.usercache import forget_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Синхронизирует справочные таблицы (User, LifeSphere) на шарды и переносит "
+        "данные пользователей, чей текущий шард не совпадает с картой шардов. "
+        "Пользователи без шарда переносятся из основной БД. Запускайте в окно "
+        "обслуживания: записи пользователя во время переноса могут потеряться."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', help="id или email пользователя (можно несколько)")
+        parser.add_argument('--dry-run', action='store_true', help="только показать план переноса")
+
+    def handle(self, *args, **options):
+        shards = shard_aliases()
+        if not shards:
+            raise CommandError("Шарды не настроены: задайте LIFEMANAGER_DB_SHARDS")
+
+        users = User.objects.using(DEFAULT_DB_ALIAS).order_by('created_at')
+        if options['users']:
+            users = users.filter(user_identifiers_q(options['users']))
+
+        if not options['dry_run']:
+            copy_reference_rows(LifeSphere, list(LifeSphere.objects.using(DEFAULT_DB_ALIAS)))
+
+        moved = 0
+        for user in users.iterator():
+            source = user.shard or DEFAULT_DB_ALIAS
+            target = pick_shard(user.pk, shards)
+            if source == target:
+                continue
+            self.stdout.write(f"{user.email}: {source} -> {target}")
+            if not options['dry_run']:
+                self._move_user(user, source, target)
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Перенесено пользователей: {moved}"))
+
+    def _move_user(self, user, source, target):
+        with transaction.atomic(using=target):
+            copy_reference_rows(User, [user], aliases=[target])
+            for model, owner_lookup in user_data_models():
+                rows = model._base_manager.using(source).filter(**{owner_lookup: user.pk})
+                insert_rows(model, rows.iterator(), target)
+
+        # После копирования переключаем карту шардов, затем чистим источник
+        User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user.pk).update(shard=target)
+        forget_user_shard(user.pk)
+        forget_users([user.pk])
+
+        with transaction.atomic(using=source):
+            delete_user_rows(user.pk, source)
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import selectors
+import signal
+import socket
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from lifemanager.taskqueue import claim, execute, finish, next_run_in
+
+IDLE_TIMEOUT = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет фоновые задачи из таблицы lifemanager_task пулом потоков или процессов. "
+        "Свободный воркер не опрашивает таблицу: он спит до UDP-сигнала о новой задаче "
+        "(TASK_WAKEUP_ADDRESS), до срока ближайшей отложенной задачи или до TASK_IDLE_TIMEOUT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 2, help="задач одновременно")
+        parser.add_argument('--processes', action='store_true',
+                            help="пул процессов вместо потоков — для задач, нагружающих процессор")
+        parser.add_argument('--burst', action='store_true', help="выполнить готовые задачи и выйти")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        idle_timeout = getattr(settings, 'TASK_IDLE_TIMEOUT', IDLE_TIMEOUT)
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        selector = selectors.DefaultSelector()
+        # Пара сокетов будит цикл из других потоков: задача завершилась или пришёл сигнал остановки
+        wake_r, wake_w = socket.socketpair()
+        wake_r.setblocking(False)
+        selector.register(wake_r, selectors.EVENT_READ)
+        listener = self._listen()
+        if listener is not None:
+            selector.register(listener, selectors.EVENT_READ)
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+            wake_w.send(b'1')
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        def make_pool():
+            if options['processes']:
+                # spawn, а не fork: дочерний процесс не унаследует открытые соединения с БД,
+                # а Django в нём настроит django.setup до распаковки первой задачи
+                return ProcessPoolExecutor(concurrency, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=django.setup)
+            return ThreadPoolExecutor(concurrency, thread_name_prefix='task')
+
+        pool = make_pool()
+        self.stdout.write(f"Воркер {worker_id}: {concurrency} {'процессов' if options['processes'] else 'потоков'}")
+
+        inflight = {}
+        done = 0
+        try:
+            while True:
+                for future in [future for future in inflight if future.done()]:
+                    task = inflight.pop(future)
+                    error = future.result() if future.exception() is None else repr(future.exception())
+                    finish(task, error)
+                    done += 1
+
+                free = concurrency - len(inflight)
+                claimed = claim(worker_id, free) if free and not stopping else []
+                for task in claimed:
+                    try:
+                        future = pool.submit(execute, task.name, task.args, task.kwargs)
+                    except BrokenProcessPool as e:
+                        # Процесс пула погиб (например, OOM) — задача уйдёт на повтор, пул пересоздаём
+                        finish(task, repr(e))
+                        pool.shutdown(wait=False)
+                        pool = make_pool()
+                        continue
+                    future.add_done_callback(lambda future: wake_w.send(b'1'))
+                    inflight[future] = task
+
+                if not inflight and (stopping or options['burst'] and not claimed):
+                    break
+                if len(inflight) == concurrency:
+                    timeout = idle_timeout  # пул занят, разбудит завершение задачи
+                elif stopping:
+                    timeout = None
+                else:
+                    timeout = next_run_in(idle_timeout)
+                for key, _ in selector.select(timeout):
+                    try:
+                        while key.fileobj.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+        finally:
+            pool.shutdown(wait=True)
+            selector.close()
+            wake_r.close()
+            wake_w.close()
+            if listener is not None:
+                listener.close()
+            connections.close_all()
+        self.stdout.write(f"Воркер {worker_id} остановлен, обработано задач: {done}")
+
+    def _listen(self):
+        address = getattr(settings, 'TASK_WAKEUP_ADDRESS', None)
+        if not address:
+            return None
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            # Несколько run_workers на одном хосте делят порт, сигнал получает один из них
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        try:
+            sock.bind(address)
+        except OSError as e:
+            self.stderr.write(f"Не удалось слушать {address}: {e}; новые задачи — по таймауту")
+            sock.close()
+            return None
+        sock.setblocking(False)
+        return sock
@@ -0,0 +1,45 @@
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lifemanager.reports import BATCH_SIZE, check_week, generate_reports, last_week_start, week_start_of
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает недельные отчёты всех активных пользователей: пачки пользователей "
+        "расходятся по пулу процессов, каждая пачка считается несколькими агрегирующими "
+        "запросами. Только за прошлую неделю: выполненные цели считаются на момент "
+        "запуска, поэтому запускайте в понедельник ночью, например из cron: "
+        "30 0 * * 1 python manage.py weekly_reports"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week', help="любой день прошлой недели, ГГГГ-ММ-ДД; другие недели не собираются")
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help="процессов в пуле")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="пользователей в пачке")
+
+    def handle(self, *args, **options):
+        if options['week']:
+            try:
+                day = date.fromisoformat(options['week'])
+            except ValueError:
+                raise CommandError("--week: ожидается дата ГГГГ-ММ-ДД")
+            week_start = week_start_of(day)
+        else:
+            week_start = last_week_start()
+        try:
+            check_week(week_start)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        count = generate_reports(
+            week_start, processes=options['processes'], batch_size=options['batch_size'],
+            progress=lambda done: self.stdout.write(f"  готово отчётов: {done}"),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Неделя с {week_start}: {count} отчётов за {time.perf_counter() - started:.1f} с"
+        ))
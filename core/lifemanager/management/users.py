@@ -0,0 +1,24 @@
+import uuid
+
+from django.core.management.base import CommandError
+from django.db.models import Q
+
+
+def user_identifiers_q(identifiers):
+    """Q-фильтр пользователей по списку id и email из аргументов команды.
+
+    Строка с @ считается email, остальные должны быть UUID — иначе CommandError
+    со списком ошибочных значений, а не ValidationError из запроса.
+    """
+    emails, pks, invalid = [], [], []
+    for identifier in identifiers:
+        if '@' in identifier:
+            emails.append(identifier)
+            continue
+        try:
+            pks.append(uuid.UUID(identifier))
+        except ValueError:
+            invalid.append(identifier)
+    if invalid:
+        raise CommandError(f"Не email и не id пользователя: {', '.join(invalid)}")
+    return Q(email__in=emails) | Q(pk__in=pks)
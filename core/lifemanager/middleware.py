@@ -0,0 +1,248 @@
+import logging
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.cache import patch_vary_headers
+
+from .compression import COMPRESSIBLE_TYPES, acompress_stream, aiterate, compress_bytes, compress_stream, negotiate
+from .log import bind_request, unbind_request
+from .routers import start_request, finish_request
+from .sharding import activate_shard, deactivate_shard, sharding_enabled
+from .spheres import sphere_registry
+
+PIN_COOKIE_NAME = 'lm_pin_primary'
+
+request_logger = logging.getLogger('lifemanager.request')
+
+
+class HybridMiddleware:
+    """Основа middleware, работающего и под WSGI, и под ASGI.
+
+    Под ASGI синхронный middleware заставляет Django переключаться в поток на
+    каждом запросе, поэтому здесь __call__ возвращает корутину, если дальше по
+    цепочке асинхронный обработчик.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class AsgiUrlconfMiddleware(HybridMiddleware):
+    """Под ASGI разрешает адреса по ASGI_URLCONF: там страницы чтения — async-view.
+
+    Под WSGI остаётся ROOT_URLCONF с синхронными view: async-view там
+    выполнялись бы через async_to_sync на каждом запросе.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        return self.get_response(request)
+
+    async def _acall(self, request):
+        request.urlconf = settings.ASGI_URLCONF
+        return await self.get_response(request)
+
+
+class SphereVersionMiddleware(HybridMiddleware):
+    """Читает версию каталога сфер из кэша один раз за запрос (см. spheres.py)."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        token = sphere_registry.begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            sphere_registry.end_request(token)
+
+    async def _acall(self, request):
+        token = sphere_registry.begin_request()
+        try:
+            return await self.get_response(request)
+        finally:
+            sphere_registry.end_request(token)
+
+
+class RequestLogMiddleware(HybridMiddleware):
+    """Присваивает запросу request_id и пишет строку access-лога с длительностью."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        request_id, token, started = self._start(request)
+        try:
+            return self._finish(request, self.get_response(request), request_id, started)
+        finally:
+            unbind_request(token)
+
+    async def _acall(self, request):
+        request_id, token, started = self._start(request)
+        try:
+            return self._finish(request, await self.get_response(request), request_id, started)
+        finally:
+            unbind_request(token)
+
+    def _start(self, request):
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        return request_id, bind_request(request, request_id), time.perf_counter()
+
+    def _finish(self, request, response, request_id, started):
+        response['X-Request-ID'] = request_id
+        request_logger.info(
+            "%s %s %s", request.method, request.path, response.status_code,
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            },
+        )
+        return response
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Сжимает текстовые ответы gzip или brotli — что лучше принимает клиент.
+
+    Потоковые ответы сжимаются на лету по кускам, без буферизации всего тела;
+    под ASGI синхронный поток отдаётся через асинхронный итератор.
+    Ответы с уже заданной Content-Encoding (предсжатая статика) и файлы из
+    diary_media/ не трогаются. Уровни сжатия — COMPRESSION_GZIP_LEVEL и
+    COMPRESSION_BROTLI_QUALITY в настройках.
+
+    Как GZipMiddleware Django, каждый сжатый ответ получает случайное дополнение
+    до max_random_bytes байт (см. compression.Compressor) — против BREACH на
+    страницах с CSRF-токеном.
+    """
+
+    min_length = 200
+    max_random_bytes = 100
+    skip_prefixes = ('diary_media/',)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        return self._compress(request, self.get_response(request))
+
+    async def _acall(self, request):
+        response = self._compress(request, await self.get_response(request))
+        if response.streaming and not response.is_async:
+            # Иначе ASGI-обработчик соберёт синхронный поток в память целиком;
+            # сжатие в compress_stream выполняется в том же потоке, что и чтение
+            response.streaming_content = aiterate(response.streaming_content)
+        return response
+
+    def _compressible(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return False
+        if not response.streaming and len(response.content) < self.min_length:
+            return False
+        media = request.path.removeprefix(settings.MEDIA_URL)
+        return media == request.path or not media.startswith(self.skip_prefixes)
+
+    def _compress(self, request, response):
+        if not self._compressible(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = negotiate(request)
+        if coding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, coding, max_random_bytes=self.max_random_bytes,
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, coding, max_random_bytes=self.max_random_bytes,
+                )
+            del response['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, coding, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Сжатое тело отличается побайтно — сильный ETag становится слабым
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+
+class ReplicaPinningMiddleware(HybridMiddleware):
+    """Закрепляет чтения за основной БД на короткое время после записи."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        token = start_request(pinned=PIN_COOKIE_NAME in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = finish_request(token)
+        return self._pin(response, wrote)
+
+    async def _acall(self, request):
+        token = start_request(pinned=PIN_COOKIE_NAME in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = finish_request(token)
+        return self._pin(response, wrote)
+
+    def _pin(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class UserShardMiddleware(HybridMiddleware):
+    """Активирует шард текущего пользователя на время запроса.
+
+    Должен стоять после AuthenticationMiddleware.
+    """
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self._acall(request)
+        if not sharding_enabled() or not request.user.is_authenticated:
+            return self.get_response(request)
+        token = activate_shard(request.user.shard or DEFAULT_DB_ALIAS)
+        try:
+            return self.get_response(request)
+        finally:
+            deactivate_shard(token)
+
+    async def _acall(self, request):
+        if not sharding_enabled():
+            return await self.get_response(request)
+        user = await request.auser()
+        # Синхронный request.user дальше по цепочке возьмёт уже загруженного пользователя
+        request._cached_user = user
+        if not user.is_authenticated:
+            return await self.get_response(request)
+        token = activate_shard(user.shard or DEFAULT_DB_ALIAS)
+        try:
+            return await self.get_response(request)
+        finally:
+            deactivate_shard(token)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-19 09:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lifemanager', '0007_note_noteitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='data_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
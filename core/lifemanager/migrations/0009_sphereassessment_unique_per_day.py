@@ -0,0 +1,38 @@
+# Generated by Django 5.0.7 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+def remove_duplicate_assessments(apps, schema_editor):
+    # До появления ограничения параллельные отправки формы могли создать
+    # несколько оценок одной сферы за день — оставляем по одной на день.
+    # Времени создания у оценок нет, поэтому остаётся наибольшая оценка дня,
+    # при равных — с меньшим id: результат не зависит от порядка строк в БД
+    SphereAssessment = apps.get_model('lifemanager', 'SphereAssessment')
+    db_alias = schema_editor.connection.alias
+    previous = None
+    duplicate_ids = []
+    rows = SphereAssessment.objects.using(db_alias).order_by('user_id', 'sphere_id', 'date', '-value', 'id') \
+        .values_list('id', 'user_id', 'sphere_id', 'date')
+    for pk, user_id, sphere_id, day in rows.iterator():
+        key = (user_id, sphere_id, day)
+        if key == previous:
+            duplicate_ids.append(pk)
+        previous = key
+    for start in range(0, len(duplicate_ids), 500):
+        SphereAssessment.objects.using(db_alias).filter(id__in=duplicate_ids[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lifemanager', '0008_user_data_changed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_assessments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sphereassessment',
+            constraint=models.UniqueConstraint(fields=('user', 'sphere', 'date'), name='unique_sphere_assessment_per_day'),
+        ),
+    ]
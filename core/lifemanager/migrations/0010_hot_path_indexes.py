@@ -0,0 +1,37 @@
+# Generated by Django 5.0.7 on 2026-10-19 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lifemanager', '0009_sphereassessment_unique_per_day'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diaryentry',
+            index=models.Index(fields=['user', '-created_at'], name='diary_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['user', 'status', 'deadline'], name='goal_user_status_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', '-created_at'], name='note_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'is_enabled'], name='reminder_user_enabled_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'type', 'time'], name='reminder_user_type_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sphereassessment',
+            index=models.Index(fields=['user', '-date'], name='assessment_user_date_idx'),
+        ),
+    ]
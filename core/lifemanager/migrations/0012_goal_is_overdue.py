@@ -0,0 +1,28 @@
+# Generated by Django 5.0.7 on 2026-10-19 09:53
+
+from datetime import date
+
+from django.db import migrations, models
+
+
+def flag_overdue_goals(apps, schema_editor):
+    # Дальше флаг поддерживают Goal.save() и команда nightly_goals
+    Goal = apps.get_model('lifemanager', 'Goal')
+    db_alias = schema_editor.connection.alias
+    Goal.objects.using(db_alias).filter(status='active', deadline__lt=date.today()).update(is_overdue=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lifemanager', '0011_user_shard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='is_overdue',
+            field=models.BooleanField(default=False, verbose_name='Просрочено'),
+        ),
+        migrations.RunPython(flag_overdue_goals, migrations.RunPython.noop),
+    ]
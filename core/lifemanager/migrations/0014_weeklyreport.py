@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-19 10:18
+
+import django.core.serializers.json
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lifemanager', '0013_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyReport',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('week_start', models.DateField(verbose_name='Понедельник недели')),
+                ('spheres', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('due_soon', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('goals_completed', models.PositiveIntegerField(null=True, verbose_name='Целей выполнено за неделю')),
+                ('goals_completed_total', models.PositiveIntegerField(default=0)),
+                ('steps_completed', models.PositiveIntegerField(default=0, verbose_name='Шагов выполнено')),
+                ('diary_entries', models.PositiveIntegerField(default=0, verbose_name='Записей в дневнике')),
+                ('diary_days', models.PositiveSmallIntegerField(default=0, verbose_name='Дней с записями')),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Недельный отчёт',
+                'verbose_name_plural': 'Недельные отчёты',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='weeklyreport',
+            constraint=models.UniqueConstraint(fields=('user', 'week_start'), name='unique_weekly_report'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.7 on 2026-10-19 10:20
+
+import lifemanager.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lifemanager', '0014_weeklyreport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diaryentry',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='goal',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='goalstep',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='lifesphere',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='noteitem',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='reminder',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='sphereassessment',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='weeklyreport',
+            name='id',
+            field=models.UUIDField(default=lifemanager.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -1,8 +1,13 @@
-import uuid
+from datetime import date
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .ids import new_id
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, name, password=None):
@@ -26,10 +31,14 @@ class UserManager(BaseUserManager):
 
 
 class User(AbstractBaseUser):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     name = models.CharField(max_length=100, null=False, blank=False)
     email = models.EmailField(max_length=255, unique=True, null=False, blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Маркер изменения пользовательских данных (см. versioning.py)
+    data_changed_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Алиас шарда с данными пользователя; пусто — данные в основной БД (см. sharding.py)
+    shard = models.CharField(max_length=50, blank=True, default='', editable=False)
 
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
@@ -54,7 +63,7 @@ class User(AbstractBaseUser):
 
 
 class LifeSphere(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     title = models.CharField(max_length=50, unique=True, null=False, blank=False)
     description = models.TextField(null=True, blank=True)
 
@@ -63,7 +72,7 @@ class LifeSphere(models.Model):
 
 
 class SphereAssessment(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     value = models.PositiveSmallIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(10)],
         null=False,
@@ -76,6 +85,13 @@ class SphereAssessment(models.Model):
     class Meta:
         verbose_name = "Оценка сферы"
         verbose_name_plural = "Оценки сфер"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sphere', 'date'], name='unique_sphere_assessment_per_day'),
+        ]
+        # Выборки (user, sphere) по -date обслуживает индекс ограничения уникальности
+        indexes = [
+            models.Index(fields=['user', '-date'], name='assessment_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} — {self.sphere.title}: {self.value}"
@@ -87,7 +103,7 @@ class Goal(models.Model):
         COMPLETED = 'completed', 'Выполнена'
         POSTPONED = 'postponed', 'Отложена'
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     title = models.CharField(max_length=100, null=False, blank=False)
     description = models.TextField(null=True, blank=True)
     deadline = models.DateField(null=False, blank=False)
@@ -104,16 +120,28 @@ class Goal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
     is_pinned = models.BooleanField(default=False, verbose_name="Закреплено")
+    # Поддерживается save() и ночной командой nightly_goals — страницы не сравнивают дедлайн с сегодняшним днём
+    is_overdue = models.BooleanField(default=False, verbose_name="Просрочено")
 
     class Meta:
         ordering = ['-is_pinned', 'deadline']
+        indexes = [
+            models.Index(fields=['user', 'status', 'deadline'], name='goal_user_status_deadline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})" # Закреплённые сверху
 
+    def save(self, *args, **kwargs):
+        self.is_overdue = self.status == self.Status.ACTIVE and self.deadline < date.today()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'status', 'deadline'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'is_overdue'}
+        super().save(*args, **kwargs)
+
 
 class DiaryEntry(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     text = models.TextField(null=False, blank=False)
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -124,6 +152,9 @@ class DiaryEntry(models.Model):
     class Meta:
         verbose_name = "Запись в дневнике"
         verbose_name_plural = "Записи в дневнике"
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='diary_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name} — {self.created_at.strftime('%Y-%m-%d')}"
@@ -135,7 +166,7 @@ class Reminder(models.Model):
         WEEKLY = 'weekly', 'Еженедельно'
         DEADLINE_BASED = 'deadline_based', 'По дедлайну'
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     type = models.CharField(max_length=20, choices=Type.choices, null=False, blank=False)
     time = models.TimeField(null=False, blank=False)
     is_enabled = models.BooleanField(default=True)
@@ -144,11 +175,17 @@ class Reminder(models.Model):
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, null=True, blank=True)
     sphere = models.ForeignKey(LifeSphere, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_enabled'], name='reminder_user_enabled_idx'),
+            models.Index(fields=['user', 'type', 'time'], name='reminder_user_type_time_idx'),
+        ]
+
     def __str__(self):
         return f"Напоминание для {self.user.email} ({self.get_type_display()})"
 
 class GoalStep(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='steps')
     title = models.CharField(max_length=150, null=False, blank=False)
     is_completed = models.BooleanField(default=False)
@@ -167,7 +204,7 @@ class GoalStep(models.Model):
 
 
 class Note(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     title = models.CharField(max_length=100, verbose_name="Заголовок")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
@@ -179,10 +216,13 @@ class Note(models.Model):
         verbose_name = "Заметка"
         verbose_name_plural = "Заметки"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='note_user_created_idx'),
+        ]
 
 
 class NoteItem(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     note = models.ForeignKey(Note, related_name='items', on_delete=models.CASCADE)
     text = models.CharField(max_length=200, verbose_name="Текст пункта")
     is_completed = models.BooleanField(default=False, verbose_name="Выполнено")
@@ -192,4 +232,72 @@ class NoteItem(models.Model):
 
     class Meta:
         verbose_name = "Пункт заметки"
-        verbose_name_plural = "Пункты заметок"
\ No newline at end of file
+        verbose_name_plural = "Пункты заметок"
+
+
+class WeeklyReport(models.Model):
+    """Итоги недели пользователя, собранные командой weekly_reports (lifemanager/reports.py).
+
+    Разбивка по сферам и ближайшие дедлайны хранятся компактными JSON-массивами:
+    страница отчёта читает одну строку без JOIN.
+    """
+
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    week_start = models.DateField(verbose_name="Понедельник недели")
+    # [[id сферы, средняя за неделю, средняя за прошлую неделю или null], ...]
+    spheres = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    # [[id цели, название, дедлайн], ...] — активные цели с дедлайном на следующей неделе
+    due_soon = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    goals_completed = models.PositiveIntegerField(null=True, verbose_name="Целей выполнено за неделю")
+    goals_completed_total = models.PositiveIntegerField(default=0)
+    steps_completed = models.PositiveIntegerField(default=0, verbose_name="Шагов выполнено")
+    diary_entries = models.PositiveIntegerField(default=0, verbose_name="Записей в дневнике")
+    diary_days = models.PositiveSmallIntegerField(default=0, verbose_name="Дней с записями")
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Недельный отчёт"
+        verbose_name_plural = "Недельные отчёты"
+        # Отчёт за неделю у пользователя один; индекс ограничения обслуживает и выборку по user
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week_start'], name='unique_weekly_report'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} — неделя с {self.week_start}"
+
+
+class Task(models.Model):
+    """Фоновая задача очереди lifemanager/taskqueue.py; выполняет manage.py run_workers."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        FAILED = 'failed', 'Ошибка'
+
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    name = models.CharField(max_length=200, verbose_name="Задача")
+    # UUID, даты и Decimal в аргументах сохраняются строками
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(default=0, verbose_name="Приоритет")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Запустить не раньше")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        # Воркер берёт задачи по (status, -priority, run_at) — индекс в том же порядке
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'], name='task_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
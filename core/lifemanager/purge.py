@@ -0,0 +1,67 @@
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import User, DiaryEntry
+from .sharding import user_data_models
+from .usercache import forget_users
+
+logger = logging.getLogger('lifemanager')
+
+BATCH_SIZE = 500
+
+
+def _delete_in_batches(queryset, alias, batch_size, progress):
+    """Удаляет строки диапазонами первичных ключей, каждый диапазон — своя транзакция.
+
+    DELETE выполняется напрямую, без сборщика on_delete: дочерние таблицы к
+    этому моменту уже пусты, а сигналы удаления для стираемого аккаунта не нужны.
+    """
+    queryset = queryset.using(alias).order_by('pk')
+    deleted = 0
+    while True:
+        with transaction.atomic(using=alias):
+            boundary = list(queryset.values_list('pk', flat=True)[batch_size - 1:batch_size])
+            batch = queryset.filter(pk__lte=boundary[0]) if boundary else queryset
+            count = batch._raw_delete(alias)
+        deleted += count
+        if count and progress:
+            progress(queryset.model, deleted)
+        if not boundary:
+            return deleted
+
+
+def purge_user(user, batch_size=BATCH_SIZE, progress=None):
+    """Удаляет аккаунт пакетами, не держа длинной транзакции.
+
+    Сначала аккаунт деактивируется, затем дочерние таблицы чистятся от листьев
+    к корням диапазонами по batch_size строк, после этого удаляется сам User,
+    а в конце — файлы дневника. progress(model, удалено_строк) вызывается после
+    каждого пакета. Возвращает {имя модели: удалено строк}.
+    """
+    User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user.pk).update(is_active=False)
+    forget_users([user.pk])
+    alias = user.shard or DEFAULT_DB_ALIAS
+
+    media_field = DiaryEntry._meta.get_field('media_file')
+    media_files = list(
+        DiaryEntry._base_manager.using(alias).filter(user_id=user.pk)
+        .exclude(media_file='').exclude(media_file=None).values_list('media_file', flat=True)
+    )
+
+    counts = {}
+    for model, owner_lookup in reversed(user_data_models()):
+        queryset = model._base_manager.filter(**{owner_lookup: user.pk})
+        counts[model.__name__] = _delete_in_batches(queryset, alias, batch_size, progress)
+
+    # Дочерних строк уже нет — сборщик удалит только сам User (и его копию на шарде)
+    User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user.pk).delete()
+
+    for name in media_files:
+        try:
+            media_field.storage.delete(name)
+        except OSError as e:
+            logger.warning("Не удалось удалить файл %s аккаунта %s: %s", name, user.pk, e)
+
+    logger.info("Аккаунт %s удалён: %s, файлов: %s", user.pk, counts, len(media_files))
+    return counts
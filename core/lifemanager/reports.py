@@ -0,0 +1,164 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+import django
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import User, SphereAssessment, Goal, GoalStep, DiaryEntry, WeeklyReport
+from .sharding import use_shard
+from .versioning import touch_user_data
+
+BATCH_SIZE = 200
+DUE_SOON_LIMIT = 5
+
+
+def week_start_of(day):
+    """Понедельник недели, в которую входит day."""
+    return day - timedelta(days=day.weekday())
+
+
+def last_week_start(today=None):
+    """Понедельник последней завершённой недели."""
+    return week_start_of(today or date.today()) - timedelta(days=7)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def check_week(week_start, today=None):
+    """Отчёт строится только за последнюю завершённую неделю.
+
+    У Goal нет даты выполнения, поэтому goals_completed_total — число выполненных
+    целей на момент сборки, а не на конец недели: за более раннюю неделю (и за
+    текущую, ещё не закончившуюся) итог и прирост получились бы неверными.
+    """
+    expected = last_week_start(today)
+    if week_start != expected:
+        raise ValueError(
+            f"Отчёт можно собрать только за последнюю завершённую неделю (с {expected}), а не с {week_start}"
+        )
+
+
+def build_reports(user_ids, week_start):
+    """Строит отчёты за неделю для пачки пользователей одного шарда.
+
+    Каждая метрика — один агрегирующий запрос на всю пачку, сгруппированный по
+    user_id, так что число запросов не зависит от числа пользователей.
+    goals_completed_total — снимок на момент вызова (см. check_week).
+    Возвращает несохранённые WeeklyReport.
+    """
+    week_end = week_start + timedelta(days=7)
+    prev_start = week_start - timedelta(days=7)
+    start_at, end_at = _day_start(week_start), _day_start(week_end)
+
+    spheres = {user_id: [] for user_id in user_ids}
+    averages = SphereAssessment.objects.filter(user_id__in=user_ids, date__gte=prev_start, date__lt=week_end) \
+        .values('user_id', 'sphere_id').order_by('user_id', 'sphere_id') \
+        .annotate(avg=Avg('value', filter=Q(date__gte=week_start)), prev=Avg('value', filter=Q(date__lt=week_start)))
+    for row in averages:
+        if row['avg'] is not None:
+            prev = round(row['prev'], 1) if row['prev'] is not None else None
+            spheres[row['user_id']].append([row['sphere_id'], round(row['avg'], 1), prev])
+
+    completed_total = dict(
+        Goal.objects.filter(user_id__in=user_ids, status=Goal.Status.COMPLETED)
+        .values('user_id').order_by().annotate(n=Count('pk')).values_list('user_id', 'n')
+    )
+    # У Goal нет даты выполнения: «за неделю» — прирост к итогу прошлого отчёта
+    previous_total = dict(
+        WeeklyReport.objects.filter(user_id__in=user_ids, week_start=prev_start)
+        .values_list('user_id', 'goals_completed_total')
+    )
+    steps = dict(
+        GoalStep.objects.filter(goal__user_id__in=user_ids, is_completed=True,
+                                completed_at__gte=start_at, completed_at__lt=end_at)
+        .values('goal__user_id').order_by().annotate(n=Count('pk')).values_list('goal__user_id', 'n')
+    )
+    diary = {
+        row['user_id']: row for row in
+        DiaryEntry.objects.filter(user_id__in=user_ids, created_at__gte=start_at, created_at__lt=end_at)
+        .values('user_id').order_by()
+        .annotate(entries=Count('pk'), days=Count(TruncDate('created_at'), distinct=True))
+    }
+    due_soon = {user_id: [] for user_id in user_ids}
+    upcoming = Goal.objects.filter(
+        user_id__in=user_ids, status=Goal.Status.ACTIVE,
+        deadline__gte=week_end, deadline__lt=week_end + timedelta(days=7),
+    ).order_by('deadline').values_list('user_id', 'id', 'title', 'deadline')
+    for user_id, goal_id, title, deadline in upcoming:
+        if len(due_soon[user_id]) < DUE_SOON_LIMIT:
+            due_soon[user_id].append([goal_id, title, deadline])
+
+    reports = []
+    for user_id in user_ids:
+        total = completed_total.get(user_id, 0)
+        previous = previous_total.get(user_id)
+        reports.append(WeeklyReport(
+            user_id=user_id,
+            week_start=week_start,
+            spheres=spheres[user_id],
+            due_soon=due_soon[user_id],
+            goals_completed=max(0, total - previous) if previous is not None else None,
+            goals_completed_total=total,
+            steps_completed=steps.get(user_id, 0),
+            diary_entries=diary[user_id]['entries'] if user_id in diary else 0,
+            diary_days=diary[user_id]['days'] if user_id in diary else 0,
+        ))
+    return reports
+
+
+def generate_batch(alias, user_ids, week_start):
+    """Строит и сохраняет отчёты пачки. Выполняется в процессе пула."""
+    with use_shard(alias):
+        reports = build_reports(user_ids, week_start)
+        WeeklyReport.objects.bulk_create(
+            reports,
+            update_conflicts=True,
+            unique_fields=['user', 'week_start'],
+            update_fields=[
+                'spheres', 'due_soon', 'goals_completed', 'goals_completed_total',
+                'steps_completed', 'diary_entries', 'diary_days', 'created_at',
+            ],
+        )
+    # Страница отчёта отдаётся с ETag по версии данных — новая версия сбрасывает его
+    touch_user_data(pk__in=user_ids)
+    return len(reports)
+
+
+def generate_reports(week_start, processes=None, batch_size=BATCH_SIZE, progress=None):
+    """Отчёты всех активных пользователей за неделю: пачки по batch_size расходятся по процессам.
+
+    processes=1 — без пула, в текущем процессе. Возвращает число отчётов.
+    Неделя, кроме последней завершённой, — ValueError (см. check_week).
+    """
+    check_week(week_start)
+    users = User.objects.using(DEFAULT_DB_ALIAS).filter(is_active=True).order_by('pk').values_list('pk', 'shard')
+    by_alias = {}
+    for user_id, shard in users:
+        by_alias.setdefault(shard or DEFAULT_DB_ALIAS, []).append(user_id)
+    batches = [
+        (alias, user_ids[start:start + batch_size], week_start)
+        for alias, user_ids in by_alias.items() for start in range(0, len(user_ids), batch_size)
+    ]
+
+    done = 0
+    if processes == 1 or len(batches) <= 1:
+        for batch in batches:
+            done += generate_batch(*batch)
+            if progress:
+                progress(done)
+        return done
+
+    # spawn: дочерние процессы открывают свои соединения, Django в них настраивает django.setup
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=django.setup) as pool:
+        for count in pool.map(generate_batch, *zip(*batches)):
+            done += count
+            if progress:
+                progress(done)
+    return done
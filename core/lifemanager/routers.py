@@ -0,0 +1,117 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .sharding import (
+    ShardNotSelected, current_shard, is_user_owned, shard_aliases, shard_for_user_id, sharding_enabled,
+)
+
+# Состояние текущего запроса: None вне запроса (команды, shell), иначе
+# {'pinned': читать с основной БД, 'wrote': в этом запросе была запись}
+_request_state = contextvars.ContextVar('lifemanager_replica_state', default=None)
+
+
+def start_request(pinned):
+    return _request_state.set({'pinned': pinned, 'wrote': False})
+
+
+def finish_request(token):
+    state = _request_state.get()
+    _request_state.reset(token)
+    return bool(state and state['wrote'])
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    """Чтения моделей lifemanager — с реплик, записи — в основную БД.
+
+    После записи чтения пользователя закрепляются за основной БД: до конца
+    текущего запроса и ещё на REPLICA_PIN_SECONDS через cookie (её ставит
+    ReplicaPinningMiddleware), чтобы редирект после create_goal или
+    create_assessment показал свежие данные. Вне HTTP-запроса всё читается с
+    основной БД — командам нужны актуальные данные для read-modify-write.
+    """
+
+    app_label = 'lifemanager'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        state = _request_state.get()
+        replicas = replica_aliases()
+        if state is None or state['pinned'] or state['wrote'] or not replicas:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики — копии основной БД, схему на них не мигрируем
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class UserShardRouter:
+    """Пользовательские данные — на шарде владельца, каталог — в основной БД.
+
+    Шард определяется так: по instance-подсказке (объект уже загружен с шарда
+    или у него есть user_id), иначе по шарду, активированному для текущего
+    запроса (UserShardMiddleware) или команды (sharding.use_shard). User и
+    LifeSphere этот роутер не обрабатывает — ими занимается следующий роутер.
+    """
+
+    def _shard_for(self, model, hints):
+        if not sharding_enabled() or not is_user_owned(model):
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            if instance._meta.model_name == 'user':
+                # Связанные менеджеры пользователя: user.goal_set и т.п.
+                return instance.shard or shard_for_user_id(instance.pk)
+            if instance._state.db in shard_aliases():
+                return instance._state.db
+            user_id = getattr(instance, 'user_id', None)
+            if user_id is not None:
+                return shard_for_user_id(user_id)
+        shard = current_shard()
+        if shard is None:
+            raise ShardNotSelected(
+                f"Не выбран шард для {model._meta.label}: используйте sharding.use_shard() или .using()"
+            )
+        return shard
+
+    def db_for_read(self, model, **hints):
+        return self._shard_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Справочные строки каталога есть на каждом шарде, поэтому связи
+        # пользовательских объектов с User и LifeSphere допустимы
+        if sharding_enabled() and obj1._meta.app_label == obj2._meta.app_label == 'lifemanager':
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in shard_aliases():
+            return app_label == 'lifemanager'
+        return None
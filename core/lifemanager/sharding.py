@@ -0,0 +1,142 @@
+import contextvars
+import hashlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.constants import OnConflict
+
+# Модели, данные которых живут на шарде владельца. User и LifeSphere хранятся
+# в каталоге (основная БД), а на шарды копируются как справочные строки —
+# только чтобы выполнялись внешние ключи и работали JOIN внутри шарда.
+USER_OWNED_MODELS = {'sphereassessment', 'goal', 'goalstep', 'diaryentry', 'reminder', 'note', 'noteitem', 'weeklyreport'}
+
+SHARD_CACHE_KEY = 'lifemanager:user_shard:{}'
+
+_current_shard = contextvars.ContextVar('lifemanager_current_shard', default=None)
+
+
+class ShardNotSelected(Exception):
+    pass
+
+
+def shard_aliases():
+    return getattr(settings, 'DATABASE_SHARDS', [])
+
+
+def sharding_enabled():
+    return bool(shard_aliases())
+
+
+def data_aliases():
+    """Базы, где лежат пользовательские данные: шарды или основная БД."""
+    return shard_aliases() or [DEFAULT_DB_ALIAS]
+
+
+def is_user_owned(model):
+    return model._meta.app_label == 'lifemanager' and model._meta.model_name in USER_OWNED_MODELS
+
+
+def pick_shard(user_id, shards=None):
+    """Шард по rendezvous-хэшированию: при добавлении шарда переезжает ~1/N пользователей."""
+    shards = shards or shard_aliases()
+    return max(shards, key=lambda alias: hashlib.blake2b(f'{alias}:{user_id}'.encode(), digest_size=8).digest())
+
+
+def shard_for_user_id(user_id):
+    """Текущий шард пользователя из карты шардов (поле User.shard в каталоге)."""
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    key = SHARD_CACHE_KEY.format(user_id)
+    shard = cache.get(key)
+    if shard is None:
+        from .models import User
+        shard = User.objects.using(DEFAULT_DB_ALIAS).filter(pk=user_id) \
+            .values_list('shard', flat=True).first() or DEFAULT_DB_ALIAS
+        cache.set(key, shard, timeout=3600)
+    return shard
+
+
+def forget_user_shard(user_id):
+    cache.delete(SHARD_CACHE_KEY.format(user_id))
+
+
+def current_shard():
+    return _current_shard.get()
+
+
+def activate_shard(alias):
+    return _current_shard.set(alias)
+
+
+def deactivate_shard(token):
+    _current_shard.reset(token)
+
+
+@contextmanager
+def use_shard(alias):
+    """Направляет запросы к пользовательским моделям на указанный шард (для команд и задач)."""
+    token = activate_shard(alias)
+    try:
+        yield alias
+    finally:
+        deactivate_shard(token)
+
+
+def insert_rows(model, instances, alias, update=False):
+    """Вставляет строки как есть, сохраняя значения всех полей (в т.ч. auto_now_add).
+
+    bulk_create пересчитал бы created_at, поэтому вставляем в raw-режиме, пачками
+    под лимит параметров СУБД. update=True обновляет уже существующие строки,
+    иначе конфликтующие строки пропускаются — повторный запуск безопасен.
+    """
+    instances = list(instances)
+    if not instances:
+        return
+    opts = model._meta
+    fields = opts.concrete_fields
+    options = {'on_conflict': OnConflict.IGNORE}
+    if update:
+        options = {
+            'on_conflict': OnConflict.UPDATE,
+            'update_fields': [f for f in fields if not f.primary_key],
+            'unique_fields': [opts.pk],
+        }
+    batch_size = max(connections[alias].ops.bulk_batch_size(fields, instances), 1)
+    for start in range(0, len(instances), batch_size):
+        model._base_manager._insert(
+            instances[start:start + batch_size], fields=fields, using=alias, raw=True, **options
+        )
+
+
+def copy_reference_rows(model, instances, aliases=None):
+    """Копирует строки каталога (User, LifeSphere) на шарды."""
+    for alias in aliases or shard_aliases():
+        insert_rows(model, instances, alias, update=True)
+
+
+def user_data_models():
+    """Пользовательские модели с путём до владельца, родительские раньше дочерних."""
+    from .models import SphereAssessment, Goal, GoalStep, DiaryEntry, Reminder, Note, NoteItem, WeeklyReport
+    return [
+        (Goal, 'user_id'),
+        (GoalStep, 'goal__user_id'),
+        (Note, 'user_id'),
+        (NoteItem, 'note__user_id'),
+        (SphereAssessment, 'user_id'),
+        (DiaryEntry, 'user_id'),
+        (Reminder, 'user_id'),
+        (WeeklyReport, 'user_id'),
+    ]
+
+
+def delete_user_rows(user_id, alias):
+    """Удаляет данные пользователя и его справочную копию с указанной БД."""
+    from .models import User
+    for model, owner_lookup in reversed(user_data_models()):
+        model._base_manager.using(alias).filter(**{owner_lookup: user_id}).delete()
+    if alias != DEFAULT_DB_ALIAS:
+        # Обычный delete() собрал бы связанные таблицы других приложений (admin
+        # log и т.п.), которых на шардах нет — справочную строку удаляем напрямую
+        User._base_manager.using(alias).filter(pk=user_id)._raw_delete(alias)
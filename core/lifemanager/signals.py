@@ -0,0 +1,154 @@
+import weakref
+
+from django.contrib.auth.signals import user_logged_out
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .db import apply_sqlite_pragmas
+from .models import User, LifeSphere, SphereAssessment, Goal, GoalStep, DiaryEntry, Reminder, Note, NoteItem
+from .sharding import (
+    copy_reference_rows, delete_user_rows, forget_user_shard, pick_shard, shard_aliases, sharding_enabled,
+)
+from .spheres import sphere_registry
+from .usercache import forget_users
+from .versioning import touch_user_data
+
+
+def _touch_owner(sender, instance, **kwargs):
+    touch_user_data(pk=instance.user_id)
+
+
+def _parent_owner_id(instance, field_name, parent_model):
+    # Родитель обычно уже в кэше объекта; иначе читаем user_id с той же БД, что и строку:
+    # при шардировании JOIN с таблицей пользователей в каталоге невозможен
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name).user_id
+    return parent_model._base_manager.using(instance._state.db) \
+        .filter(pk=getattr(instance, field.attname)).values_list('user_id', flat=True).first()
+
+
+def _touch_goal_owner(sender, instance, **kwargs):
+    touch_user_data(pk=_parent_owner_id(instance, 'goal', Goal))
+
+
+def _touch_note_owner(sender, instance, **kwargs):
+    touch_user_data(pk=_parent_owner_id(instance, 'note', Note))
+
+
+# Каскадное удаление шлёт post_delete для каждой строки: цели — вместе со всеми
+# шагами, сферы — со всеми оценками и целями. Отметка ставится один раз на
+# удаление (origin — объект или QuerySet, с которого оно началось) и владельца,
+# владелец шагов и пунктов ищется один раз на родителя
+_deletions = weakref.WeakKeyDictionary()
+
+
+def _deletion_state(origin):
+    """(владельцы родителей по pk, уже отмеченные пользователи) этого удаления."""
+    try:
+        return _deletions.setdefault(origin, ({}, set()))
+    except TypeError:  # origin не передан или без pk — без общего состояния
+        return {}, set()
+
+
+def _deleting_user(origin):
+    # Удаляется сам пользователь: отмечать изменение его данных незачем
+    return getattr(origin, 'model', type(origin)) is User
+
+
+def _touch_once(origin, user_id):
+    touched = _deletion_state(origin)[1]
+    if user_id is not None and user_id not in touched:
+        touched.add(user_id)
+        touch_user_data(pk=user_id)
+
+
+def _touch_deleted_owner(sender, instance, origin=None, **kwargs):
+    if not _deleting_user(origin):
+        _touch_once(origin, instance.user_id)
+
+
+def _touch_deleted_parent_owner(instance, origin, field_name, parent_model):
+    if _deleting_user(origin):
+        return
+    parent_id = getattr(instance, instance._meta.get_field(field_name).attname)
+    if isinstance(origin, parent_model) and origin.pk == parent_id:
+        owner_id = origin.user_id
+    else:
+        owners = _deletion_state(origin)[0]
+        if parent_id not in owners:
+            owners[parent_id] = _parent_owner_id(instance, field_name, parent_model)
+        owner_id = owners[parent_id]
+    _touch_once(origin, owner_id)
+
+
+def _touch_deleted_goal_owner(sender, instance, origin=None, **kwargs):
+    _touch_deleted_parent_owner(instance, origin, 'goal', Goal)
+
+
+def _touch_deleted_note_owner(sender, instance, origin=None, **kwargs):
+    _touch_deleted_parent_owner(instance, origin, 'note', Note)
+
+
+def _invalidate_spheres(sender, instance, **kwargs):
+    sphere_registry.invalidate()
+
+
+def _assign_user_shard(sender, instance, raw=False, **kwargs):
+    if sharding_enabled() and not raw and instance._state.adding and not instance.shard:
+        instance.shard = pick_shard(instance.pk)
+
+
+def _mirror_user(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sharding_enabled() and not raw and using == DEFAULT_DB_ALIAS and instance.shard:
+        copy_reference_rows(User, [instance], aliases=[instance.shard])
+
+
+def _purge_user_shard(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sharding_enabled() and using == DEFAULT_DB_ALIAS and instance.shard:
+        delete_user_rows(instance.pk, instance.shard)
+        forget_user_shard(instance.pk)
+
+
+def _forget_cached_user(sender, instance=None, user=None, **kwargs):
+    # Смена пароля, деактивация, удаление, выход — копии пользователя в кэше процессов устарели
+    user = instance or user
+    if user is not None:
+        forget_users([user.pk])
+
+
+def _mirror_sphere(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sharding_enabled() and not raw and using == DEFAULT_DB_ALIAS:
+        copy_reference_rows(LifeSphere, [instance])
+
+
+def _delete_sphere_mirrors(sender, instance, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sharding_enabled() and using == DEFAULT_DB_ALIAS:
+        for alias in shard_aliases():
+            LifeSphere.objects.using(alias).filter(pk=instance.pk).delete()
+
+
+def connect_signals():
+    connection_created.connect(apply_sqlite_pragmas, dispatch_uid='apply_sqlite_pragmas')
+
+    post_save.connect(_invalidate_spheres, sender=LifeSphere, dispatch_uid='invalidate_LifeSphere')
+    post_delete.connect(_invalidate_spheres, sender=LifeSphere, dispatch_uid='invalidate_LifeSphere')
+
+    pre_save.connect(_assign_user_shard, sender=User, dispatch_uid='assign_user_shard')
+    post_save.connect(_mirror_user, sender=User, dispatch_uid='mirror_user')
+    post_delete.connect(_purge_user_shard, sender=User, dispatch_uid='purge_user_shard')
+    post_save.connect(_forget_cached_user, sender=User, dispatch_uid='forget_cached_user')
+    post_delete.connect(_forget_cached_user, sender=User, dispatch_uid='forget_cached_user')
+    user_logged_out.connect(_forget_cached_user, dispatch_uid='forget_cached_user_on_logout')
+    post_save.connect(_mirror_sphere, sender=LifeSphere, dispatch_uid='mirror_LifeSphere')
+    post_delete.connect(_delete_sphere_mirrors, sender=LifeSphere, dispatch_uid='delete_LifeSphere_mirrors')
+
+    for model in (SphereAssessment, Goal, DiaryEntry, Reminder, Note):
+        post_save.connect(_touch_owner, sender=model, dispatch_uid=f'touch_{model.__name__}')
+        post_delete.connect(_touch_deleted_owner, sender=model, dispatch_uid=f'touch_{model.__name__}')
+
+    post_save.connect(_touch_goal_owner, sender=GoalStep, dispatch_uid='touch_GoalStep')
+    post_delete.connect(_touch_deleted_goal_owner, sender=GoalStep, dispatch_uid='touch_GoalStep')
+    post_save.connect(_touch_note_owner, sender=NoteItem, dispatch_uid='touch_NoteItem')
+    post_delete.connect(_touch_deleted_note_owner, sender=NoteItem, dispatch_uid='touch_NoteItem')
@@ -0,0 +1,111 @@
+import contextvars
+import threading
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import LifeSphere
+
+VERSION_CACHE_KEY = 'lifemanager:lifesphere_version'
+
+# Версия каталога, уже прочитанная в текущем запросе (SphereVersionMiddleware)
+_request_version = contextvars.ContextVar('lifemanager_sphere_version', default=None)
+
+
+class SphereRegistry:
+    """Каталог сфер жизни, загружаемый один раз на процесс.
+
+    Таблица LifeSphere почти не меняется, поэтому держим её в памяти и перед
+    каждым обращением сверяем версию в кэше. Сигналы модели меняют версию при
+    любом изменении сфер, в том числе из админки. Чтобы изменение увидели все
+    воркеры, в CACHES должен быть общий backend (redis, memcached и т.п.).
+    Внутри запроса версия читается из кэша один раз (begin_request).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (версия, список по порядку, id -> сфера, title -> сфера)
+        self._snapshot = (None, [], {}, {})
+
+    @property
+    def version(self):
+        memo = _request_version.get()
+        if memo:
+            return memo[0]
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(VERSION_CACHE_KEY, version, timeout=None):
+                version = cache.get(VERSION_CACHE_KEY)
+        if memo is not None:
+            memo.append(version)
+        return version
+
+    def invalidate(self):
+        version = uuid.uuid4().hex
+        cache.set(VERSION_CACHE_KEY, version, timeout=None)
+        memo = _request_version.get()
+        if memo is not None:
+            memo[:] = [version]
+
+    def begin_request(self):
+        """До end_request(token) версия читается из кэша один раз: каждое чтение —
+        это обращение к диску или к серверу кэша."""
+        return _request_version.set([])
+
+    def end_request(self, token):
+        _request_version.reset(token)
+
+    def _current(self):
+        version = self.version
+        snapshot = self._snapshot
+        if snapshot[0] != version or version is None:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot[0] != version or version is None:
+                    ordered = list(LifeSphere.objects.all())
+                    snapshot = (
+                        version,
+                        ordered,
+                        {sphere.id: sphere for sphere in ordered},
+                        {sphere.title: sphere for sphere in ordered},
+                    )
+                    self._snapshot = snapshot
+        return snapshot
+
+    async def aload(self):
+        # Для async-view: синхронно ходить в БД из event loop нельзя, поэтому
+        # устаревший каталог перечитываем в потоке ORM до обращения к all()/get()
+        if self._snapshot[0] != self.version:
+            await sync_to_async(self._current)()
+
+    def all(self, sort_by=None):
+        ordered = self._current()[1]
+        if sort_by == 'alpha':
+            return sorted(ordered, key=lambda sphere: sphere.title)
+        return list(ordered)
+
+    def titles(self):
+        return [sphere.title for sphere in self._current()[1]]
+
+    def get(self, sphere_id):
+        if not isinstance(sphere_id, uuid.UUID):
+            try:
+                sphere_id = uuid.UUID(str(sphere_id))
+            except ValueError:
+                return None
+        return self._current()[2].get(sphere_id)
+
+    def get_by_title(self, title):
+        return self._current()[3].get(title)
+
+    def get_or_404(self, sphere_id):
+        sphere = self.get(sphere_id)
+        if sphere is None:
+            raise Http404("Сфера не найдена")
+        return sphere
+
+
+sphere_registry = SphereRegistry()
@@ -0,0 +1,108 @@
+(function() {
+    const data = document.getElementById('active-reminders');
+    const reminders = data ? JSON.parse(data.textContent) : [];
+    let dismissedToday = {}; // ← напоминания, закрытые сегодня
+
+    function showReminder(reminder) {
+        const popup = document.getElementById('reminder-popup');
+        const textEl = document.getElementById('reminder-text');
+        const actionBtn = document.getElementById('reminder-action');
+
+        let message = '';
+        let url = '#';
+
+        if (reminder.goal) {
+            message = `<strong>Цель:</strong> ${reminder.goal.title}<br><small>Время: ${reminder.time}</small>`;
+            url = `/goals/${reminder.goal.id}/edit/`;
+        } else if (reminder.sphere) {
+            message = `<strong>Сфера:</strong> ${reminder.sphere.title}<br><small>Время: ${reminder.time}</small>`;
+            url = '/spheres/';
+        } else {
+            message = `<strong>Время для оценки баланса</strong><br><small>${reminder.time}</small>`;
+            url = '/spheres/';
+        }
+
+        textEl.innerHTML = message;
+        actionBtn.onclick = () => window.location.href = url;
+
+        // Отложить на 10 минут
+        document.getElementById('reminder-snooze').onclick = () => {
+            const now = new Date();
+            const snoozeUntil = new Date(now.getTime() + 10 * 60000);
+            localStorage.setItem(`snoozed_${reminder.id}`, snoozeUntil.getTime());
+            popup.classList.add('d-none');
+        };
+
+        // Закрыть до конца дня
+        document.getElementById('reminder-close').onclick = () => {
+            const today = new Date().toDateString();
+            localStorage.setItem(`dismissed_${reminder.id}`, today);
+            dismissedToday[reminder.id] = true;
+            popup.classList.add('d-none');
+        };
+
+        popup.classList.remove('d-none');
+    }
+
+    function checkReminders() {
+        if (reminders.length === 0) return;
+
+        const now = new Date();
+        const currentTime = now.toTimeString().slice(0, 5);
+        const today = now.toDateString();
+
+        // Восстанавливаем состояние из localStorage
+        for (const r of reminders) {
+            const snoozedUntil = localStorage.getItem(`snoozed_${r.id}`);
+            const dismissedDay = localStorage.getItem(`dismissed_${r.id}`);
+
+            if (snoozedUntil && now.getTime() < parseInt(snoozedUntil)) {
+                continue; // ещё отложено
+            }
+
+            if (dismissedDay === today) {
+                dismissedToday[r.id] = true;
+                continue; // закрыто до конца дня
+            }
+
+            if (r.time === currentTime && !dismissedToday[r.id]) {
+                showReminder(r);
+                break;
+            }
+        }
+    }
+
+    setInterval(checkReminders, 60000);
+    setTimeout(checkReminders, 1000);
+})();
+
+// Автоматическое скрытие сообщений
+document.addEventListener('DOMContentLoaded', function() {
+    // Найдём все сообщения Django
+    const messages = document.querySelectorAll('.alert');
+
+    messages.forEach(function(message) {
+        // Определим тип сообщения по классу
+        let type = 'info';
+        if (message.classList.contains('alert-success')) type = 'success';
+        if (message.classList.contains('alert-error')) type = 'error';
+        if (message.classList.contains('alert-danger')) type = 'error';
+
+        // Установим правильный цвет Bootstrap
+        message.classList.remove('alert-error'); // удалим кастомный класс
+        if (type === 'success') {
+            message.classList.add('alert-success');
+        } else if (type === 'error') {
+            message.classList.add('alert-danger');
+        }
+
+        // Скроем через 2 секунды
+        setTimeout(function() {
+            message.style.transition = 'opacity 0.5s ease';
+            message.style.opacity = '0';
+            setTimeout(function() {
+                message.remove();
+            }, 500);
+        }, 2000); // 2 секунды
+    });
+});
@@ -0,0 +1,770 @@
+// Адреса API передаются атрибутами data-* тега <script>
+const DASHBOARD_URLS = document.currentScript.dataset;
+
+// Максимум точек в ряду графика динамики — длинная история прореживается на сервере
+const TREND_POINTS = 60;
+let trendChart = null;
+
+function renderTrend(series) {
+    const canvas = document.getElementById('sphereTrend');
+    if (!canvas) return;
+    if (trendChart) trendChart.destroy();
+    trendChart = new Chart(canvas.getContext('2d'), {
+        type: 'line',
+        data: {
+            datasets: series.map(s => ({
+                label: s.label,
+                data: s.points.map(([x, y]) => ({x: x, y: y})),
+                borderColor: s.color,
+                backgroundColor: s.color,
+                pointRadius: 0,
+                borderWidth: 2,
+                tension: 0.2
+            }))
+        },
+        options: {
+            maintainAspectRatio: false,
+            scales: {
+                x: {type: 'category', labels: [...new Set(series.flatMap(s => s.points.map(p => p[0])))].sort()},
+                y: {min: 0, max: 10}
+            },
+            plugins: {legend: {labels: {boxWidth: 10}}}
+        }
+    });
+}
+
+function renderAnalytics(data) {
+    const panel = document.getElementById('analyticsPanel');
+    const rated = data.spheres.filter(s => s.count > 0);
+    if (!rated.length) {
+        panel.textContent = 'Оцените сферы, чтобы увидеть тренды и серии.';
+        return;
+    }
+    document.getElementById('balanceIndex').textContent = `Индекс баланса: ${data.balance_index}/100`;
+    const escape = text => {
+        const element = document.createElement('span');
+        element.textContent = text;
+        return element.innerHTML;
+    };
+    const format = value => value === null ? '—' : value;
+    const trend = value => value === null ? '—'
+        : `<span class="${value > 0 ? 'text-success' : value < 0 ? 'text-danger' : ''}">${value > 0 ? '+' : ''}${value}</span>`;
+    const rows = rated.map(s => `
+        <tr>
+            <td>${escape(s.title)}</td>
+            <td>${format(s.ma7)}</td>
+            <td>${format(s.ma30)}</td>
+            <td>${trend(s.trend_per_month)}</td>
+            <td>${s.current_streak} / ${s.longest_streak}</td>
+        </tr>`).join('');
+    const pairs = data.correlations.map(p =>
+        `<li>${escape(p.spheres[0])} и ${escape(p.spheres[1])}: ${p.r > 0 ? 'растут вместе' : 'меняются в противоположные стороны'} (r = ${p.r})</li>`
+    ).join('');
+    panel.innerHTML = `
+        <table class="table table-sm mb-3">
+            <thead><tr><th>Сфера</th><th>7 дн.</th><th>30 дн.</th><th>Тренд/мес</th><th>Серия ≥7</th></tr></thead>
+            <tbody>${rows}</tbody>
+        </table>
+        ${pairs ? `<div class="fw-semibold mb-1">Связи между сферами</div><ul class="mb-0">${pairs}</ul>` : ''}`;
+}
+
+// Переключение напоминания без перерисовки главной страницы
+document.querySelectorAll('.reminder-toggle-form').forEach(form => {
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: {'X-Requested-With': 'XMLHttpRequest'},
+            credentials: 'same-origin'
+        })
+            .then(response => {
+                if (!response.ok) throw new Error(response.status);
+                return response.json();
+            })
+            .then(data => {
+                form.elements.current.value = data.is_enabled ? '1' : '0';
+                const status = form.querySelector('.reminder-status');
+                status.className = 'reminder-status ' + (data.is_enabled ? 'active' : 'inactive');
+                status.innerHTML = data.is_enabled
+                    ? '<i class="bi bi-bell-fill me-1"></i>Вкл'
+                    : '<i class="bi bi-bell-slash me-1"></i>Выкл';
+            })
+            .catch(() => form.submit());
+    });
+});
+
+document.addEventListener('DOMContentLoaded', function () {
+    const lifeWheelCtx = document.getElementById('lifeWheel').getContext('2d');
+    const wheelDateLabel = document.getElementById('wheelDateLabel');
+    const comparisonSection = document.getElementById('comparisonSection');
+    const comparisonText = document.getElementById('comparisonText');
+    const recommendationsSection = document.getElementById('recommendationsSection');
+    const recommendationsText = document.getElementById('recommendationsText');
+
+    // История оценок загружается отдельным запросом, HTML страницы от неё не зависит
+    fetch(`${DASHBOARD_URLS.chartData}?resolution=day&points=${TREND_POINTS}`, {credentials: 'same-origin'})
+        .then(response => {
+            if (!response.ok) throw new Error(response.status);
+            return response.json();
+        })
+        .then(initWheel)
+        .catch(error => console.error('Не удалось загрузить историю оценок:', error));
+
+    fetch(DASHBOARD_URLS.analyticsData, {credentials: 'same-origin'})
+        .then(response => {
+            if (!response.ok) throw new Error(response.status);
+            return response.json();
+        })
+        .then(renderAnalytics)
+        .catch(() => {
+            document.getElementById('analyticsPanel').textContent = 'Не удалось загрузить аналитику.';
+        });
+
+    function initWheel(data) {
+        const allDataByDate = data.by_date;
+        const allDates = data.dates;
+        const allSpheres = data.spheres;
+        const latestData = allDataByDate[allDates[0]] || {};
+
+        // Если нет данных
+        if (!latestData || Object.keys(latestData).length === 0 || allDates.length === 0) {
+            const canvasContainer = document.querySelector('.wheel-canvas-container');
+            if (canvasContainer) {
+                canvasContainer.innerHTML = `
+                    <div class="no-history-message">
+                        <i class="bi bi-calendar-x"></i>
+                        <h5>Нет данных для отображения</h5>
+                        <p>Оцените сферы жизни, чтобы увидеть колесо жизни и его историю</p>
+                        <a href="${DASHBOARD_URLS.sphereList}" class="btn btn-primary btn-sm">
+                            <i class="bi bi-pie-chart"></i> Оценить сферы
+                        </a>
+                    </div>
+                `;
+            }
+            return;
+        }
+
+        // Текущее состояние
+        let currentDateIndex = 0;
+        let isComparing = true;
+        let currentChart = null;
+
+        // Цвета
+        const sphereColors = [
+            'rgba(74, 111, 165, 0.8)',
+            'rgba(107, 142, 35, 0.8)',
+            'rgba(56, 178, 172, 0.8)',
+            'rgba(231, 76, 60, 0.8)',
+            'rgba(155, 89, 182, 0.8)',
+            'rgba(241, 196, 15, 0.8)',
+            'rgba(230, 126, 34, 0.8)',
+            'rgba(52, 73, 94, 0.8)'
+        ];
+
+        // Функция создания/обновления диаграммы
+        function updateChart(dateIndex) {
+            const currentDate = allDates[dateIndex];
+            const currentData = allDataByDate[currentDate] || {};
+            const latestData = allDataByDate[allDates[0]] || {};
+
+            // Подготовка данных
+            const labels = allSpheres;
+            const currentValues = allSpheres.map(sphere => currentData[sphere] || 0);
+            const latestValues = allSpheres.map(sphere => latestData[sphere] || 0);
+
+            console.log('Создание диаграммы для даты:', currentDate);
+            console.log('Данные:', currentData);
+            console.log('Labels:', labels);
+            console.log('Values:', currentValues);
+
+            // Создаем наборы данных
+            const datasets = [{
+                label: `Оценка на ${formatDate(currentDate)}`,
+                data: currentValues,
+                fill: true,
+                backgroundColor: 'rgba(74, 111, 165, 0.2)',
+                borderColor: '#4A6FA5',
+                pointBackgroundColor: sphereColors.slice(0, labels.length),
+                pointBorderColor: '#fff',
+                pointHoverBackgroundColor: '#fff',
+                pointHoverBorderColor: '#4A6FA5',
+                pointRadius: 6,
+                pointHoverRadius: 8,
+                borderWidth: 2
+            }];
+
+            // Если включено сравнение и не текущая дата
+            if (isComparing && dateIndex > 0) {
+                datasets.push({
+                    label: `Для сравнения: ${formatDate(allDates[0])}`,
+                    data: latestValues,
+                    fill: false,
+                    borderColor: 'rgba(231, 76, 60, 0.6)',
+                    borderDash: [5, 5],
+                    pointBackgroundColor: 'rgba(231, 76, 60, 0.6)',
+                    pointBorderColor: '#fff',
+                    pointHoverBackgroundColor: '#fff',
+                    pointHoverBorderColor: 'rgba(231, 76, 60, 0.8)',
+                    pointRadius: 4,
+                    pointHoverRadius: 6,
+                    borderWidth: 1
+                });
+            }
+
+            // Обновляем или создаем диаграмму
+            if (currentChart) {
+                currentChart.data.labels = labels;
+                currentChart.data.datasets = datasets;
+                currentChart.update();
+            } else {
+                try {
+                    currentChart = new Chart(lifeWheelCtx, {
+                        type: 'radar',
+                        data: {
+                            labels: labels,
+                            datasets: datasets
+                        },
+                        options: {
+                            responsive: true,
+                            maintainAspectRatio: true,
+                            scales: {
+                                r: {
+                                    beginAtZero: true,
+                                    min: 0,
+                                    max: 10,
+                                    ticks: {
+                                        stepSize: 2,
+                                        font: {
+                                            family: "'Open Sans', sans-serif"
+                                        }
+                                    },
+                                    pointLabels: {
+                                        font: {
+                                            family: "'Montserrat', sans-serif",
+                                            size: 11,
+                                            weight: '500'
+                                        },
+                                        color: '#2c3e50'
+                                    },
+                                    grid: {
+                                        color: 'rgba(0,0,0,0.05)'
+                                    }
+                                }
+                            },
+                            plugins: {
+                                legend: {
+                                    position: 'bottom',
+                                    labels: {
+                                        font: {
+                                            family: "'Open Sans', sans-serif",
+                                            size: 12
+                                        },
+                                        padding: 20,
+                                        boxWidth: 12
+                                    }
+                                },
+                                tooltip: {
+                                    backgroundColor: 'rgba(44, 62, 80, 0.9)',
+                                    titleFont: {
+                                        family: "'Montserrat', sans-serif"
+                                    },
+                                    bodyFont: {
+                                        family: "'Open Sans', sans-serif"
+                                    },
+                                    mode: 'index',
+                                    intersect: false
+                                }
+                            }
+                        }
+                    });
+                    console.log('Диаграмма создана успешно');
+                } catch (error) {
+                    console.error('Ошибка при создании диаграммы:', error);
+                    // Показываем сообщение об ошибке
+                    const canvasContainer = document.querySelector('.wheel-canvas-container');
+                    if (canvasContainer) {
+                        canvasContainer.innerHTML = `
+                            <div class="alert alert-danger">
+                                <h5>Ошибка при создании диаграммы</h5>
+                                <p>${error.message}</p>
+                                <p>Пожалуйста, обновите страницу или проверьте данные.</p>
+                            </div>
+                        `;
+                    }
+                }
+            }
+
+            // Обновляем метку даты
+            updateDateLabel(currentDate, dateIndex);
+
+            // Обновляем статистику сравнения
+            if (dateIndex > 0 && isComparing) {
+                updateComparisonStats(currentData, latestData, currentDate, allDates[0]);
+                comparisonSection.style.display = 'block';
+                recommendationsSection.style.display = 'block';
+            } else {
+                comparisonSection.style.display = 'none';
+                recommendationsSection.style.display = 'none';
+            }
+
+            // Обновляем состояние кнопок навигации
+            updateNavigationButtons(dateIndex);
+        }
+
+        // Функция обновления метки даты
+        function updateDateLabel(dateStr, index) {
+            const date = new Date(dateStr + 'T00:00:00');
+            const today = new Date();
+            const isToday = date.toDateString() === today.toDateString();
+            let label = `Оценка от ${formatDate(dateStr)}`;
+            if (index === 0) {
+                label += ' <span class="date-badge">Последняя</span>';
+            } else if (isToday) {
+                label += ' <span class="date-badge">Сегодня</span>';
+            }
+            wheelDateLabel.innerHTML = label;
+        }
+
+        // Функция обновления статистики сравнения — ТОЧНО КАК В ТВОЁМ ИСХОДНИКЕ
+        function updateComparisonStats(currentData, latestData, currentDate, latestDate) {
+            let totalChange = 0;
+            let improvedSpheres = 0;
+            let worsenedSpheres = 0;
+            let unchangedSpheres = 0;
+            let totalPoints = 0;
+
+            // Считаем изменения по каждой сфере
+            const sphereChanges = [];
+            allSpheres.forEach((sphere, index) => {
+                const currentValue = currentData[sphere] || 0;
+                const latestValue = latestData[sphere] || 0;
+                const change = latestValue - currentValue;
+                if (currentValue > 0) {
+                    totalChange += change;
+                    totalPoints++;
+                    if (change > 0.5) {
+                        improvedSpheres++;
+                    } else if (change < -0.5) {
+                        worsenedSpheres++;
+                    } else {
+                        unchangedSpheres++;
+                    }
+                    sphereChanges.push({
+                        sphere: sphere,
+                        current: currentValue,
+                        latest: latestValue,
+                        change: change,
+                        percentChange: currentValue > 0 ? ((change / currentValue) * 100).toFixed(1) : '0'
+                    });
+                }
+            });
+
+            // Формируем текст сравнения — ТОЧНО КАК В ТВОЁМ ИСХОДНИКЕ
+            let comparisonHTML = '';
+            const avgChange = totalPoints > 0 ? (totalChange / totalPoints).toFixed(1) : 0;
+            if (avgChange > 0.5) {
+                comparisonHTML = `
+                    <div class="alert alert-success">
+                        <i class="bi bi-arrow-up-circle"></i>
+                        <strong class="d-block ms-3">Отличный прогресс!</strong>
+                        <div class="ms-3">По сравнению с ${formatDate(currentDate)} ваше колесо жизни стало более сбалансированным.</div>
+                    </div>
+                    <div class="mt-2">
+                        <small>
+                            <i class="bi bi-check-circle"></i> Улучшено сфер: ${improvedSpheres}<br>
+                            <i class="bi bi-dash-circle"></i> Без изменений: ${unchangedSpheres}<br>
+                            <i class="bi bi-exclamation-circle"></i> Снизилось: ${worsenedSpheres}
+                        </small>
+                    </div>
+                `;
+            } else if (avgChange > 0.1) {
+                comparisonHTML = `
+                    <div class="alert alert-info">
+                        <i class="bi bi-arrow-up-right"></i>
+                        <strong class="d-block ms-2">Положительная динамика!</strong>
+                        <div class="ms-2">Небольшое улучшение по сравнению с ${formatDate(currentDate)}.</div>
+                    </div>
+                    <div class="mt-2">
+                        <small>
+                            <i class="bi bi-check-circle"></i> Улучшено сфер: ${improvedSpheres}<br>
+                            <i class="bi bi-dash-circle"></i> Без изменений: ${unchangedSpheres}<br>
+                            <i class="bi bi-exclamation-circle"></i> Снизилось: ${worsenedSpheres}
+                        </small>
+                    </div>
+                `;
+            } else if (avgChange < -0.5) {
+                comparisonHTML = `
+                    <div class="alert alert-warning">
+                        <i class="bi bi-arrow-down-circle"></i>
+                        <strong class="d-block ms-2">Внимание к балансу!</strong>
+                        <div class="ms-2">По сравнению с ${formatDate(currentDate)} некоторые сферы требуют внимания.</div>
+                    </div>
+                    <div class="mt-2">
+                        <small>
+                            <i class="bi bi-check-circle"></i> Улучшено сфер: ${improvedSpheres}<br>
+                            <i class="bi bi-dash-circle"></i> Без изменений: ${unchangedSpheres}<br>
+                            <i class="bi bi-exclamation-circle"></i> Снизилось: ${worsenedSpheres}
+                        </small>
+                    </div>
+                `;
+            } else {
+                comparisonHTML = `
+                    <div class="alert alert-secondary">
+                        <i class="bi bi-dash-circle"></i>
+                        <strong class="d-block ms-2">Стабильность</strong>
+                        <div class="ms-2">Ваше колесо жизни осталось примерно таким же, как и ${formatDate(currentDate)}.</div>
+                    </div>
+                    <div class="mt-2">
+                        <small>
+                            <i class="bi bi-check-circle"></i> Улучшено сфер: ${improvedSpheres}<br>
+                            <i class="bi bi-dash-circle"></i> Без изменений: ${unchangedSpheres}<br>
+                            <i class="bi bi-exclamation-circle"></i> Снизилось: ${worsenedSpheres}
+                        </small>
+                    </div>
+                `;
+            }
+
+            // Добавляем детализацию по сферам — ТОЧНО КАК В ТВОЁМ ИСХОДНИКЕ
+            comparisonHTML += `
+                <div class="sphere-change-list">
+                    <h6><i class="bi bi-list-ul"></i> Изменения по сферам:</h6>
+            `;
+            // Сортируем по величине изменения
+            sphereChanges.sort((a, b) => Math.abs(b.change) - Math.abs(a.change));
+            sphereChanges.slice(0, 5).forEach(item => {
+                const changeClass = item.change > 0.5 ? 'change-positive' :
+                    item.change < -0.5 ? 'change-negative' : 'change-neutral';
+                const changeIcon = item.change > 0.5 ? '↑' :
+                    item.change < -0.5 ? '↓' : '→';
+                const changeSign = item.change > 0 ? '+' : '';
+                comparisonHTML += `
+                    <div class="comparison-item">
+                        <span style="flex: 1; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;">
+                            ${item.sphere}
+                        </span>
+                        <span class="${changeClass}">
+                            ${changeIcon} ${changeSign}${item.change.toFixed(1)}
+                        </span>
+                    </div>
+                `;
+            });
+            comparisonHTML += `</div>`;
+            comparisonText.innerHTML = comparisonHTML;
+
+            // === Блок рекомендаций ===
+            let recommendationsHTML = '';
+            const goalReminder = `<div class="goal-reminder">
+                <i class="bi bi-flag"></i> Не забудьте поставить себе цель для закрепления прогресса или улучшения баланса — это поможет превратить осознанность в реальные действия!
+            </div>`;
+            if (avgChange > 0.5) {
+                recommendationsHTML = `
+                    <div class="recommendations-title">
+                        <i class="bi bi-trophy"></i> Вы молодец!
+                    </div>
+                    <p>Ваша регулярная работа над собой приносит плоды. Продолжайте в том же духе — вы создаёте прочный фундамент для гармоничной жизни.</p>
+                    ${goalReminder}
+                `;
+            } else if (avgChange < -0.5) {
+                const problematicSpheres = sphereChanges
+                    .filter(item => item.change < -1 || item.latest <= 4)
+                    .sort((a, b) => a.change - b.change)
+                    .slice(0, 3);
+                if (problematicSpheres.length > 0) {
+                    recommendationsHTML += `<div class="recommendations-title">
+                        <i class="bi bi-exclamation-triangle"></i> Рекомендации по улучшению:
+                    </div>`;
+                    const adviceMap = {
+                        'Здоровье': 'Уделите внимание физической активности, сну и питанию. Даже 20 минут ходьбы в день могут значительно улучшить самочувствие.',
+                        'Карьера': 'Пересмотрите свои профессиональные цели. Возможно, стоит обсудить развитие с руководителем или пройти обучение новому навыку.',
+                        'Финансы': 'Составьте простой бюджет или начните откладывать даже небольшую сумму. Финансовая стабильность снижает стресс.',
+                        'Отношения': 'Выделите время на качество общения с близкими. Иногда достаточно одного искреннего разговора в неделю.',
+                        'Личностный рост': 'Попробуйте читать, вести дневник или изучать что-то новое. Рост начинается с маленьких шагов.',
+                        'Духовность': 'Найдите время для тишины — медитация, прогулка на природе или просто 10 минут без телефона помогут восстановить внутренний баланс.',
+                        'Досуг': 'Разрешите себе отдых без чувства вины. Хобби и развлечения — не роскошь, а необходимость для восстановления энергии.',
+                        'Окружение': 'Оцените, насколько ваше пространство и социальное окружение поддерживают вас. Иногда небольшие изменения в среде дают большой эффект.'
+                    };
+                    problematicSpheres.forEach(item => {
+                        const advice = adviceMap[item.sphere] || 'Уделите этой сфере немного больше внимания в ближайшее время.';
+                        recommendationsHTML += `
+                            <div class="recommendation-item">
+                                <strong>${item.sphere}:</strong>
+                                <p>${advice}</p>
+                            </div>
+                        `;
+                    });
+                    recommendationsHTML += `${goalReminder}`;
+                } else {
+                    recommendationsHTML = `
+                        <div class="recommendations-title">
+                            <i class="bi bi-exclamation-triangle"></i> Внимание!
+                        </div>
+                        <p>Обратите внимание на сферы с оценкой ниже 5. Даже небольшие шаги могут значительно улучшить ваш баланс.</p>
+                        ${goalReminder}
+                    `;
+                }
+            } else {
+                recommendationsHTML = `
+                    <div class="recommendations-title">
+                        <i class="bi bi-stars"></i> Поддерживайте баланс
+                    </div>
+                    <p>Стабильность — уже достижение! Но чтобы двигаться дальше, попробуйте углубиться в одну из сфер, которая вызывает у вас интерес.</p>
+                    ${goalReminder}
+                `;
+            }
+            recommendationsText.innerHTML = recommendationsHTML;
+        }
+
+        // Функция обновления кнопок навигации
+        function updateNavigationButtons(index) {
+            const prevBtn = document.getElementById('prevDate');
+            const nextBtn = document.getElementById('nextDate');
+            const todayBtn = document.getElementById('todayDate');
+            const dateSelector = document.getElementById('dateSelector');
+            if (prevBtn) prevBtn.disabled = index >= allDates.length - 1;
+            if (nextBtn) nextBtn.disabled = index <= 0;
+            if (todayBtn) {
+                todayBtn.classList.remove('btn-primary', 'btn-outline-primary');
+                if (index === 0) {
+                    todayBtn.classList.add('btn-primary');
+                } else {
+                    todayBtn.classList.add('btn-outline-primary');
+                }
+            }
+            if (dateSelector) dateSelector.value = allDates[index];
+        }
+
+        // Форматирование даты
+        function formatDate(dateStr) {
+            try {
+                const date = new Date(dateStr + 'T00:00:00');
+                return date.toLocaleDateString('ru-RU', {
+                    day: 'numeric',
+                    month: 'long',
+                    year: 'numeric'
+                });
+            } catch (e) {
+                return dateStr;
+            }
+        }
+
+        // Заполняет навигацию по истории датами текущего периода
+        function fillDateSelector() {
+            const navigation = document.getElementById('historyNavigation');
+            const dateSelector = document.getElementById('dateSelector');
+            navigation.style.display = allDates.length > 1 ? '' : 'none';
+            dateSelector.innerHTML = '';
+            allDates.forEach((dateStr, index) => {
+                const option = document.createElement('option');
+                option.value = dateStr;
+                option.textContent = dateStr.split('-').reverse().join('.') + (index === 0 ? ' (последняя)' : '');
+                dateSelector.appendChild(option);
+            });
+        }
+
+        // Инициализация
+        fillDateSelector();
+        renderTrend(data.series);
+        if (allDates.length > 0) {
+            updateChart(currentDateIndex);
+        }
+
+        // Период агрегации: день, неделя или месяц
+        const resolutionSelector = document.getElementById('resolutionSelector');
+        resolutionSelector.addEventListener('change', function () {
+            fetch(`${DASHBOARD_URLS.chartData}?resolution=${this.value}&points=${TREND_POINTS}`, {credentials: 'same-origin'})
+                .then(response => {
+                    if (!response.ok) throw new Error(response.status);
+                    return response.json();
+                })
+                .then(newData => {
+                    allDates.splice(0, allDates.length, ...newData.dates);
+                    Object.keys(allDataByDate).forEach(key => delete allDataByDate[key]);
+                    Object.assign(allDataByDate, newData.by_date);
+                    currentDateIndex = 0;
+                    fillDateSelector();
+                    renderTrend(newData.series);
+                    updateChart(currentDateIndex);
+                })
+                .catch(error => console.error('Не удалось загрузить историю оценок:', error));
+        });
+
+        // Обработчики событий
+        // Кнопка "Ранее"
+        const prevBtn = document.getElementById('prevDate');
+        if (prevBtn) {
+            prevBtn.addEventListener('click', function () {
+                if (currentDateIndex < allDates.length - 1) {
+                    currentDateIndex++;
+                    updateChart(currentDateIndex);
+                }
+            });
+        }
+
+        // Кнопка "Позже"
+        const nextBtn = document.getElementById('nextDate');
+        if (nextBtn) {
+            nextBtn.addEventListener('click', function () {
+                if (currentDateIndex > 0) {
+                    currentDateIndex--;
+                    updateChart(currentDateIndex);
+                }
+            });
+        }
+
+        // Кнопка "Сегодня" (последняя оценка)
+        const todayBtn = document.getElementById('todayDate');
+        if (todayBtn) {
+            todayBtn.addEventListener('click', function () {
+                currentDateIndex = 0;
+                updateChart(currentDateIndex);
+            });
+        }
+
+        // Селектор даты
+        const dateSelector = document.getElementById('dateSelector');
+        if (dateSelector) {
+            dateSelector.addEventListener('change', function () {
+                const selectedDate = this.value;
+                currentDateIndex = allDates.indexOf(selectedDate);
+                if (currentDateIndex !== -1) {
+                    updateChart(currentDateIndex);
+                }
+            });
+        }
+
+        // Переключатель сравнения (в навигации)
+        const compareToggle = document.getElementById('compareToggle');
+        if (compareToggle) {
+            compareToggle.addEventListener('change', function () {
+                isComparing = this.checked;
+                updateChart(currentDateIndex);
+            });
+        }
+
+        // Переключатель сравнения (в отдельном блоке)
+        const compareToggleInComparison = document.getElementById('compareToggleInComparison');
+        if (compareToggleInComparison) {
+            compareToggleInComparison.addEventListener('change', function () {
+                isComparing = this.checked;
+                updateChart(currentDateIndex);
+            });
+        }
+    }
+
+    // Анимация прогресс-баров
+    const progressBars = document.querySelectorAll('.progress-fill');
+    progressBars.forEach(bar => {
+        const width = bar.style.width;
+        bar.style.width = '0%';
+        setTimeout(() => {
+            bar.style.width = width;
+        }, 300);
+    });
+
+    // Анимация столбцов диаграммы
+    const assessmentBars = document.querySelectorAll('.assessment-fill');
+    assessmentBars.forEach(bar => {
+        const width = bar.style.width;
+        bar.style.width = '0%';
+        setTimeout(() => {
+            bar.style.width = width;
+        }, 500);
+    });
+
+    // Экспорт диграммы с рекомендациями
+    document.getElementById('export-wheel-pdf').addEventListener('click', function () {
+        const btn = this;
+        const originalText = btn.innerHTML;
+        btn.innerHTML = '<i class="bi bi-hourglass-split me-2"></i>Создание...';
+        btn.disabled = true;
+
+        try {
+            const canvas = document.getElementById('lifeWheel');
+            if (!canvas) throw new Error('Диаграмма не найдена');
+
+            // Получаем дату оценки
+            const dateLabel = (document.getElementById('wheelDateLabel')?.textContent || '').replace(/<[^>]*>/g, '').trim() || 'Без даты';
+
+            // Получаем рекомендации (всегда, если есть содержимое)
+            let recommendationsText = '';
+            const recommendationsEl = document.getElementById('recommendationsText');
+            if (recommendationsEl && recommendationsEl.textContent.trim()) {
+                const tempDiv = document.createElement('div');
+                tempDiv.innerHTML = recommendationsEl.innerHTML;
+                recommendationsText = tempDiv.innerText.trim();
+            }
+
+            // Преобразуем canvas в base64
+            const imgData = canvas.toDataURL('image/png');
+
+            // Формируем содержимое PDF
+            const content = [
+                { text: 'Колесо жизни', style: 'header', alignment: 'center' },
+                { text: dateLabel, style: 'subheader', alignment: 'center', margin: [0, 0, 0, 15] },
+                { image: imgData, width: 400, height: 350, alignment: 'center', margin: [0, 0, 0, 15] } // Фиксированная высота 350px
+            ];
+
+            // Добавляем рекомендации, если есть
+            if (recommendationsText) {
+                content.push(
+                    { text: 'Рекомендации', style: 'sectionHeader', margin: [0, 0, 0, 8] },
+                    { text: recommendationsText, style: 'bodyText' }
+                );
+            }
+
+            // Определяем стили
+            const docDefinition = {
+                pageSize: 'A4',
+                pageOrientation: 'portrait',
+                pageMargins: [40, 50, 40, 40],
+                content: content,
+                styles: {
+                    header: {
+                        fontSize: 18,
+                        bold: true,
+                        color: '#4A6FA5',
+                        margin: [0, 0, 0, 5]
+                    },
+                    subheader: {
+                        fontSize: 12,
+                        color: '#666666',
+                        italics: true
+                    },
+                    sectionHeader: {
+                        fontSize: 14,
+                        bold: true,
+                        color: '#4A6FA5',
+                        margin: [0, 10, 0, 5]
+                    },
+                    bodyText: {
+                        fontSize: 10,
+                        lineHeight: 1.3,
+                        margin: [0, 0, 0, 10]
+                    }
+                },
+                defaultStyle: {
+                    font: 'Roboto'
+                }
+            };
+
+            // Генерируем и скачиваем PDF
+            pdfMake.createPdf(docDefinition).download('колесо_жизни_' + new Date().toISOString().slice(0, 10) + '.pdf');
+
+            // Успех
+            btn.innerHTML = '<i class="bi bi-check-circle me-2"></i>Создано!';
+            setTimeout(() => {
+                btn.innerHTML = originalText;
+                btn.disabled = false;
+            }, 2000);
+
+        } catch (error) {
+            console.error('Ошибка при создании PDF:', error);
+            btn.innerHTML = '<i class="bi bi-x-circle me-2"></i>Ошибка!';
+            setTimeout(() => {
+                btn.innerHTML = originalText;
+                btn.disabled = false;
+            }, 3000);
+        }
+    });
+});
@@ -0,0 +1,54 @@
+// Модальное окно для изображений
+function openModal(src, type) {
+    if (type === 'image') {
+        const modal = document.getElementById('imageModal');
+        const modalImg = document.getElementById('modalImage');
+        modal.style.display = 'flex';
+        modalImg.src = src;
+
+        // Блокируем прокрутку страницы
+        document.body.style.overflow = 'hidden';
+    }
+}
+
+function closeModal() {
+    const modal = document.getElementById('imageModal');
+    modal.style.display = 'none';
+
+    // Восстанавливаем прокрутку страницы
+    document.body.style.overflow = 'auto';
+}
+
+// Закрытие модального окна при клике вне изображения
+document.getElementById('imageModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeModal();
+    }
+});
+
+// Анимация появления записей
+document.addEventListener('DOMContentLoaded', function() {
+    const entryCards = document.querySelectorAll('.entry-card');
+    entryCards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(20px)';
+        setTimeout(() => {
+            card.style.transition = 'opacity 0.5s ease, transform 0.5s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 100 + 200);
+    });
+
+    // Подсветка при наведении на медиа
+    const mediaImages = document.querySelectorAll('.media-container img');
+    mediaImages.forEach(img => {
+        img.style.transition = 'transform 0.3s ease, box-shadow 0.3s ease';
+    });
+
+    // Обработка клавиши Escape для закрытия модального окна
+    document.addEventListener('keydown', function(e) {
+        if (e.key === 'Escape') {
+            closeModal();
+        }
+    });
+});
@@ -0,0 +1,121 @@
+// Функция переключения статуса напоминания
+function toggleReminder(reminderId) {
+    const checkbox = event.target;
+    const badge = checkbox.closest('.status-toggle').querySelector('.status-badge');
+    checkbox.disabled = true;
+
+    // Сервер инвертирует флаг, если он ещё в том состоянии, что видела страница,
+    // и возвращает новое состояние
+    const body = new URLSearchParams({current: checkbox.checked ? '0' : '1'});
+    fetch(`/reminders/${reminderId}/toggle/`, {
+        method: 'POST',
+        body: body,
+        headers: {
+            'X-CSRFToken': getCookie('csrftoken'),
+            'X-Requested-With': 'XMLHttpRequest',
+        },
+        credentials: 'same-origin'
+    })
+    .then(response => {
+        if (!response.ok) throw new Error(response.status);
+        return response.json();
+    })
+    .then(data => {
+        checkbox.checked = data.is_enabled;
+        if (data.is_enabled) {
+            badge.className = 'status-badge status-active';
+            badge.innerHTML = '<i class="bi bi-bell-fill me-1"></i>Активно';
+            showNotification('Напоминание включено', 'success');
+        } else {
+            badge.className = 'status-badge status-inactive';
+            badge.innerHTML = '<i class="bi bi-bell-slash me-1"></i>Отключено';
+            showNotification('Напоминание отключено', 'info');
+        }
+
+        // Обновляем счетчик активных напоминаний
+        updateActiveCount();
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        // Возвращаем переключатель в исходное состояние
+        checkbox.checked = !checkbox.checked;
+        showNotification('Ошибка при обновлении статуса', 'error');
+    })
+    .finally(() => { checkbox.disabled = false; });
+}
+
+// Функция для обновления счетчика активных напоминаний
+function updateActiveCount() {
+    const activeBadges = document.querySelectorAll('.status-badge.status-active');
+    const activeCountElement = document.querySelector('.stat-item:nth-child(2) .stat-value');
+    if (activeCountElement) {
+        activeCountElement.textContent = activeBadges.length;
+    }
+}
+
+// Функция для получения CSRF токена
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Функция для показа уведомлений
+function showNotification(message, type = 'info') {
+    // Создаем элемент уведомления
+    const notification = document.createElement('div');
+    notification.className = `alert alert-${type === 'error' ? 'danger' : type === 'success' ? 'success' : 'info'}
+                              position-fixed top-0 end-0 m-3`;
+    notification.style.zIndex = '9999';
+    notification.innerHTML = `
+        <div class="d-flex align-items-center">
+            <i class="bi ${type === 'error' ? 'bi-exclamation-triangle' : type === 'success' ? 'bi-check-circle' : 'bi-info-circle'}
+               me-2"></i>
+            ${message}
+        </div>
+    `;
+
+    // Добавляем на страницу
+    document.body.appendChild(notification);
+
+    // Удаляем через 3 секунды
+    setTimeout(() => {
+        notification.remove();
+    }, 3000);
+}
+
+// Анимация появления карточек
+document.addEventListener('DOMContentLoaded', function() {
+    const cards = document.querySelectorAll('.reminder-card');
+    cards.forEach((card, index) => {
+        card.style.opacity = '0';
+        card.style.transform = 'translateY(20px)';
+        setTimeout(() => {
+            card.style.transition = 'opacity 0.5s ease, transform 0.5s ease';
+            card.style.opacity = '1';
+            card.style.transform = 'translateY(0)';
+        }, index * 100);
+    });
+
+    // Плавный скролл при переходе по страницам
+    const pageLinks = document.querySelectorAll('.page-link[href*="page="]');
+    pageLinks.forEach(link => {
+        link.addEventListener('click', function(e) {
+            setTimeout(() => {
+                window.scrollTo({
+                    top: document.querySelector('.reminders-container').offsetTop - 100,
+                    behavior: 'smooth'
+                });
+            }, 100);
+        });
+    });
+});
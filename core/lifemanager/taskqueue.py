@@ -0,0 +1,158 @@
+import functools
+import logging
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger('lifemanager')
+
+# Повтор после n-й неудачи — через BACKOFF_BASE * 2^(n-1) секунд (±20%), не больше BACKOFF_MAX
+BACKOFF_BASE = 10
+BACKOFF_MAX = 3600
+LEASE_SECONDS = 600
+
+
+def _tasks():
+    # Очередь всегда в основной БД: чтение с реплики вернуло бы уже взятые задачи
+    return Task.objects.using(DEFAULT_DB_ALIAS)
+
+
+class TaskFunction:
+    """Функция, объявленная через @task: вызов выполняет её сразу, delay() — ставит в очередь."""
+
+    def __init__(self, func, priority, max_attempts):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, priority=None, run_at=None):
+        if getattr(settings, 'TASK_ALWAYS_EAGER', False):
+            self.func(*args, **(kwargs or {}))
+            return None
+        task = _tasks().create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs or {},
+            priority=self.priority if priority is None else priority,
+            run_at=run_at or timezone.now(),
+            max_attempts=self.max_attempts,
+        )
+        # Воркер будим после коммита: иначе он не увидит строку задачи
+        transaction.on_commit(notify_workers, using=DEFAULT_DB_ALIAS)
+        return task
+
+
+def task(func=None, *, priority=0, max_attempts=3):
+    """Объявляет фоновую задачу. Аргументы delay() должны сериализоваться в JSON.
+
+    Задача ищется воркером по пути модуля, поэтому объявлять её нужно на уровне
+    модуля. Чем больше priority, тем раньше задача берётся из очереди.
+    """
+    if func is None:
+        return lambda func: TaskFunction(func, priority, max_attempts)
+    return TaskFunction(func, priority, max_attempts)
+
+
+def notify_workers():
+    """Будит run_workers UDP-датаграммой на TASK_WAKEUP_ADDRESS.
+
+    Датаграмма может потеряться — тогда воркер возьмёт задачу, проснувшись по
+    TASK_IDLE_TIMEOUT, так что доставка не гарантируется и не нужна.
+    """
+    address = getattr(settings, 'TASK_WAKEUP_ADDRESS', None)
+    if not address:
+        return
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.sendto(b'1', address)
+        except OSError:
+            pass
+
+
+def _ready(now):
+    lease = timedelta(seconds=getattr(settings, 'TASK_LEASE_SECONDS', LEASE_SECONDS))
+    # Задача, чей воркер не отчитался за время аренды, считается брошенной
+    return Q(status=Task.Status.QUEUED, run_at__lte=now) | Q(status=Task.Status.RUNNING, locked_at__lt=now - lease)
+
+
+def claim(worker_id, limit):
+    """Забирает до limit готовых задач, по приоритету и времени запуска.
+
+    Каждая задача захватывается условным UPDATE: если две копии воркера выбрали
+    одну строку, обновит её только одна. На PostgreSQL кандидаты выбираются
+    с SKIP LOCKED, и воркеры не спотыкаются о строки друг друга.
+    """
+    now = timezone.now()
+    ready = _ready(now)
+    candidates = _tasks().filter(ready).order_by('-priority', 'run_at').values_list('pk', flat=True)
+    claimed = []
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if connections[DEFAULT_DB_ALIAS].features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        for pk in candidates[:limit * 2]:
+            updated = _tasks().filter(ready, pk=pk).update(
+                status=Task.Status.RUNNING, locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1,
+            )
+            if updated:
+                claimed.append(pk)
+                if len(claimed) == limit:
+                    break
+    return list(_tasks().filter(pk__in=claimed).order_by('-priority', 'run_at'))
+
+
+def next_run_in(default):
+    """Секунд до ближайшей отложенной задачи (не больше default)."""
+    run_at = _tasks().filter(status=Task.Status.QUEUED).order_by('run_at').values_list('run_at', flat=True).first()
+    if run_at is None:
+        return default
+    return min(default, max(0.0, (run_at - timezone.now()).total_seconds()))
+
+
+def execute(name, args, kwargs):
+    """Выполняет задачу в потоке или процессе пула; возвращает текст ошибки или None."""
+    try:
+        import_string(name)(*args, **kwargs)
+        return None
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        close_old_connections()
+
+
+def backoff(attempt):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def finish(task, error):
+    """Записывает результат: успешная задача удаляется, неудачная — повторяется или помечается failed."""
+    # Условие по locked_at: если аренда истекла и задачу взял другой воркер, его запись не трогаем
+    mine = _tasks().filter(pk=task.pk, locked_at=task.locked_at)
+    if error is None:
+        mine.delete()
+    elif task.attempts < task.max_attempts:
+        delay = backoff(task.attempts)
+        logger.warning("Задача %s (%s) упала, попытка %s из %s, повтор через %s с",
+                       task.name, task.pk, task.attempts, task.max_attempts, round(delay.total_seconds()))
+        mine.update(status=Task.Status.QUEUED, run_at=timezone.now() + delay, last_error=error,
+                    locked_by='', locked_at=None)
+    else:
+        logger.error("Задача %s (%s) не выполнена за %s попыток:\n%s", task.name, task.pk, task.attempts, error)
+        mine.update(status=Task.Status.FAILED, last_error=error, locked_by='', locked_at=None)
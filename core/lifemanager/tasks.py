@@ -0,0 +1,12 @@
+from django.core.mail import EmailMultiAlternatives
+
+from .taskqueue import task
+
+
+@task(priority=10, max_attempts=5)
+def send_email(subject, body, to, from_email=None, html_body=None):
+    # Письма — с высоким приоритетом: пользователь ждёт их прямо сейчас
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
@@ -1,20 +1,11 @@
-import json
 from django import template
-from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.safestring import mark_safe
-from datetime import date, datetime
 
-register = template.Library()
+from ..fastjson import dumps_for_script
 
-class CustomJSONEncoder(DjangoJSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (date, datetime)):
-            return obj.isoformat()
-        return super().default(obj)
+register = template.Library()
 
 @register.filter(name='safe_json')
 def safe_json(value):
-    """Безопасно преобразует значение в JSON"""
-    if value is None:
-        return 'null'
-    return mark_safe(json.dumps(value, cls=CustomJSONEncoder))
\ No newline at end of file
+    """Безопасно преобразует значение в JSON для вставки в <script>"""
+    return mark_safe(dumps_for_script(value))
\ No newline at end of file
@@ -1,3 +1,1705 @@
-from django.test import TestCase
+import asyncio
+import decimal
+import gzip
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import django
+import numpy as np
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from .analytics import balance_index, correlations, latest_values, linear_trend, moving_average, streaks, user_analytics
+from .api import build_state, parse_query
+from .assets import IMMUTABLE, REVALIDATE, CompressedManifestStaticFilesStorage, serve_static
+from .checks import check_shared_cache
+from .log import BackgroundQueueHandler, configure_logging
+from .fastjson import BACKENDS, dumps, dumps_for_script
+from .compression import accepted_encodings, acompress_stream, brotli, compress_bytes, negotiate
+from .middleware import PIN_COOKIE_NAME, CompressionMiddleware, ReplicaPinningMiddleware
+from .models import (
+    User, LifeSphere, SphereAssessment, Goal, GoalStep, DiaryEntry, Reminder, Note, NoteItem, Task, WeeklyReport,
+)
+from . import ids, views
+from .purge import purge_user
+from .reports import build_reports, generate_reports, last_week_start
+from .routers import PrimaryReplicaRouter, UserShardRouter
+from .spheres import VERSION_CACHE_KEY, sphere_registry
+from .sharding import ShardNotSelected, pick_shard, use_shard
+from .timeseries import assessment_series, build_assessment_series
+from .db import apply_sqlite_pragmas, pragma_statements, update_in_chunks
+from .goals import disable_finished_reminders, flag_overdue_goals, goal_counters
+from .throttle import check_throttle, take_token
+from .taskqueue import claim, execute, finish, task
+
+
+@task(max_attempts=2)
+def failing_task(message):
+    raise RuntimeError(message)
+
+
+# Вместо общего файлового кэша core/cache — кэш процесса, чистый в каждом тесте:
+# вёдра throttle.py, метки пользователей и сессии не переходят между тестами и запусками
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+    'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-fragments'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IsolatedCacheTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+
+class QueryPlanTests(IsolatedCacheTestCase):
+    """Основные запросы страниц должны идти по индексам: без полного
+    сканирования таблиц и без сортировки во временном B-дереве."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='plan@example.com', name='Plan', password='Pass.word1')
+        cls.sphere = LifeSphere.objects.create(title='Здоровье')
+
+    def assertUsesIndex(self, queryset, allow_temp_sort=False):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            # SCAN по присоединённой таблице сфер (LEFT JOIN) допустим — это справочник
+            if ' SCAN ' in f' {line} ' and 'lifemanager_lifesphere' not in line:
+                self.fail(f"Полное сканирование таблицы:\n{plan}")
+        if not allow_temp_sort:
+            self.assertNotIn('USE TEMP B-TREE', plan, f"Сортировка во временном B-дереве:\n{plan}")
+
+    def test_sphere_assessment_queries(self):
+        user, today = self.user, date.today()
+        assessments = views.assessment_history_queryset(user)
+        self.assertUsesIndex(assessments)
+        self.assertUsesIndex(assessments[:8])
+        self.assertUsesIndex(assessments.filter(date__gte=today - timedelta(days=7)))
+        self.assertUsesIndex(views.sphere_assessments_queryset(user, self.sphere)[:1])
+        self.assertUsesIndex(views.assessed_sphere_ids(user, today))
+
+    def test_goal_queries(self):
+        self.assertUsesIndex(views.upcoming_goals(self.user))
+        # Последние цели профиля: сортируются только цели одного пользователя,
+        # отдельный индекс (user, deadline) ради трёх строк не нужен
+        self.assertUsesIndex(views.recent_goals_queryset(self.user), allow_temp_sort=True)
+        # Порядок списка целей задаётся выражением CASE — индекс здесь не поможет
+        for status in (None, 'active', 'completed'):
+            goals = views.goal_list_queryset(self.user, status)
+            self.assertUsesIndex(goals[:5], allow_temp_sort=True)
+            # count() пагинатора отбрасывает сортировку
+            self.assertUsesIndex(goals.order_by().values('pk'))
+        self.assertUsesIndex(views.goal_list_queryset(self.user, 'active', 'бег')[:5], allow_temp_sort=True)
+
+    def test_diary_queries(self):
+        entries = views.diary_list_queryset(self.user)
+        self.assertUsesIndex(entries)
+        self.assertUsesIndex(views.recent_entries_queryset(self.user))
+        # Счётчики — методы count запросов, которые выполнит шаблон
+        for count in views.diary_counters(entries).values():
+            self.assertUsesIndex(count.__self__.values('pk'))
+
+    def test_reminder_queries(self):
+        reminders = views.reminder_list_queryset(self.user)
+        self.assertUsesIndex(reminders[:5])
+        self.assertUsesIndex(reminders.filter(is_enabled=True).order_by().values('pk'))
+
+    def test_note_queries(self):
+        self.assertUsesIndex(views.note_list_queryset(self.user))
+
+
+class FragmentCacheTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='fragments@example.com', name='Fragments', password=None)
+        self.reminders = [
+            Reminder.objects.create(user=self.user, type=Reminder.Type.DAILY, time=f'0{hour}:00') for hour in (7, 8, 9)
+        ]
+        self.client.force_login(self.user)
+
+    def stats(self, url):
+        """Значения карточек статистики страницы и COUNT-запросы, выполненные при рендеринге."""
+        with CaptureQueriesContext(connection) as queries:
+            content = self.client.get(url).content.decode()
+        values = re.findall(r'<div class="stat-value">\s*(\d+)\s*</div>', content)
+        counts = [query['sql'] for query in queries if 'COUNT(' in query['sql']]
+        return [int(value) for value in values], counts
+
+    def test_fragment_reused_until_data_changes(self):
+        url = reverse('reminder_list')
+        values, counts = self.stats(url)
+        self.assertEqual(values, [3, 3, 3])
+        # Второй рендер берёт фрагмент из кэша: счётчики активных и ежедневных не считаются
+        cached_values, cached_counts = self.stats(url)
+        self.assertEqual(cached_values, values)
+        self.assertEqual(len(counts) - len(cached_counts), 2)
+
+        self.client.post(reverse('toggle_reminder', args=[self.reminders[0].id]), {'current': '1'},
+                         headers={'X-Requested-With': 'XMLHttpRequest'})
+        values, counts = self.stats(url)
+        self.assertEqual(values, [3, 2, 3])
+        self.assertEqual(len(counts), len(cached_counts) + 2)
+
+    def test_sphere_version_invalidates_fragment(self):
+        url = reverse('reminder_list')
+        self.stats(url)
+        Reminder.objects.filter(pk=self.reminders[1].pk).update(is_enabled=False)
+        # UPDATE в обход сигналов версию данных не меняет — фрагмент прежний
+        self.assertEqual(self.stats(url)[0], [3, 3, 3])
+        LifeSphere.objects.create(title='Новая сфера')
+        self.assertEqual(self.stats(url)[0], [3, 2, 3])
+
+    def test_fragments_are_per_user(self):
+        url = reverse('reminder_list')
+        self.stats(url)
+        other = User.objects.create_user(email='fragments-other@example.com', name='Other', password=None)
+        Reminder.objects.create(user=other, type=Reminder.Type.WEEKLY, time='10:00')
+        self.client.force_login(other)
+        self.assertEqual(self.stats(url)[0], [1, 1, 0])
+
+    def test_diary_stats_expire_with_the_day(self):
+        url = reverse('diary_list')
+        DiaryEntry.objects.create(user=self.user, text='Запись')
+        self.assertEqual(self.stats(url)[0], [1, 0, 0, 1])
+        # «За 30 дней» зависит от даты — на следующий день фрагмент строится заново
+        DiaryEntry.objects.filter(user=self.user).update(created_at=timezone.now() - timedelta(days=30, hours=1))
+        self.assertEqual(self.stats(url)[0], [1, 0, 0, 1])
+        tomorrow = timezone.now() + timedelta(days=1)
+
+        class Tomorrow(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return tomorrow.astimezone(tz)
+
+        # {% now %} берёт время из datetime.now, счётчики — из timezone.now
+        with mock.patch('django.utils.timezone.now', return_value=tomorrow), \
+                mock.patch('django.template.defaulttags.datetime', Tomorrow):
+            self.assertEqual(self.stats(url)[0], [1, 0, 0, 0])
+
+
+class RegistrationTests(IsolatedCacheTestCase):
+    def test_register_logs_in_and_opens_dashboard(self):
+        response = self.client.post('/register/', {
+            'email': 'new@example.com',
+            'name': 'New',
+            'password': 'Pass.word1',
+            'password_confirm': 'Pass.word1',
+        })
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        user = User.objects.get(email='new@example.com')
+        self.assertEqual(self.client.session['_auth_user_id'], str(user.pk))
+
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, user)
+
+
+class ReminderListTests(IsolatedCacheTestCase):
+    def test_bad_page_numbers_fall_back(self):
+        user = User.objects.create_user(email='rem@example.com', name='Rem', password='Pass.word1')
+        Reminder.objects.bulk_create([
+            Reminder(user=user, type=Reminder.Type.DAILY, time=f'{hour:02d}:00') for hour in range(7)
+        ])
+        self.client.force_login(user)
+        for page, number in (('abc', 1), ('999', 2), ('2', 2)):
+            response = self.client.get('/reminders/', {'page': page})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['page_obj'].number, number)
+
+
+# Страницы чтения и текст, который на них должен быть
+READ_PAGES = {
+    'dashboard': 'Цель ASGI',
+    'profile': 'Запись ASGI',
+    'assessment_history': 'Здоровье',
+    'goal_list': 'Цель ASGI',
+    'diary_list': 'Запись ASGI',
+    'note_list': 'Заметка ASGI',
+}
+
+
+class ToggleTests(IsolatedCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='toggle@example.com', name='Toggle', password=None)
+        cls.other = User.objects.create_user(email='toggle-other@example.com', name='Other', password=None)
+        cls.reminder = Reminder.objects.create(user=cls.user, type=Reminder.Type.DAILY, time='09:00')
+        cls.sphere = LifeSphere.objects.create(title='Здоровье')
+        cls.goal = Goal.objects.create(user=cls.user, sphere=cls.sphere, title='Цель', deadline=date.today())
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def toggle(self, url, **data):
+        return self.client.post(url, data, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+    def test_json_state(self):
+        url = reverse('toggle_reminder', args=[self.reminder.id])
+        self.assertEqual(self.toggle(url, current='1').json(), {'status': 'ok', 'is_enabled': False})
+        self.assertEqual(self.toggle(url, current='0').json(), {'status': 'ok', 'is_enabled': True})
+        # Без current флаг инвертируется как есть
+        self.assertEqual(self.toggle(url).json(), {'status': 'ok', 'is_enabled': False})
+        self.reminder.refresh_from_db()
+        self.assertFalse(self.reminder.is_enabled)
+
+        url = reverse('toggle_pin_goal', args=[self.goal.id])
+        self.assertEqual(self.toggle(url, current='0').json(), {'status': 'ok', 'is_pinned': True})
+        # Страница устарела (закреплено в другой вкладке) — состояние не меняется
+        self.assertEqual(self.toggle(url, current='0').json(), {'status': 'ok', 'is_pinned': True})
+        self.assertRedirects(self.client.post(url, {'current': '1'}), reverse('goal_list'), fetch_redirect_response=False)
+        self.goal.refresh_from_db()
+        self.assertFalse(self.goal.is_pinned)
+
+    def test_foreign_rows_are_not_found(self):
+        reminder = Reminder.objects.create(user=self.other, type=Reminder.Type.DAILY, time='09:00')
+        goal = Goal.objects.create(user=self.other, sphere=self.sphere, title='Чужая', deadline=date.today())
+        self.assertEqual(self.toggle(reverse('toggle_reminder', args=[reminder.id]), current='1').status_code, 404)
+        self.assertEqual(self.toggle(reverse('toggle_pin_goal', args=[goal.id])).status_code, 404)
+        reminder.refresh_from_db()
+        goal.refresh_from_db()
+        self.assertTrue(reminder.is_enabled)
+        self.assertFalse(goal.is_pinned)
+
+    def test_query_count(self):
+        url = reverse('toggle_reminder', args=[self.reminder.id])
+        with CaptureQueriesContext(connection) as queries:
+            self.toggle(url, current='1')
+        statements = [query['sql'] for query in queries]
+        # Строка меняется одним UPDATE без чтения
+        self.assertEqual([sql.split()[0] for sql in statements if 'lifemanager_reminder' in sql], ['UPDATE'])
+        # Кроме него — только отметка изменения данных для ETag и загрузка пользователя сессии
+        self.assertEqual(len(statements), 3, statements)
+        self.assertEqual(sum(sql.startswith('UPDATE "lifemanager_user" SET "data_changed_at"') for sql in statements), 1)
+
+
+class ConditionalGetTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='etag@example.com', name='Etag', password=None)
+        self.other = User.objects.create_user(email='etag-other@example.com', name='Other', password=None)
+        self.sphere = LifeSphere.objects.create(title='Здоровье')
+        self.client.force_login(self.user)
+
+    def goal(self, user=None, steps=0):
+        goal = Goal.objects.create(user=user or self.user, sphere=self.sphere, title='Цель', deadline=date.today())
+        GoalStep.objects.bulk_create([GoalStep(goal=goal, title=f'Шаг {n}') for n in range(steps)])
+        return goal
+
+    def touches(self, queries):
+        return sum(query['sql'].startswith('UPDATE "lifemanager_user" SET "data_changed_at"') for query in queries)
+
+    def test_repeated_get_is_not_modified(self):
+        url = reverse('goal_list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+
+    def test_write_invalidates_validators(self):
+        url = reverse('goal_list')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # Last-Modified с точностью до секунды: запись — в следующую секунду
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=2)):
+            goal = self.goal()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        goal.delete()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_cascade_delete_touches_owner_once(self):
+        goal = self.goal(steps=5)
+        note = Note.objects.create(user=self.user, title='Заметка')
+        NoteItem.objects.bulk_create([NoteItem(note=note, text=f'Пункт {n}') for n in range(3)])
+        stamp = User.objects.get(pk=self.user.pk).data_changed_at
+
+        for obj in (goal, note):
+            with CaptureQueriesContext(connection) as queries:
+                obj.delete()
+            self.assertEqual(self.touches(queries), 1)
+            # Владелец шагов и пунктов берётся из удаляемого родителя, без запроса на каждую строку
+            self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "lifemanager_goal"."user_id"')])
+        self.assertGreater(User.objects.get(pk=self.user.pk).data_changed_at, stamp)
+
+        # Из QuerySet — одна отметка на пользователя
+        for _ in range(3):
+            self.goal(steps=2)
+        with CaptureQueriesContext(connection) as queries:
+            Goal.objects.filter(user=self.user).delete()
+        self.assertEqual(self.touches(queries), 1)
+
+    def test_sphere_delete_touches_each_owner(self):
+        self.goal(steps=2)
+        self.goal(steps=2)
+        self.goal(user=self.other, steps=3)
+        SphereAssessment.objects.create(user=self.other, sphere=self.sphere, value=5, date=date.today())
+        with CaptureQueriesContext(connection) as queries:
+            self.sphere.delete()
+        self.assertEqual(self.touches(queries), 2)
+
+    def test_user_delete_does_not_touch(self):
+        self.goal(steps=3)
+        Note.objects.create(user=self.user, title='Заметка')
+        with CaptureQueriesContext(connection) as queries:
+            self.user.delete()
+        self.assertEqual(self.touches(queries), 0)
+
+
+class AssessAllTests(IsolatedCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='assess@example.com', name='Assess', password=None)
+        cls.spheres = LifeSphere.objects.bulk_create([LifeSphere(title=f'Сфера {i}') for i in range(3)])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def post(self, values, **kwargs):
+        data = {f'value_{sphere.id}': value for sphere, value in zip(self.spheres, values)}
+        return self.client.post(reverse('assess_all'), data, **kwargs)
+
+    def saved(self):
+        return dict(SphereAssessment.objects.filter(user=self.user, date=date.today()).values_list('sphere__title', 'value'))
+
+    def test_saves_and_updates_the_day(self):
+        self.assertRedirects(self.post([5, '', 7]), reverse('sphere_list'), fetch_redirect_response=False)
+        self.assertEqual(self.saved(), {'Сфера 0': 5, 'Сфера 2': 7})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post([6, 8, 9], headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.json()['assessments'], {
+            str(sphere.id): value for sphere, value in zip(self.spheres, [6, 8, 9])
+        })
+        self.assertEqual(self.saved(), {'Сфера 0': 6, 'Сфера 1': 8, 'Сфера 2': 9})
+        # Вся оценка дня — один INSERT ... ON CONFLICT DO UPDATE, без предварительного SELECT
+        statements = [query['sql'] for query in queries if 'lifemanager_sphereassessment' in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT'))
+        self.assertIn('ON CONFLICT', statements[0])
+
+    def test_invalid_values_save_nothing(self):
+        response = self.post([5, 11], headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['spheres'], ['Сфера 1'])
+        self.assertEqual(self.post(['', '']).status_code, 302)
+        self.assertEqual(self.saved(), {})
+
+    def test_one_assessment_per_sphere_and_day(self):
+        SphereAssessment.objects.create(user=self.user, sphere=self.spheres[0], value=3, date=date.today())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SphereAssessment.objects.create(user=self.user, sphere=self.spheres[0], value=4, date=date.today())
+
+
+class AssessmentSeriesTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email='series@example.com', name='Series', password=None)
+        self.health = LifeSphere.objects.create(title='Здоровье')
+        self.work = LifeSphere.objects.create(title='Работа')
+        self.start = date(2024, 3, 1)
+        SphereAssessment.objects.bulk_create([
+            SphereAssessment(user=self.user, sphere=self.health, value=value, date=self.start + timedelta(days=day))
+            for day, value in ((0, 3), (1, 5), (4, 10), (9, 7))
+        ] + [
+            SphereAssessment(user=self.user, sphere=self.work, value=2, date=self.start + timedelta(days=2)),
+        ])
+
+    def test_uint8_matrix(self):
+        series = build_assessment_series(self.user)
+        self.assertEqual(series.matrix.dtype, np.uint8)
+        self.assertEqual(series.matrix.shape, (10, 2))
+        self.assertEqual(series.base_date, self.start)
+        self.assertEqual(series.count(), 5)
+        self.assertEqual(series.count(self.start + timedelta(days=3)), 2)
+        self.assertEqual(series.mean(), 27 / 5)
+
+        health = series.sphere(self.health.pk)
+
+        def day(offset):
+            return self.start + timedelta(days=offset)
+
+        self.assertEqual(health.points(), [(day(0), 3), (day(1), 5), (day(4), 10), (day(9), 7)])
+        self.assertEqual(health.latest(2), [(day(4), 10), (day(9), 7)])
+        self.assertEqual(health.latest(0), [])
+        self.assertEqual((health[day(4)], health[day(3)], health[day(-1)], health[day(10)]), (10, None, None, None))
+        self.assertEqual(health.between(day(1), day(4)), [(day(1), 5), (day(4), 10)])
+        # Срез — представление того же массива, без копии
+        window = health[day(1):day(5)]
+        self.assertEqual((window.base_date, len(window)), (day(1), 4))
+        self.assertTrue(np.shares_memory(window.values, series.matrix))
+        self.assertEqual(series.sphere(uuid.uuid4()).points(), [])
+
+        floats = series.as_float([self.work.pk, self.health.pk], until=day(11))
+        self.assertEqual(floats.shape, (12, 2))
+        self.assertEqual(floats[2, 0], 2)
+        self.assertEqual(floats[4, 1], 10)
+        self.assertEqual(int(np.isnan(floats).sum()), 24 - 5)
+
+    def test_empty_series(self):
+        other = User.objects.create_user(email='series-empty@example.com', name='Empty', password=None)
+        series = build_assessment_series(other)
+        self.assertEqual((len(series), series.count(), series.mean()), (0, 0, None))
+        self.assertEqual(series.sphere(self.health.pk).points(), [])
+        self.assertEqual(series.as_float([self.health.pk]).shape, (0, 1))
+
+    def test_cache_is_invalidated_by_data_change(self):
+        user = User.objects.get(pk=self.user.pk)
+        series = assessment_series(user)
+        with self.assertNumQueries(0):
+            self.assertEqual(assessment_series(user).count(), series.count())
+
+        # Запись другого пользователя кэш не сбрасывает
+        other = User.objects.create_user(email='series-other@example.com', name='Other', password=None)
+        SphereAssessment.objects.create(user=other, sphere=self.health, value=4, date=self.start)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            assessment_series(user)
+
+        SphereAssessment.objects.create(user=self.user, sphere=self.work, value=9, date=self.start + timedelta(days=20))
+        user = User.objects.get(pk=self.user.pk)
+        series = assessment_series(user)
+        self.assertEqual(series.count(), 6)
+        self.assertEqual(len(series), 21)
+
+
+class AnalyticsTests(IsolatedCacheTestCase):
+    nan = float('nan')
+    # 4 дня × 2 сферы
+    matrix = np.array([
+        [2, 8],
+        [nan, 8],
+        [4, nan],
+        [6, 5],
+    ], dtype=float)
+
+    def test_moving_average(self):
+        np.testing.assert_allclose(moving_average(self.matrix, 2), [[2, 8], [2, 8], [4, 8], [5, 5]])
+        self.assertTrue(np.isnan(moving_average(np.array([[self.nan]]), 7)[0, 0]))
+
+    def test_linear_trend(self):
+        # Наклоны по точкам (0, 2), (2, 4), (3, 6) и (0, 8), (1, 8), (3, 5)
+        np.testing.assert_allclose(linear_trend(self.matrix), [9 / 7, -15 / 14])
+        self.assertTrue(np.isnan(linear_trend(self.matrix[:1])).all())
+
+    def test_streaks(self):
+        current, longest = streaks(self.matrix, threshold=7)
+        self.assertEqual((current.tolist(), longest.tolist()), ([0, 0], [0, 2]))
+        # Пропуск дня серию не прерывает
+        current, longest = streaks(self.matrix, threshold=4)
+        self.assertEqual((current.tolist(), longest.tolist()), ([2, 3], [2, 3]))
+
+    def test_correlations(self):
+        nan = self.nan
+        matrix = np.array([
+            [1, 2, 5, 3],
+            [2, 4, 4, 3],
+            [3, 6, 3, 3],
+            [4, 8, 2, 3],
+            [5, nan, 1, 3],
+        ], dtype=float)
+        r = correlations(matrix, min_days=3)
+        self.assertAlmostEqual(r[0, 1], 1)
+        self.assertAlmostEqual(r[0, 2], -1)
+        self.assertAlmostEqual(r[1, 2], -1)
+        # Постоянная оценка и недостаток общих дней — корреляции нет
+        self.assertTrue(np.isnan(r[0, 3]))
+        self.assertTrue(np.isnan(correlations(matrix, min_days=6)[0, 2]))
+
+    def test_latest_values_and_balance(self):
+        latest = latest_values(self.matrix)
+        np.testing.assert_array_equal(latest, [6, 5])
+        # 5.5 / 10 × (1 − 0.5 / 4.5) × 100
+        self.assertEqual(balance_index(latest), 49)
+        self.assertEqual(balance_index(np.array([10.0, 10.0])), 100)
+        self.assertTrue(np.isnan(latest_values(np.empty((0, 2)))).all())
+        self.assertIsNone(balance_index(np.array([self.nan])))
+
+    def test_cache_expires_at_midnight(self):
+        user = User.objects.create_user(email='analytics@example.com', name='Analytics', password=None)
+        sphere = LifeSphere.objects.create(title='Здоровье')
+        today = date.today()
+        SphereAssessment.objects.bulk_create([
+            SphereAssessment(user=user, sphere=sphere, value=8, date=today - timedelta(days=day)) for day in range(3)
+        ])
+        self.assertEqual(user_analytics(user)['spheres'][0]['current_streak'], 3)
+        self.assertEqual(user_analytics(user)['days'], 3)
+
+        class Tomorrow(date):
+            @classmethod
+            def today(cls):
+                return today + timedelta(days=1)
+
+        with mock.patch('lifemanager.analytics.date', Tomorrow):
+            self.assertEqual(user_analytics(user)['days'], 4)
+
+
+class ReadViewsTests(IsolatedCacheTestCase):
+    """Под WSGI страницы чтения обслуживают синхронные view, под ASGI — async."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='asgi@example.com', name='Asgi', password=None)
+        sphere = LifeSphere.objects.create(title='Здоровье')
+        SphereAssessment.objects.create(user=cls.user, sphere=sphere, value=7, date=date.today())
+        Goal.objects.create(user=cls.user, sphere=sphere, title='Цель ASGI', deadline=date.today() + timedelta(days=3))
+        DiaryEntry.objects.create(user=cls.user, text='Запись ASGI')
+        Note.objects.create(user=cls.user, title='Заметка ASGI')
+
+    def test_sync_views_under_wsgi(self):
+        self.client.force_login(self.user)
+        for name, text in READ_PAGES.items():
+            response = self.client.get(reverse(name))
+            self.assertContains(response, text, msg_prefix=name)
+            self.assertFalse(iscoroutinefunction(response.resolver_match.func), name)
+
+    async def test_async_views_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for name, text in READ_PAGES.items():
+            response = await self.async_client.get(reverse(name))
+            self.assertContains(response, text, msg_prefix=name)
+            self.assertTrue(iscoroutinefunction(response.resolver_match.func), name)
+        # Остальные страницы под ASGI остаются синхронными
+        response = await self.async_client.get(reverse('reminder_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(iscoroutinefunction(response.resolver_match.func))
+
+
+class SqlitePragmaTests(IsolatedCacheTestCase):
+    def connect(self):
+        # Отдельное соединение к файлу: connection_created применяет прагмы при подключении
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'db.sqlite3')
+        wrapper = SQLiteDatabaseWrapper({**connections.settings[DEFAULT_DB_ALIAS], 'NAME': path}, alias='pragma_test')
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_statements(self):
+        self.assertEqual(pragma_statements({'journal_mode': 'WAL', 'cache_size': -64000}),
+                         ['PRAGMA journal_mode = WAL', 'PRAGMA cache_size = -64000'])
+
+    def test_production_pragmas_applied_on_connect(self):
+        with override_settings(SQLITE_PRAGMAS=settings.SQLITE_PRODUCTION_PRAGMAS):
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -64000)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma(wrapper, 'mmap_size'), 268435456)
+
+    def test_defaults_left_alone(self):
+        with override_settings(SQLITE_PRAGMAS={}):
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    def test_other_vendors_ignored(self):
+        other = mock.Mock(vendor='postgresql')
+        with override_settings(SQLITE_PRAGMAS=settings.SQLITE_PRODUCTION_PRAGMAS):
+            apply_sqlite_pragmas(None, other)
+        other.cursor.assert_not_called()
+
+
+class NightlyGoalsTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = date.today()
+        self.user = User.objects.create_user(email='nightly@example.com', name='Nightly', password=None)
+        self.other = User.objects.create_user(email='nightly-other@example.com', name='Other', password=None)
+        self.sphere = LifeSphere.objects.create(title='Здоровье')
+
+    def goals(self, user, count, days, status=Goal.Status.ACTIVE, is_overdue=False):
+        # bulk_create в обход save(): флаг остаётся таким, каким был до смены дня
+        return Goal.objects.bulk_create([
+            Goal(user=user, sphere=self.sphere, title=f'Цель {i}', status=status, is_overdue=is_overdue,
+                 deadline=self.today + timedelta(days=days))
+            for i in range(count)
+        ])
+
+    def reminder(self, goal, type=Reminder.Type.DEADLINE_BASED):
+        return Reminder.objects.create(user=goal.user, goal=goal, type=type, time='09:00')
+
+    def test_flag_overdue_goals(self):
+        overdue = self.goals(self.user, 5, -1)
+        self.goals(self.user, 2, -1, status=Goal.Status.COMPLETED)
+        stale = self.goals(self.other, 1, 3, is_overdue=True)
+        self.goals(self.other, 2, 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flag_overdue_goals(self.today, chunk_size=2), {self.user.pk, self.other.pk})
+        # 5 просроченных порциями по 2 и одна снятая отметка
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "lifemanager_goal"') for query in queries), 4)
+
+        self.assertEqual(set(Goal.objects.filter(is_overdue=True)), set(overdue))
+        self.assertFalse(Goal.objects.get(pk=stale[0].pk).is_overdue)
+        # Повторный проход ничего не меняет
+        self.assertEqual(flag_overdue_goals(self.today, chunk_size=2), set())
+
+    def test_disable_finished_reminders(self):
+        completed, = self.goals(self.user, 1, 5, status=Goal.Status.COMPLETED)
+        overdue, = self.goals(self.user, 1, -2)
+        active, = self.goals(self.other, 1, 2)
+        off = [self.reminder(completed), self.reminder(overdue)]
+        on = [self.reminder(active), self.reminder(overdue, type=Reminder.Type.DAILY)]
+
+        self.assertEqual(disable_finished_reminders(self.today, chunk_size=1), {self.user.pk})
+        self.assertEqual(set(Reminder.objects.filter(is_enabled=False)), set(off))
+        self.assertEqual(set(Reminder.objects.filter(is_enabled=True)), set(on))
+
+    def test_update_in_chunks_stops_on_filter_that_keeps_rows(self):
+        self.goals(self.user, 3, 1)
+        with self.assertRaises(ValueError):
+            update_in_chunks(Goal.objects.filter(user=self.user), 2, is_pinned=True)
+        # Первая порция уже записана: транзакция порции закрылась до проверки следующей
+        self.assertEqual(Goal.objects.filter(is_pinned=True).count(), 2)
+        self.assertEqual(update_in_chunks(Goal.objects.filter(user=self.user, is_pinned=False), 2, is_pinned=True),
+                         {self.user.pk})
+        self.assertFalse(Goal.objects.filter(is_pinned=False).exists())
+
+    def test_command_refreshes_users(self):
+        self.goals(self.user, 2, -1)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(goal_counters(user)['overdue'], 0)
+
+        call_command('nightly_goals', chunk_size=1, stdout=StringIO())
+        user = User.objects.get(pk=self.user.pk)
+        self.assertGreater(user.data_changed_at, self.user.data_changed_at)
+        # Счётчики уже пересчитаны под новой версией данных
+        with self.assertNumQueries(0):
+            self.assertEqual(goal_counters(user)['overdue'], 2)
+
+
+@override_settings(TASK_ALWAYS_EAGER=False, TASK_WAKEUP_ADDRESS=None)
+class TaskQueueTests(IsolatedCacheTestCase):
+    def run_claimed(self, worker_id='test'):
+        claimed = claim(worker_id, 10)
+        for claimed_task in claimed:
+            finish(claimed_task, execute(claimed_task.name, claimed_task.args, claimed_task.kwargs))
+        return claimed
+
+    def test_enqueue_and_claim(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            queued = failing_task.enqueue(('boom',), priority=1)
+        self.assertEqual(len(callbacks), 1)  # notify_workers после коммита
+        failing_task.enqueue(('low',))
+
+        first, second = claim('test', 10)
+        self.assertEqual(first.pk, queued.pk)  # выше приоритет — раньше
+        self.assertEqual((first.status, first.attempts, first.locked_by), (Task.Status.RUNNING, 1, 'test'))
+        self.assertEqual(second.args, ['low'])
+        # Взятые задачи второй раз не выдаются
+        self.assertEqual(claim('other', 10), [])
+
+    def test_success_deletes_task(self):
+        from .tasks import send_email
+        send_email.delay('Тема', 'Текст', ['to@example.com'])
+        self.assertEqual(len(self.run_claimed()), 1)
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+
+    def test_failure_retries_then_fails(self):
+        failing_task.delay('boom')
+        with self.assertLogs('lifemanager', 'WARNING'):
+            self.run_claimed()
+        retried = Task.objects.get()
+        self.assertEqual(retried.status, Task.Status.QUEUED)
+        self.assertGreater(retried.run_at, timezone.now())
+        self.assertIn('RuntimeError: boom', retried.last_error)
+        # Отложенная задача не берётся до срока
+        self.assertEqual(claim('test', 10), [])
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('lifemanager', 'ERROR'):
+            self.run_claimed()
+        failed = Task.objects.get()
+        self.assertEqual((failed.status, failed.attempts), (Task.Status.FAILED, 2))
+        self.assertEqual(claim('test', 10), [])
+
+    def test_password_reset_is_queued(self):
+        User.objects.create_user(email='reset@example.com', name='Reset', password='Pass.word1')
+        self.client.post('/password_reset/', {'email': 'reset@example.com'})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Task.objects.get().name, 'lifemanager.tasks.send_email')
+        self.run_claimed()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reset@example.com'])
+
+    @override_settings(TASK_ALWAYS_EAGER=True)
+    def test_eager_sends_immediately(self):
+        User.objects.create_user(email='reset@example.com', name='Reset', password='Pass.word1')
+        self.client.post('/password_reset/', {'email': 'reset@example.com'})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(Task.objects.exists())
+
+
+class ChartDataTests(IsolatedCacheTestCase):
+    def test_points_limit_history_size(self):
+        user = User.objects.create_user(email='chart@example.com', name='Chart', password='Pass.word1')
+        sphere = LifeSphere.objects.create(title='Здоровье')
+        today = date.today()
+        SphereAssessment.objects.bulk_create([
+            SphereAssessment(user=user, sphere=sphere, value=day % 10 + 1, date=today - timedelta(days=day))
+            for day in range(1000)
+        ])
+        self.client.force_login(user)
+
+        data = self.client.get('/api/charts/', {'resolution': 'day', 'points': 60}).json()
+        self.assertEqual(len(data['dates']), 60)
+        self.assertEqual(set(data['by_date']), set(data['dates']))
+        self.assertEqual(data['dates'][0], today.isoformat())
+        self.assertEqual(data['dates'][-1], (today - timedelta(days=999)).isoformat())
+        self.assertLessEqual(len(data['series'][0]['points']), 60)
+
+        full = self.client.get('/api/charts/', {'resolution': 'day'}).json()
+        self.assertEqual(len(full['dates']), 1000)
+
+
+class ExportStreamingTests(IsolatedCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='export@example.com', name='Export', password='Pass.word1')
+        sphere = LifeSphere.objects.create(title='Здоровье')
+        SphereAssessment.objects.bulk_create([
+            SphereAssessment(user=cls.user, sphere=sphere, value=5, date=date.today() - timedelta(days=day))
+            for day in range(1200)
+        ])
+
+    async def test_export_streams_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for headers in ({'Accept-Encoding': 'gzip'}, {}):
+            response = await self.async_client.get('/export/', headers=headers)
+            self.assertTrue(response.is_async)
+            with warnings.catch_warnings():
+                # Синхронный итератор Django собрал бы целиком с предупреждением
+                warnings.simplefilter('error')
+                chunks = [chunk async for chunk in response]
+            self.assertGreater(len(chunks), 2)
+            body = b''.join(chunks)
+            if headers:
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                body = gzip.decompress(body)
+            self.assertEqual(body.decode().count('Оценка сферы'), 1200)
+
+
+class FastJsonTests(IsolatedCacheTestCase):
+    payload = {
+        'date': date(2024, 2, 29),
+        'moment': datetime(2024, 2, 29, 13, 5, 7, 120, tzinfo=dt_timezone.utc),
+        'time': time(9, 30),
+        'id': uuid.UUID('0190b4a2-7c1e-7d3a-8f00-112233445566'),
+        'amount': decimal.Decimal('12.50'),
+        'text': 'Привет, мир — ✓',
+        'values': (1, 2.5, None, True, float('nan'), float('inf')),
+        'by_date': {date(2024, 3, 1): 4, 7: 'семь'},
+        'nested': [{'a': [decimal.Decimal('0.1')]}],
+    }
+
+    def test_backends_agree(self):
+        expected = dumps(self.payload)
+        for name, backend in BACKENDS.items():
+            with self.subTest(backend=name):
+                data = backend(self.payload)
+                self.assertEqual(data, expected)
+        self.assertEqual(json.loads(expected), {
+            'date': '2024-02-29',
+            'moment': '2024-02-29T13:05:07.000120+00:00',
+            'time': '09:30:00',
+            'id': '0190b4a2-7c1e-7d3a-8f00-112233445566',
+            'amount': '12.50',
+            'text': 'Привет, мир — ✓',
+            'values': [1, 2.5, None, True, None, None],
+            'by_date': {'2024-03-01': 4, '7': 'семь'},
+            'nested': [{'a': ['0.1']}],
+        })
+        # Не-ASCII — как есть в UTF-8, без \u-последовательностей
+        self.assertIn('Привет'.encode(), expected)
+
+    def test_backends_reject_the_same_types(self):
+        for name, backend in BACKENDS.items():
+            with self.subTest(backend=name):
+                with self.assertRaises(TypeError):
+                    backend({'value': object()})
+                with self.assertRaises(TypeError):
+                    backend({decimal.Decimal(1): 'ключ'})
+
+    def test_script_escaping(self):
+        value = {'note': '</script><script>alert(1)</script><!-- & \u2028\u2029'}
+        for name in BACKENDS:
+            with self.subTest(backend=name), override_settings(JSON_BACKEND=name):
+                data = dumps_for_script(value)
+                for char in ('<', '>', '&', '\u2028', '\u2029'):
+                    self.assertNotIn(char, data)
+                self.assertIn('\\u003C/script\\u003E', data)
+                self.assertEqual(json.loads(data), value)
+                rendered = Template('{% load json_extras %}<script>{{ value|safe_json }}</script>').render(
+                    Context({'value': value}),
+                )
+                self.assertEqual(rendered, f'<script>{data}</script>')
+
+
+class CompressionTests(IsolatedCacheTestCase):
+    page = ('<html><body><input name="csrfmiddlewaretoken" value="secret">'
+            + '<p>Запись в дневнике</p>' * 50 + '</body></html>')
+
+    def decompress(self, data, coding):
+        return brotli.decompress(data) if coding == 'br' else gzip.decompress(data)
+
+    def request(self, accept_encoding):
+        return RequestFactory().get('/', headers={'Accept-Encoding': accept_encoding})
+
+    def test_accept_encoding_q0_excludes_coding(self):
+        self.assertEqual(accepted_encodings(self.request('gzip;q=0, br')), {'br'})
+        self.assertEqual(accepted_encodings(self.request('GZIP; q=0.000 , br;q=0.5')), {'br'})
+        self.assertEqual(accepted_encodings(self.request('gzip;q=0.01')), {'gzip'})
+        self.assertEqual(accepted_encodings(self.request('')), {''})
+
+    def test_negotiation_order(self):
+        self.assertEqual(negotiate(self.request('gzip, br')), 'br' if brotli else 'gzip')
+        self.assertEqual(negotiate(self.request('gzip, br;q=0')), 'gzip')
+        self.assertIsNone(negotiate(self.request('gzip;q=0, deflate')))
+        self.assertEqual(negotiate(self.request('br, gzip'), available=('gzip',)), 'gzip')
+
+    def test_refused_encoding_leaves_response_as_is(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(self.page))
+        response = middleware(self.request('gzip;q=0'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content.decode(), self.page)
+
+    def test_compressed_response_is_padded(self):
+        codings = ('gzip', 'br') if brotli else ('gzip',)
+        for coding in codings:
+            with self.subTest(coding=coding):
+                lengths = set()
+                for _ in range(20):
+                    middleware = CompressionMiddleware(lambda request: HttpResponse(self.page, headers={'ETag': '"v1"'}))
+                    response = middleware(self.request(coding))
+                    self.assertEqual(response['Content-Encoding'], coding)
+                    self.assertEqual(response['ETag'], 'W/"v1"')
+                    self.assertEqual(self.decompress(response.content, coding).decode(), self.page)
+                    lengths.add(len(response.content))
+                # Без дополнения длина одного и того же тела была бы одинаковой
+                self.assertGreater(len(lengths), 1)
+                unpadded = len(compress_bytes(self.page.encode(), coding))
+                self.assertTrue(all(unpadded <= length < unpadded + 100 + 3 for length in lengths))
+
+    def test_streaming_response_is_compressed_per_chunk(self):
+        chunks = [f'строка {i}\n'.encode() * 20 for i in range(5)]
+        middleware = CompressionMiddleware(lambda request: StreamingHttpResponse(iter(chunks), content_type='text/csv'))
+        for coding in (('gzip', 'br') if brotli else ('gzip',)):
+            with self.subTest(coding=coding):
+                response = middleware(self.request(coding))
+                self.assertEqual(response['Content-Encoding'], coding)
+                self.assertFalse(response.has_header('Content-Length'))
+                out = list(response.streaming_content)
+                # Каждый кусок сбрасывается сразу, плюс завершение потока
+                self.assertEqual(len(out), len(chunks) + 1)
+                self.assertEqual(self.decompress(b''.join(out), coding), b''.join(chunks))
+
+    def test_async_stream_compression(self):
+        chunks = [b'{"id": 1}\n' * 30, b'{"id": 2}\n' * 30]
+
+        async def source():
+            for chunk in chunks:
+                yield chunk
+
+        async def collect():
+            return [out async for out in acompress_stream(source(), 'gzip', max_random_bytes=100)]
+
+        out = asyncio.run(collect())
+        self.assertEqual(len(out), 3)
+        self.assertEqual(gzip.decompress(b''.join(out)), b''.join(chunks))
+
+
+class StaticAssetTests(IsolatedCacheTestCase):
+    css = 'body { color: #333; }\n' * 200
+    hashed = 'css/app.0123456789ab.css'
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        storage = CompressedManifestStaticFilesStorage(location=self.root, base_url='/static/')
+        for name in (self.hashed, 'css/app.css'):
+            storage.save(name, ContentFile(self.css.encode()))
+        storage._write_variants(self.hashed)
+        override = override_settings(STATIC_ROOT=self.root)
+        override.enable()
+        self.addCleanup(override.disable)
+        hashed_names = mock.patch('lifemanager.assets._hashed_names', return_value=frozenset({self.hashed}))
+        hashed_names.start()
+        self.addCleanup(hashed_names.stop)
+
+    def get(self, path, accept_encoding='', headers=None):
+        request = RequestFactory().get(f'/static/{path}', headers={'Accept-Encoding': accept_encoding, **(headers or {})})
+        response = serve_static(request, path)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        data = b''.join(response.streaming_content)
+        coding = response.headers.get('Content-Encoding')
+        if coding == 'br':
+            return brotli.decompress(data).decode()
+        return (gzip.decompress(data) if coding == 'gzip' else data).decode()
+
+    def test_precompressed_variant_is_chosen(self):
+        cases = [('gzip, br', 'br' if brotli else 'gzip'), ('gzip', 'gzip'), ('br;q=0, gzip', 'gzip'), ('', None)]
+        for accept_encoding, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(self.hashed, accept_encoding)
+                self.assertEqual(response.headers.get('Content-Encoding'), expected)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(self.body(response), self.css)
+
+    def test_without_variant_file_is_served_as_is(self):
+        os.remove(os.path.join(self.root, self.hashed + '.gz'))
+        response = self.get(self.hashed, 'gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self.body(response), self.css)
+
+    def test_only_hashed_names_are_immutable(self):
+        self.assertEqual(self.get(self.hashed, 'gzip')['Cache-Control'], IMMUTABLE)
+        self.assertEqual(self.get('css/app.css', 'gzip')['Cache-Control'], REVALIDATE)
+        response = self.get(self.hashed, 'gzip', {'If-Modified-Since': http_date(timezone.now().timestamp() + 60)})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+
+    def test_path_outside_static_root_is_rejected(self):
+        with open(os.path.join(os.path.dirname(self.root), 'secret.txt'), 'w') as f:
+            self.addCleanup(os.remove, f.name)
+            f.write('secret')
+        for path in ('../secret.txt', 'css/../../secret.txt', f.name):
+            with self.subTest(path=path), self.assertRaises(SuspiciousFileOperation):
+                self.get(path)
+        with self.assertRaises(Http404):
+            self.get('css/missing.css')
+        # Каталог внутри STATIC_ROOT — тоже не файл статики
+        with self.assertRaises(Http404):
+            self.get('css')
+
+
+class InlinePool:
+    """Вместо ProcessPoolExecutor: пачки выполняются в этом процессе (тестовая БД в памяти
+    не видна дочерним), но аргументы проходят через pickle, как при spawn."""
+
+    instances = []
+
+    def __init__(self, processes, mp_context=None, initializer=None):
+        self.mp_context, self.initializer = mp_context, initializer
+        self.calls = []
+        self.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, *iterables):
+        for args in zip(*iterables):
+            args = pickle.loads(pickle.dumps(args))
+            self.calls.append(args)
+            yield fn(*args)
+
+
+class WeeklyReportTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        self.week = last_week_start()
+        self.week_end = self.week + timedelta(days=7)
+        self.user = User.objects.create_user(email='report@example.com', name='Report', password='Pass.word1')
+        self.other = User.objects.create_user(email='report2@example.com', name='Other', password='Pass.word1')
+        self.health, self.work, self.rest = (
+            LifeSphere.objects.create(title=title) for title in ('Здоровье', 'Работа', 'Отдых')
+        )
+
+    def at(self, day, hour=12):
+        return timezone.make_aware(datetime.combine(day, time(hour)))
+
+    def goal(self, user=None, status=Goal.Status.ACTIVE, deadline=None, title='Цель'):
+        return Goal.objects.create(user=user or self.user, sphere=self.health, title=title, status=status,
+                                   deadline=deadline or self.week_end + timedelta(days=30))
+
+    def test_aggregates(self):
+        prev = self.week - timedelta(days=7)
+        SphereAssessment.objects.bulk_create([
+            SphereAssessment(user=self.user, sphere=self.health, value=4, date=prev),
+            SphereAssessment(user=self.user, sphere=self.health, value=6, date=prev + timedelta(days=1)),
+            SphereAssessment(user=self.user, sphere=self.health, value=7, date=self.week),
+            SphereAssessment(user=self.user, sphere=self.health, value=8, date=self.week + timedelta(days=6)),
+            SphereAssessment(user=self.user, sphere=self.health, value=1, date=self.week_end),
+            SphereAssessment(user=self.user, sphere=self.work, value=3, date=prev),
+            SphereAssessment(user=self.user, sphere=self.rest, value=9, date=self.week + timedelta(days=2)),
+        ])
+        for _ in range(3):
+            self.goal(status=Goal.Status.COMPLETED)
+        WeeklyReport.objects.create(user=self.user, week_start=prev, goals_completed_total=1)
+        self.goal(user=self.other, status=Goal.Status.COMPLETED)
+
+        goal = self.goal()
+        GoalStep.objects.bulk_create([
+            GoalStep(goal=goal, title='в неделе', is_completed=True, completed_at=self.at(self.week, 0)),
+            GoalStep(goal=goal, title='до недели', is_completed=True, completed_at=self.at(prev + timedelta(days=6), 23)),
+            GoalStep(goal=goal, title='после', is_completed=True, completed_at=self.at(self.week_end, 0)),
+            GoalStep(goal=goal, title='не выполнен', completed_at=self.at(self.week)),
+        ])
+        for day in (1, 1, 3, 7):
+            entry = DiaryEntry.objects.create(user=self.user, text='Запись')
+            DiaryEntry.objects.filter(pk=entry.pk).update(created_at=self.at(self.week + timedelta(days=day)))
+
+        due = [self.goal(deadline=self.week_end + timedelta(days=day % 7), title=f'Скоро {day}') for day in range(6, 0, -1)]
+        self.goal(deadline=self.week_end + timedelta(days=7), title='Позже')
+        self.goal(status=Goal.Status.COMPLETED, deadline=self.week_end, title='Выполнена')
+
+        with self.assertNumQueries(6):
+            reports = {report.user_id: report for report in build_reports([self.user.pk, self.other.pk], self.week)}
+
+        report = reports[self.user.pk]
+        self.assertEqual(sorted(report.spheres), sorted([[self.health.pk, 7.5, 5.0], [self.rest.pk, 9.0, None]]))
+        # Три выполненные цели выше и выполненная с дедлайном на следующей неделе
+        self.assertEqual(report.goals_completed_total, 4)
+        self.assertEqual(report.goals_completed, 3)
+        self.assertEqual(report.steps_completed, 1)
+        self.assertEqual((report.diary_entries, report.diary_days), (3, 2))
+        expected_due = sorted(due, key=lambda goal: goal.deadline)[:5]
+        self.assertEqual(report.due_soon, [[goal.pk, goal.title, goal.deadline] for goal in expected_due])
+
+        # Без прошлого отчёта прирост за неделю неизвестен
+        other = reports[self.other.pk]
+        self.assertEqual((other.goals_completed_total, other.goals_completed), (1, None))
+        self.assertEqual((other.spheres, other.due_soon, other.steps_completed, other.diary_entries), ([], [], 0, 0))
+
+    def test_regeneration_updates_report_in_place(self):
+        self.goal(status=Goal.Status.COMPLETED)
+        self.assertEqual(generate_reports(self.week, processes=1), 2)
+        first = WeeklyReport.objects.get(user=self.user, week_start=self.week)
+        stamp = User.objects.get(pk=self.user.pk).data_changed_at
+
+        self.goal(status=Goal.Status.COMPLETED)
+        generate_reports(self.week, processes=1)
+        report = WeeklyReport.objects.get(user=self.user, week_start=self.week)
+        self.assertEqual(report.pk, first.pk)
+        self.assertEqual(report.goals_completed_total, 2)
+        self.assertEqual(WeeklyReport.objects.filter(week_start=self.week).count(), 2)
+        # Новая версия данных сбрасывает ETag страницы отчёта
+        self.assertGreater(User.objects.get(pk=self.user.pk).data_changed_at, stamp)
+
+    def test_batches_go_through_process_pool(self):
+        inactive = User.objects.create_user(email='inactive@example.com', name='Off', password='Pass.word1')
+        User.objects.filter(pk=inactive.pk).update(is_active=False)
+        done = []
+        InlinePool.instances.clear()
+        with mock.patch('lifemanager.reports.ProcessPoolExecutor', InlinePool):
+            self.assertEqual(generate_reports(self.week, processes=2, batch_size=1, progress=done.append), 2)
+
+        pool, = InlinePool.instances
+        self.assertEqual(pool.mp_context.get_start_method(), 'spawn')
+        self.assertIs(pool.initializer, django.setup)
+        self.assertEqual(
+            sorted(user_ids for alias, user_ids, week in pool.calls), sorted([[self.user.pk], [self.other.pk]]),
+        )
+        self.assertEqual(done, [1, 2])
+        self.assertEqual(WeeklyReport.objects.filter(week_start=self.week).count(), 2)
+
+    def test_only_last_finished_week(self):
+        for week in (self.week - timedelta(days=7), self.week_end):
+            with self.assertRaises(ValueError):
+                generate_reports(week, processes=1)
+            with self.assertRaises(CommandError):
+                call_command('weekly_reports', week=week.isoformat(), processes=1, stdout=StringIO())
+        self.assertFalse(WeeklyReport.objects.exists())
+
+
+class UuidSevenTests(IsolatedCacheTestCase):
+    ms = 1_718_000_000_123
+
+    def setUp(self):
+        super().setUp()
+        # Состояние генератора — своё в каждом тесте
+        self.enterContext(mock.patch.object(ids, '_last_ms', 0))
+        self.enterContext(mock.patch.object(ids, '_counter', 0))
+
+    def at_ms(self, ms):
+        return mock.patch('lifemanager.ids.time.time_ns', return_value=ms * 1_000_000 + 456)
+
+    def test_version_and_variant(self):
+        for key in (ids.uuid7(), ids.uuid7(self.ms)):
+            self.assertEqual(key.version, 7)
+            self.assertEqual(key.variant, uuid.RFC_4122)
+        self.assertEqual(ids.uuid7(self.ms).int >> 80, self.ms)
+
+    def test_monotonic_within_millisecond(self):
+        with self.at_ms(self.ms):
+            keys = [ids.uuid7() for _ in range(500)]
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertEqual({key.int >> 80 for key in keys}, {self.ms})
+        # Счётчик стартует в младшей половине, чтобы было куда расти
+        self.assertLess((keys[0].int >> 64) & 0xFFF, 0x800)
+
+    def test_counter_overflow_borrows_next_millisecond(self):
+        with self.at_ms(self.ms):
+            first = ids.uuid7()
+            ids._counter = ids._COUNTER_MAX
+            overflow = ids.uuid7()
+        self.assertGreater(overflow, first)
+        self.assertEqual(overflow.int >> 80, self.ms + 1)
+        self.assertEqual((overflow.int >> 64) & 0xFFF, 0)
+
+        # Часы пошли назад — ключи всё равно растут
+        with self.at_ms(self.ms - 5):
+            self.assertGreater(ids.uuid7(), overflow)
+
+    def test_uuid7_at_bounds(self):
+        moment = datetime(2038, 1, 19, 3, 15, 45, 792000, tzinfo=dt_timezone.utc)
+        ms = (moment - datetime(1970, 1, 1, tzinfo=dt_timezone.utc)) // timedelta(milliseconds=1)
+        lower, upper = ids.uuid7_at(moment), ids.uuid7_at(moment + timedelta(milliseconds=1))
+        self.assertEqual(lower.int >> 80, ms)
+        for _ in range(20):
+            self.assertTrue(lower <= ids.uuid7(ms) < upper)
+        self.assertLess(ids.uuid7(ms - 1), lower)
+        self.assertEqual(lower.version, 7)
+
+        # Тот же момент в другом поясе — та же граница; наивный момент неоднозначен
+        moscow = dt_timezone(timedelta(hours=3))
+        self.assertEqual(ids.uuid7_at(moment.astimezone(moscow)), lower)
+        with self.assertRaises(ValueError):
+            ids.uuid7_at(moment.replace(tzinfo=None))
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.lines = []
+        self.threads = []
+
+    def emit(self, record):
+        self.threads.append(threading.current_thread())
+        self.lines.append(self.format(record))
+
+
+class BackgroundLoggingTests(IsolatedCacheTestCase):
+    def logger(self, name, handler):
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.propagate = False
+        self.addCleanup(logger.removeHandler, handler)
+        return logger
+
+    def test_records_are_formatted_in_listener_thread(self):
+        formatted_in = []
+
+        class Probe:
+            def __str__(self):
+                formatted_in.append(threading.current_thread())
+                return 'проба'
+
+        target = CaptureHandler()
+        handler = BackgroundQueueHandler(handlers=['capture'])
+        handler.connect({'capture': target})
+        logger = self.logger('lifemanager.tests.queue', handler)
+        logger.info("значение %s", Probe())
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("ошибка")
+        # Запрос только положил записи в очередь
+        self.assertEqual(formatted_in, [])
+        handler.close()
+
+        self.assertEqual(target.lines[0], 'значение проба')
+        self.assertTrue(target.lines[1].startswith('ошибка\nTraceback'))
+        self.assertIn('ZeroDivisionError', target.lines[1])
+        self.assertEqual(len(formatted_in), 1)
+        self.assertIsNot(formatted_in[0], threading.current_thread())
+        self.assertEqual(set(target.threads), set(formatted_in))
+
+    def test_queue_is_wired_regardless_of_handler_order(self):
+        self.addCleanup(configure_logging, settings.LOGGING)
+        configure_logging({
+            'version': 1,
+            'disable_existing_loggers': False,
+            'handlers': {
+                # Очередь создаётся раньше своего обработчика (dictConfig идёт по алфавиту)
+                'a_queue': {'()': BackgroundQueueHandler, 'handlers': ['z_capture']},
+                'z_capture': {'()': CaptureHandler},
+            },
+            'loggers': {'lifemanager.tests.wiring': {'handlers': ['a_queue'], 'level': 'INFO', 'propagate': False}},
+        })
+        queue_handler, = logging.getLogger('lifemanager.tests.wiring').handlers
+        target, = queue_handler.targets
+        logging.getLogger('lifemanager.tests.wiring').info("запись")
+        queue_handler.close()
+        self.assertEqual(target.lines, ['запись'])
+
+        with self.assertRaises(ValueError):
+            BackgroundQueueHandler(handlers=['missing']).connect({})
+
+    def test_access_log_stays_off_console(self):
+        console, = [handler for handler in logging.getLogger().handlers if handler.name == 'console']
+        queue_handler, = logging.getLogger('lifemanager').handlers
+        file_app, = [handler for handler in queue_handler.targets if handler.name == 'file_app']
+
+        access = logging.makeLogRecord({'name': 'lifemanager.request', 'levelno': logging.INFO, 'msg': 'GET / 200'})
+        app = logging.makeLogRecord({'name': 'lifemanager', 'levelno': logging.INFO, 'msg': 'Цель создана'})
+        self.assertFalse(console.filter(access))
+        self.assertTrue(console.filter(app))
+        self.assertTrue(file_app.filter(access))
+        self.assertIn(console, queue_handler.targets)
+
+
+class SharedCacheCheckTests(IsolatedCacheTestCase):
+    def test_process_local_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['lifemanager.W001'])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class SphereRegistryTests(IsolatedCacheTestCase):
+    def test_version_is_read_once_per_request(self):
+        sphere = LifeSphere.objects.create(title='Здоровье')
+        token = sphere_registry.begin_request()
+        try:
+            version = sphere_registry.version
+            # Смена версии другим процессом видна только следующему запросу
+            cache.set(VERSION_CACHE_KEY, 'other')
+            self.assertEqual(sphere_registry.version, version)
+            self.assertEqual(sphere_registry.get(sphere.id), sphere)
+            # Изменение сфер в этом же запросе видно сразу
+            LifeSphere.objects.create(title='Карьера')
+            self.assertNotIn(sphere_registry.version, (version, 'other'))
+            self.assertEqual(sphere_registry.titles(), ['Здоровье', 'Карьера'])
+        finally:
+            sphere_registry.end_request(token)
+        cache.set(VERSION_CACHE_KEY, 'other')
+        self.assertEqual(sphere_registry.version, 'other')
+
+    def test_middleware_reads_version_once(self):
+        user = User.objects.create_user(email='spheres@example.com', name='Spheres', password=None)
+        LifeSphere.objects.bulk_create([LifeSphere(title=f'Сфера {i}') for i in range(8)])
+        self.client.force_login(user)
+        default_cache = caches['default']
+        with mock.patch.object(default_cache, 'get', wraps=default_cache.get) as get:
+            self.assertEqual(self.client.get('/spheres/').status_code, 200)
+        reads = [call for call in get.call_args_list if call.args[0] == VERSION_CACHE_KEY]
+        self.assertEqual(len(reads), 1)
+
+
+class CommandIdentifierTests(IsolatedCacheTestCase):
+    def test_invalid_identifiers_are_reported(self):
+        with self.assertRaisesMessage(CommandError, 'typo, 123'):
+            call_command('purge_accounts', 'typo', '123')
+        with self.assertRaisesMessage(CommandError, "Пользователи не найдены"):
+            call_command('purge_accounts', 'nobody@example.com', '6f2d5b1e-0000-4000-8000-000000000000')
+
+
+SHARDS = ['test_shard1', 'test_shard2', 'test_shard3']
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTests(IsolatedCacheTestCase):
+    router = PrimaryReplicaRouter()
+
+    def pinning(self, writes=False):
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(Goal))
+            if writes:
+                self.assertEqual(self.router.db_for_write(Goal), DEFAULT_DB_ALIAS)
+                reads.append(self.router.db_for_read(Goal))
+            return HttpResponse()
+
+        return ReplicaPinningMiddleware(view), reads
+
+    def test_reads_outside_request_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Goal), DEFAULT_DB_ALIAS)
+        self.assertIsNone(self.router.db_for_read(Session))
+        self.assertFalse(self.router.allow_migrate('replica1', 'lifemanager'))
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'lifemanager'))
+
+    def test_reads_go_to_replica_until_write(self):
+        middleware, reads = self.pinning(writes=True)
+        response = middleware(RequestFactory().post('/'))
+        # До записи — реплика, после записи в том же запросе — основная БД
+        self.assertIn(reads[0], ('replica1', 'replica2'))
+        self.assertEqual(reads[1], DEFAULT_DB_ALIAS)
+
+        cookie = response.cookies[PIN_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 15)
+        self.assertTrue(cookie['httponly'])
+        self.assertEqual(cookie['samesite'], 'Lax')
+
+    def test_pin_cookie_keeps_reads_on_primary(self):
+        middleware, reads = self.pinning()
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE_NAME] = '1'
+        response = middleware(request)
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
+        # Чтение без записи cookie не продлевает
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+        response = middleware(RequestFactory().get('/'))
+        self.assertIn(reads[-1], ('replica1', 'replica2'))
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_async_request_is_pinned_after_write(self):
+        reads = []
+
+        async def view(request):
+            reads.append(self.router.db_for_read(Goal))
+            self.router.db_for_write(Goal)
+            reads.append(self.router.db_for_read(Goal))
+            return HttpResponse()
+
+        response = asyncio.run(ReplicaPinningMiddleware(view)(RequestFactory().post('/')))
+        self.assertIn(reads[0], ('replica1', 'replica2'))
+        self.assertEqual(reads[1], DEFAULT_DB_ALIAS)
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+        # Состояние запроса не утекает наружу
+        self.assertEqual(self.router.db_for_read(Goal), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_write_through_view_sets_pin_cookie(self):
+        user = User.objects.create_user(email='pin@example.com', name='Pin', password=None)
+        reminder = Reminder.objects.create(user=user, type=Reminder.Type.DAILY, time='09:00')
+        self.client.force_login(user)
+        response = self.client.post(reverse('toggle_reminder', args=[reminder.id]), {'current': '1'},
+                                    headers={'X-Requested-With': 'XMLHttpRequest'})
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+        self.assertNotIn(PIN_COOKIE_NAME, self.client.get(reverse('note_list')).cookies)
+
+
+class ShardingTests(IsolatedCacheTestCase):
+    """Шарды — временные файлы SQLite, подключаемые к тестам на время класса."""
+
+    @classmethod
+    def setUpClass(cls):
+        # databases задаётся здесь: раннер проверяет алиасы ещё до setUpClass
+        cls.databases = {DEFAULT_DB_ALIAS, *SHARDS}
+        cls.shard_dir = tempfile.TemporaryDirectory()
+        for alias in SHARDS:
+            connections.settings[alias] = {
+                **connections.settings[DEFAULT_DB_ALIAS],
+                'NAME': os.path.join(cls.shard_dir.name, f'{alias}.sqlite3'),
+            }
+            with override_settings(DATABASE_SHARDS=SHARDS):
+                call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.shard_dir.cleanup()
+
+    def create_user_data(self, count):
+        sphere = LifeSphere.objects.create(title='Здоровье')
+        users = []
+        with use_shard(DEFAULT_DB_ALIAS):
+            for i in range(count):
+                user = User.objects.create_user(email=f'shard{i}@example.com', name=f'U{i}')
+                goal = Goal.objects.create(user=user, sphere=sphere, title=f'Цель {i}', deadline=date.today())
+                GoalStep.objects.create(goal=goal, title='Шаг')
+                note = Note.objects.create(user=user, title='Заметка')
+                NoteItem.objects.create(note=note, text='Пункт')
+                SphereAssessment.objects.create(user=user, sphere=sphere, value=5, date=date.today())
+                DiaryEntry.objects.create(user=user, sphere=sphere, text='Запись')
+                users.append(user)
+        return users
+
+    def assertDataOn(self, user, alias):
+        for model, lookup in ((Goal, 'user'), (GoalStep, 'goal__user'), (Note, 'user'), (NoteItem, 'note__user'),
+                              (SphereAssessment, 'user'), (DiaryEntry, 'user')):
+            self.assertEqual(model.objects.using(alias).filter(**{lookup: user.pk}).count(), 1, (model, alias))
+        for other in {DEFAULT_DB_ALIAS, *SHARDS} - {alias}:
+            self.assertFalse(Goal.objects.using(other).filter(user_id=user.pk).exists(), other)
+
+    def test_pick_shard_moves_only_to_new_shard(self):
+        ids = [uuid.UUID(int=i) for i in range(3000)]
+        before = {user_id: pick_shard(user_id, SHARDS[:2]) for user_id in ids}
+        after = {user_id: pick_shard(user_id, SHARDS) for user_id in ids}
+        moved = [user_id for user_id in ids if before[user_id] != after[user_id]]
+        self.assertEqual({after[user_id] for user_id in moved}, {SHARDS[2]})
+        self.assertAlmostEqual(len(moved) / len(ids), 1 / 3, delta=0.05)
+
+    def test_rebalance_moves_data_and_routes_requests(self):
+        users = self.create_user_data(12)
+        with override_settings(DATABASE_SHARDS=SHARDS[:2]):
+            call_command('rebalance_shards', stdout=open(os.devnull, 'w'))
+            placed = {}
+            for user in users:
+                user.refresh_from_db()
+                self.assertEqual(user.shard, pick_shard(user.pk, SHARDS[:2]))
+                self.assertDataOn(user, user.shard)
+                placed[user.pk] = user.shard
+
+            # Запрос пользователя читает его шард через UserShardMiddleware
+            self.client.force_login(users[0])
+            self.assertContains(self.client.get('/goals/'), 'Цель 0')
+
+        # Третий шард: переезжают только те, кому rendezvous назначил новый шард
+        with override_settings(DATABASE_SHARDS=SHARDS):
+            call_command('rebalance_shards', stdout=open(os.devnull, 'w'))
+            for user in users:
+                user.refresh_from_db()
+                self.assertIn(user.shard, (placed[user.pk], SHARDS[2]))
+                self.assertEqual(user.shard, pick_shard(user.pk, SHARDS))
+                self.assertDataOn(user, user.shard)
+                self.assertEqual(user.goal_set.count(), 1)
+
+    @override_settings(DATABASE_SHARDS=SHARDS)
+    def test_router(self):
+        router = UserShardRouter()
+        user = User(shard=SHARDS[1])
+        self.assertEqual(router.db_for_read(Goal, instance=user), SHARDS[1])
+        self.assertIsNone(router.db_for_read(LifeSphere))
+        with self.assertRaises(ShardNotSelected):
+            router.db_for_read(Goal)
+        with use_shard(SHARDS[2]):
+            self.assertEqual(router.db_for_write(GoalStep), SHARDS[2])
+        self.assertTrue(router.allow_migrate(SHARDS[0], 'lifemanager'))
+        self.assertFalse(router.allow_migrate(SHARDS[0], 'sessions'))
+
+
+class ThrottleTests(IsolatedCacheTestCase):
+    ip = '10.0.0.1'
+
+    def test_sliding_window(self):
+        start = 3000.0  # начало окна при period = 300
+        self.assertEqual([take_token('test', 3, 300, start + i) for i in range(3)], [0, 0, 0])
+        # Окно заполнено: ждать до его конца и ещё, пока вес трёх попыток не станет 2
+        self.assertAlmostEqual(take_token('test', 3, 300, start + 100), 300)
+        # Отклонённая попытка не учитывается: через 150 с следующего окна вес прошлого 1.5
+        self.assertEqual(take_token('test', 3, 300, start + 450), 0)
+        self.assertAlmostEqual(take_token('test', 3, 300, start + 450), 50)
+        self.assertEqual(take_token('test', 3, 300, start + 500), 0)
+
+    def test_concurrent_attempts(self):
+        request = RequestFactory().post('/login/', REMOTE_ADDR=self.ip)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            file_cache = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+            }}
+            for backend in (TEST_CACHES, file_cache):
+                with self.subTest(backend=backend['default']['BACKEND']), override_settings(CACHES=backend):
+                    caches['default'].clear()
+                    barrier = threading.Barrier(20)
+
+                    def attempt(_):
+                        barrier.wait()
+                        return check_throttle(request, 'login', 'victim@example.com')
+
+                    with ThreadPoolExecutor(max_workers=20) as pool:
+                        results = list(pool.map(attempt, range(20)))
+                    # Лимит по email — 5 попыток, сколько бы их ни пришло одновременно
+                    self.assertEqual(results.count(0), 5)
+
+    def test_login_is_limited_per_email(self):
+        email = 'throttle@example.com'
+        User.objects.create_user(email=email, name='Throttle', password='Pass.word1')
+        for _ in range(5):
+            response = self.client.post('/login/', {'email': email, 'password': 'wrong'}, REMOTE_ADDR=self.ip)
+            self.assertEqual(response.status_code, 200)
+        # Шестая попытка отклоняется до проверки пароля — даже верного
+        response = self.client.post('/login/', {'email': email, 'password': 'Pass.word1'}, REMOTE_ADDR=self.ip)
+        self.assertEqual(response.status_code, 429)
+        # Конец окна (не больше 300 с) и ещё 300 * (1 - 4/5), пока вес пяти попыток не станет 4
+        self.assertTrue(60 < int(response['Retry-After']) <= 360)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+        # Ведро другого email не тронуто
+        other = 'other@example.com'
+        User.objects.create_user(email=other, name='Other', password='Pass.word1')
+        response = self.client.post('/login/', {'email': other, 'password': 'Pass.word1'}, REMOTE_ADDR=self.ip)
+        self.assertEqual(response.status_code, 302)
+
+    def test_register_is_limited_per_ip(self):
+        for _ in range(5):
+            self.assertEqual(self.client.post('/register/', {}, REMOTE_ADDR=self.ip).status_code, 200)
+        self.assertEqual(self.client.post('/register/', {}, REMOTE_ADDR=self.ip).status_code, 429)
+        other_ip = '10.0.0.2'
+        self.assertEqual(self.client.post('/register/', {}, REMOTE_ADDR=other_ip).status_code, 200)
+
+
+class PurgeTests(IsolatedCacheTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.sphere = LifeSphere.objects.create(title='Здоровье')
+
+    def create_account(self, email, size):
+        user = User.objects.create_user(email=email, name='Purge')
+        today = date.today()
+        for i in range(size):
+            goal = Goal.objects.create(user=user, sphere=self.sphere, title=f'Цель {i}', deadline=today)
+            GoalStep.objects.bulk_create([GoalStep(goal=goal, title=f'Шаг {n}') for n in range(2)])
+            note = Note.objects.create(user=user, title=f'Заметка {i}')
+            NoteItem.objects.create(note=note, text='Пункт')
+            SphereAssessment.objects.create(user=user, sphere=self.sphere, value=5, date=today - timedelta(days=i))
+            Reminder.objects.create(user=user, type=Reminder.Type.DAILY, time='09:00')
+            WeeklyReport.objects.create(user=user, week_start=today - timedelta(weeks=i))
+        entry = DiaryEntry.objects.create(user=user, text='С фото', media_file=SimpleUploadedFile('photo.jpg', b'jpeg'))
+        return user, entry.media_file.path
+
+    def test_purge_removes_account_in_batches(self):
+        user, photo = self.create_account('purge@example.com', 7)
+        other, other_photo = self.create_account('keep@example.com', 2)
+        progress = []
+
+        counts = purge_user(user, batch_size=3, progress=lambda model, deleted: progress.append((model, deleted)))
+
+        self.assertEqual(counts['Goal'], 7)
+        self.assertEqual(counts['GoalStep'], 14)
+        self.assertEqual(counts['DiaryEntry'], 1)
+        # 14 шагов по 3 строки — пять пакетов
+        self.assertEqual([deleted for model, deleted in progress if model is GoalStep], [3, 6, 9, 12, 14])
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        for model, lookup in ((Goal, 'user'), (GoalStep, 'goal__user'), (Note, 'user'), (NoteItem, 'note__user'),
+                              (SphereAssessment, 'user'), (Reminder, 'user'), (WeeklyReport, 'user'),
+                              (DiaryEntry, 'user')):
+            self.assertFalse(model.objects.filter(**{lookup: user.pk}).exists(), model)
+        self.assertFalse(os.path.exists(photo))
+
+        # Чужой аккаунт не затронут
+        self.assertEqual(GoalStep.objects.filter(goal__user=other).count(), 4)
+        self.assertTrue(os.path.exists(other_photo))
+
+    def test_command_purges_by_email_and_id(self):
+        first, _ = self.create_account('first@example.com', 1)
+        second, _ = self.create_account('second@example.com', 1)
+        call_command('purge_accounts', 'first@example.com', str(second.pk), stdout=open(os.devnull, 'w'))
+        self.assertFalse(User.objects.filter(pk__in=[first.pk, second.pk]).exists())
+        self.assertFalse(Goal.objects.exists())
+
+
+class ApiStateTests(IsolatedCacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='api@example.com', name='Api')
+        cls.sphere = LifeSphere.objects.create(title='Здоровье')
+        cls.pinned = cls.add_goal('Закреплённая', days=30, steps=(True, False), is_pinned=True)
+        cls.add_goal('Ближайшая', days=1, steps=(True,))
+        cls.add_goal('Дальняя', days=10)
+        cls.add_goal('Выполненная', days=5, status=Goal.Status.COMPLETED)
+        SphereAssessment.objects.create(user=cls.user, sphere=cls.sphere, value=7, date=date.today())
+        Reminder.objects.create(user=cls.user, type=Reminder.Type.DAILY, time='09:00', goal=cls.pinned)
+        note = Note.objects.create(user=cls.user, title='Покупки')
+        NoteItem.objects.create(note=note, text='Хлеб')
+
+        other = User.objects.create_user(email='api-other@example.com', name='Other')
+        Goal.objects.create(user=other, sphere=cls.sphere, title='Чужая', deadline=date.today())
+
+    @classmethod
+    def add_goal(cls, title, days, steps=(), **fields):
+        goal = Goal.objects.create(
+            user=cls.user, sphere=cls.sphere, title=title, deadline=date.today() + timedelta(days=days), **fields,
+        )
+        GoalStep.objects.bulk_create([GoalStep(goal=goal, title='Шаг', is_completed=done) for done in steps])
+        return goal
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/state/').status_code, 302)
+
+    def test_default_state(self):
+        data = self.client.get('/api/state/').json()
+        self.assertEqual(set(data), {'assessments', 'charts', 'goals', 'reminders', 'diary', 'notes'})
+        self.assertEqual(
+            [(g['title'], g['steps_total'], g['steps_completed'], g['sphere']) for g in data['goals']],
+            [('Закреплённая', 2, 1, 'Здоровье'), ('Ближайшая', 1, 1, 'Здоровье'), ('Дальняя', 0, 0, 'Здоровье')],
+        )
+        self.assertEqual(data['assessments'], [{'sphere': 'Здоровье', 'date': date.today().isoformat(), 'value': 7}])
+        self.assertEqual(data['reminders'][0]['goal'], {'id': str(self.pinned.id), 'title': 'Закреплённая'})
+        self.assertEqual(data['notes'][0]['items'][0]['text'], 'Хлеб')
+        self.assertEqual(data['diary'], [])
+
+    def test_fields_and_limit(self):
+        data = self.client.get('/api/state/', {
+            'include': 'goals', 'fields[goals]': 'id,title', 'limit[goals]': '2',
+        }).json()
+        self.assertEqual(list(data), ['goals'])
+        self.assertEqual(data['goals'], [
+            {'id': str(self.pinned.id), 'title': 'Закреплённая'},
+            {'id': data['goals'][1]['id'], 'title': 'Ближайшая'},
+        ])
+
+    def test_bad_query(self):
+        for params in ({'include': 'goals,secrets'}, {'fields[goals]': 'title,password'}, {'limit[notes]': 'all'}):
+            response = self.client.get('/api/state/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json()['status'], 'error')
+
+    def test_query_count_does_not_grow_with_data(self):
+        query = parse_query({})
+
+        def count_queries():
+            build_state(self.user, query)  # прогрев кэша рядов оценок и справочника сфер
+            with CaptureQueriesContext(connection) as queries:
+                build_state(self.user, query)
+            return len(queries)
+
+        before = count_queries()
+        for i in range(10):
+            self.add_goal(f'Новая {i}', days=i, steps=(True, False))
+            note = Note.objects.create(user=self.user, title=f'Заметка {i}')
+            NoteItem.objects.create(note=note, text='Пункт')
+            DiaryEntry.objects.create(user=self.user, text='Запись', goal=self.pinned)
+        self.assertEqual(count_queries(), before)
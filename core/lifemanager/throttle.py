@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только между потоками процесса
+    fcntl = None
+
+_thread_lock = threading.Lock()
+
+
+def _bucket_key(scope, kind, value):
+    # email в ключе кэша хэшируем: memcached не принимает пробелы и длинные ключи
+    digest = hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
+    return f'lifemanager:throttle:{scope}:{kind}:{digest}'
+
+
+@contextmanager
+def _counter_lock():
+    # incr/decr атомарны в redis, memcached и locmem, а в файловом кэше сделаны
+    # через get и set — там счётчики меняются под блокировкой файла
+    backend = caches['default']
+    if not isinstance(backend, FileBasedCache):
+        yield
+        return
+    if fcntl is None:
+        with _thread_lock:
+            yield
+        return
+    os.makedirs(backend._dir, exist_ok=True)
+    with open(os.path.join(backend._dir, 'throttle.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def take_token(key, capacity, period, now=None):
+    """Учитывает попытку в скользящем окне: не больше capacity попыток за period секунд.
+
+    Окно приближается двумя фиксированными: счётчиком текущего окна и счётчиком
+    предыдущего, вес которого убывает по мере хода текущего. Счётчик меняется
+    атомарными add/incr кэша, поэтому одновременные попытки не проходят сверх
+    лимита; отклонённая попытка не учитывается.
+    Возвращает 0, если попытка разрешена, иначе — секунды до следующей разрешённой.
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    current_key = f'{key}:{int(window)}'
+    # Счётчик нужен и в следующем окне, как предыдущий
+    timeout = 2 * period
+    with _counter_lock():
+        cache.add(current_key, 0, timeout)
+        count = cache.incr(current_key)
+        previous = cache.get(f'{key}:{int(window) - 1}', 0)
+        weight = 1 - elapsed / period
+        if previous * weight + count <= capacity:
+            return 0
+        count = cache.decr(current_key)
+
+    # Следующая попытка пройдёт, когда вес предыдущего окна упадёт достаточно:
+    # в этом окне, если в нём ещё есть место, иначе уже в следующем
+    if count < capacity:
+        return period * (1 - (capacity - count - 1) / previous) - elapsed
+    return period - elapsed + period * (1 - (capacity - 1) / count)
+
+
+def check_throttle(request, scope, email=None):
+    """Учитывает попытку во всех счётчиках scope из settings.THROTTLE_RATES (по email и по IP).
+
+    Возвращает, через сколько секунд можно повторить; 0 — попытка разрешена.
+    """
+    identities = {
+        'email': (email or '').strip().lower(),
+        'ip': request.META.get('REMOTE_ADDR', ''),
+    }
+    retry_after = 0
+    for kind, (capacity, period) in getattr(settings, 'THROTTLE_RATES', {}).get(scope, {}).items():
+        if identities.get(kind):
+            retry_after = max(retry_after, take_token(_bucket_key(scope, kind, identities[kind]), capacity, period))
+    return retry_after
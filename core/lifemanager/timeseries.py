@@ -0,0 +1,146 @@
+import uuid
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+
+from .models import SphereAssessment
+from .versioning import user_data_version
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class SphereSeries:
+    """Оценки одной сферы по дням: uint8-массив от base_date, 0 — оценки нет.
+
+    Срез по датам — series[start:stop] (stop не включается) — возвращает
+    новый SphereSeries над тем же массивом без копирования.
+    """
+
+    __slots__ = ('base_date', 'values')
+
+    def __init__(self, base_date, values):
+        self.base_date = base_date
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def _offset(self, day):
+        return min(max((day - self.base_date).days, 0), len(self.values))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step is not None:
+                raise ValueError("Шаг среза не поддерживается")
+            start = 0 if key.start is None else self._offset(key.start)
+            stop = len(self.values) if key.stop is None else self._offset(key.stop)
+            return SphereSeries(self.base_date + timedelta(days=start), self.values[start:max(start, stop)])
+        offset = (key - self.base_date).days
+        if 0 <= offset < len(self.values) and self.values[offset]:
+            return int(self.values[offset])
+        return None
+
+    def points(self):
+        """Список (дата, оценка) по возрастанию даты."""
+        return self._points(np.flatnonzero(self.values))
+
+    def latest(self, n):
+        """Последние n оценок по возрастанию даты."""
+        return self._points(np.flatnonzero(self.values)[-n:]) if n > 0 else []
+
+    def between(self, start, end):
+        """Оценки с start по end включительно."""
+        return self[start:end + timedelta(days=1)].points()
+
+    def count(self):
+        return int(np.count_nonzero(self.values))
+
+    def _points(self, offsets):
+        return [(self.base_date + timedelta(days=int(offset)), int(self.values[offset])) for offset in offsets]
+
+
+class AssessmentSeries:
+    """Все оценки пользователя: uint8-матрица день × сфера от base_date.
+
+    Десять лет ежедневных оценок восьми сфер занимают ~30 КБ против десятков
+    мегабайт в виде экземпляров SphereAssessment.
+    """
+
+    __slots__ = ('base_date', 'sphere_ids', 'matrix')
+
+    def __init__(self, base_date, sphere_ids, matrix):
+        self.base_date = base_date
+        self.sphere_ids = sphere_ids
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def sphere(self, sphere_id):
+        if sphere_id in self.sphere_ids:
+            return SphereSeries(self.base_date, self.matrix[:, self.sphere_ids.index(sphere_id)])
+        return SphereSeries(self.base_date, np.zeros(len(self.matrix), dtype=np.uint8))
+
+    def count(self, start=None):
+        """Число оценок, начиная с даты start (по умолчанию — все)."""
+        offset = 0 if start is None else max((start - self.base_date).days, 0)
+        return int(np.count_nonzero(self.matrix[offset:]))
+
+    def mean(self):
+        rated = self.matrix[self.matrix > 0]
+        return float(rated.mean()) if len(rated) else None
+
+    def as_float(self, sphere_ids, until=None):
+        """Матрица float64 для расчётов: столбцы в порядке sphere_ids, NaN — нет оценки.
+
+        until продлевает ось дат до указанного дня включительно.
+        """
+        if not len(self.matrix):
+            return np.full((0, len(sphere_ids)), np.nan)
+        days = len(self.matrix) if until is None else max(len(self.matrix), (until - self.base_date).days + 1)
+        result = np.full((days, len(sphere_ids)), np.nan)
+        for i, sphere_id in enumerate(sphere_ids):
+            if sphere_id in self.sphere_ids:
+                values = self.matrix[:, self.sphere_ids.index(sphere_id)]
+                rated = np.flatnonzero(values)
+                result[rated, i] = values[rated]
+        return result
+
+
+def build_assessment_series(user):
+    """Собирает AssessmentSeries за один проход по values_list, без экземпляров моделей."""
+    queryset = SphereAssessment.objects.filter(user=user).order_by().values_list('date', 'sphere_id', 'value')
+    # Курсором, без конвертеров ORM: ключ сферы сопоставляется по сырому
+    # значению, а в UUID превращаются только различные ключи
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    if not rows:
+        return AssessmentSeries(date.today(), [], np.zeros((0, 0), dtype=np.uint8))
+
+    columns = {}
+    column_of = np.fromiter(
+        (columns.setdefault(row[1], len(columns)) for row in rows), dtype=np.int64, count=len(rows),
+    )
+    days = np.fromiter((row[0].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[2] for row in rows), dtype=np.uint8, count=len(rows))
+
+    first = int(days.min())
+    matrix = np.zeros((int(days.max()) - first + 1, len(columns)), dtype=np.uint8)
+    matrix[days - first, column_of] = values
+    sphere_ids = [key if isinstance(key, uuid.UUID) else uuid.UUID(key) for key in columns]
+    return AssessmentSeries(date.fromordinal(first), sphere_ids, matrix)
+
+
+def assessment_series(user):
+    """AssessmentSeries пользователя, закэшированная до изменения его данных."""
+    key = f'lifemanager:series:{user.pk}:{user_data_version(user)}'
+    series = cache.get(key)
+    if series is None:
+        series = build_assessment_series(user)
+        cache.set(key, series, CACHE_TIMEOUT)
+    return series
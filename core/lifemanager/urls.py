@@ -1,9 +1,14 @@
 from django.urls import path
 from . import views
 from django.contrib.auth import views as auth_views
+from .decorators import throttle_post
+from .forms import QueuedPasswordResetForm
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
+    path('api/charts/', views.chart_data, name='chart_data'),
+    path('api/analytics/', views.analytics_data, name='analytics_data'),
+    path('api/state/', views.api_state, name='api_state'),
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
@@ -13,10 +18,13 @@ urlpatterns = [
         success_url='/profile/'
     ), name='password_change'),
 
-    path('password_reset/', auth_views.PasswordResetView.as_view(
-        template_name='registration/password_reset_form.html',
-        email_template_name='registration/password_reset_email.html',
-        success_url='/login/'
+    path('password_reset/', throttle_post('password_reset', 'registration/password_reset_form.html')(
+        auth_views.PasswordResetView.as_view(
+            template_name='registration/password_reset_form.html',
+            email_template_name='registration/password_reset_email.html',
+            form_class=QueuedPasswordResetForm,
+            success_url='/login/'
+        )
     ), name='password_reset'),
 
     path('password_reset/done/', auth_views.PasswordResetDoneView.as_view(
@@ -34,7 +42,9 @@ urlpatterns = [
 
     path('spheres/', views.sphere_list, name='sphere_list'),
     path('assessments/', views.assessment_history, name='assessment_history'),
+    path('reports/weekly/', views.weekly_report, name='weekly_report'),
     path('assess/<uuid:sphere_id>/', views.create_assessment, name='create_assessment'),
+    path('assess/', views.assess_all, name='assess_all'),
 
     path('goals/', views.goal_list, name='goal_list'),
     path('goals/create/', views.create_goal, name='create_goal'),
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import async_views
+
+# Страницы чтения под ASGI: те же адреса и имена, что в urls.py, но async-view.
+# Подключаются перед urls.py в core/urls_asgi.py
+urlpatterns = [
+    path('', async_views.dashboard, name='dashboard'),
+    path('profile/', async_views.profile, name='profile'),
+    path('assessments/', async_views.assessment_history, name='assessment_history'),
+    path('goals/', async_views.goal_list, name='goal_list'),
+    path('diary/', async_views.diary_list, name='diary_list'),
+    path('notes/', async_views.note_list, name='note_list'),
+]
@@ -0,0 +1,52 @@
+import copy
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+STAMP_KEY = 'lifemanager:auth_user_stamp:{}'
+
+# Кэш пользователей своего процесса: pk -> (User, метка, истекает)
+_users = {}
+
+
+def _ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+
+
+def get_cached_user(user_id, load):
+    """Пользователь из кэша процесса; load(user_id) загружает его из БД при промахе.
+
+    Запись действительна, пока не истёк TTL и совпадает метка пользователя в
+    общем кэше Django: forget_users() меняет метку, и копии во всех процессах
+    перестают использоваться. Возвращается копия — запрос может менять объект.
+    """
+    user_id = str(user_id)
+    key = STAMP_KEY.format(user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        # Метку заводим до загрузки: forget_users() во время загрузки её сменит
+        stamp = uuid.uuid4().hex
+        if not cache.add(key, stamp):
+            stamp = cache.get(key)
+    entry = _users.get(user_id)
+    if entry is not None and entry[1] == stamp and entry[2] > time.monotonic():
+        return copy.copy(entry[0])
+
+    user = load(user_id)
+    if user is None:
+        _users.pop(user_id, None)
+        return None
+    _users[user_id] = (user, stamp, time.monotonic() + _ttl())
+    return copy.copy(user)
+
+
+def forget_users(user_ids):
+    """Сбрасывает закэшированных пользователей во всех процессах (смена пароля, выход, изменение данных)."""
+    user_ids = [str(user_id) for user_id in user_ids]
+    keys = {STAMP_KEY.format(user_id): uuid.uuid4().hex for user_id in user_ids}
+    if keys:
+        cache.set_many(keys)
+    for user_id in user_ids:
+        _users.pop(user_id, None)
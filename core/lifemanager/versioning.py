@@ -0,0 +1,26 @@
+from django.utils import timezone
+
+from .models import User
+from .usercache import forget_users
+
+
+def touch_user_data(**lookup):
+    """Отмечает, что данные пользователя изменились.
+
+    Принимает фильтр по User: ``touch_user_data(pk=user_id)`` или
+    ``touch_user_data(goal=goal_id)`` для дочерних записей. Выполняет один
+    UPDATE и не вызывает сигналы модели. Закэшированный request.user со старой
+    версией данных сбрасывается (см. usercache.py).
+    """
+    User.objects.filter(**lookup).update(data_changed_at=timezone.now())
+    if lookup.keys() == {'pk'}:
+        forget_users([lookup['pk']])
+    elif lookup.keys() == {'pk__in'}:
+        forget_users(lookup['pk__in'])
+    else:
+        forget_users(User.objects.filter(**lookup).values_list('pk', flat=True))
+
+
+def user_data_version(user):
+    """Дешёвая версия данных пользователя — берётся из уже загруженного request.user"""
+    return user.data_changed_at.isoformat()
@@ -2,99 +2,137 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models
 from django.db.models import Q, Avg, Value
 from django.db.models.functions import Lower
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import HttpResponse
+from django.core.paginator import Paginator
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.encoding import smart_str
-from .models import User, DiaryEntry, Reminder, LifeSphere, SphereAssessment, Goal, GoalStep
+from .models import User, DiaryEntry, Reminder, SphereAssessment, Goal, GoalStep, WeeklyReport
 from datetime import date, timedelta
 from collections import defaultdict
 import csv
 import logging
 import re
 from .models import Note, NoteItem
+from .analytics import user_analytics
+from .api import ApiError, build_state, parse_query
+from .charts import RESOLUTIONS, SERIES_COLORS, bucketed_averages, chart_payload
+from .compression import aiterate
+from .db import toggle_boolean
+from .decorators import throttle_post, user_conditional
+from .goals import goal_counters
+from .spheres import sphere_registry
+from .timeseries import assessment_series
+from .versioning import touch_user_data
 import json
-from django.http import JsonResponse
+from .fastjson import JsonResponse
+from django.views.decorators.http import require_POST
 
 logger = logging.getLogger('lifemanager')
 
+# Границы параметра points у chart_data
+MIN_CHART_POINTS = 3
+MAX_CHART_POINTS = 1000
 
-@login_required
-def dashboard(request):
-    user = request.user
-
-    latest_assessments = {}
-    all_assessments_by_date = defaultdict(dict)
-    all_dates = []
-
-    assessments = SphereAssessment.objects.filter(user=user) \
-        .select_related('sphere') \
-        .order_by('-date')
-
-    for assessment in assessments:
-        date_str = assessment.date.isoformat()
-        all_assessments_by_date[date_str][assessment.sphere.title] = assessment.value
-
-        if date_str not in all_dates:
-            all_dates.append(date_str)
+# Строк, читаемых из БД за раз при потоковом экспорте CSV
+EXPORT_CHUNK_SIZE = 500
 
-    all_dates.sort(reverse=True)
 
-    if all_dates:
-        latest_date = all_dates[0]
-        latest_assessments = all_assessments_by_date[latest_date]
-    else:
-        latest_assessments = {}
-
-    all_spheres = list(LifeSphere.objects.values_list('title', flat=True))
+def upcoming_goals(user):
+    return Goal.objects.filter(user=user, status='active').select_related('sphere').order_by('deadline')[:5]
 
-    normalized_assessments_by_date = {}
-    for date_str, data in all_assessments_by_date.items():
-        normalized_data = {}
-        for sphere in all_spheres:
-            normalized_data[sphere] = data.get(sphere, 0)
-        normalized_assessments_by_date[date_str] = normalized_data
 
+def recent_chart_series(series):
+    """Последние 10 оценок каждой сферы для графика на главной странице."""
     recent_data = defaultdict(list)
-    for sphere in LifeSphere.objects.all():
-        sphere_assessments = SphereAssessment.objects.filter(
-            user=user,
-            sphere=sphere
-        ).order_by('-date')[:10]
-
-        for a in reversed(sphere_assessments):
+    for sphere in sphere_registry.all():
+        for day, value in series.sphere(sphere.id).latest(10):
             recent_data[sphere.title].append({
-                'date': a.date.strftime('%d.%m'),
-                'value': a.value
+                'date': day.strftime('%d.%m'),
+                'value': value
             })
 
     chart_series = []
-    colors = ['#e74c3c', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#3498db', '#e67e22', '#34495e']
     for i, (sphere_name, points) in enumerate(recent_data.items()):
         if points:
             chart_series.append({
                 'label': sphere_name,
                 'data': [p['value'] for p in points],
                 'dates': [p['date'] for p in points],
-                'color': colors[i % len(colors)]
+                'color': SERIES_COLORS[i % len(SERIES_COLORS)]
             })
+    return chart_series
 
-    active_goals = Goal.objects.filter(user=user, status='active').order_by('deadline')[:5]
 
+def parse_chart_params(params):
+    """resolution и points для chart_data; ValueError с текстом ошибки для ответа 400."""
+    resolution = params.get('resolution', 'day')
+    if resolution not in RESOLUTIONS:
+        raise ValueError("resolution: day, week или month")
+    try:
+        max_points = int(params['points']) if params.get('points') else None
+    except ValueError:
+        raise ValueError("points должно быть числом")
+    if max_points is not None:
+        max_points = min(max(max_points, MIN_CHART_POINTS), MAX_CHART_POINTS)
+    return resolution, max_points
+
+
+@login_required
+@user_conditional
+def dashboard(request):
+    # История оценок для колеса жизни загружается страницей отдельно (chart_data),
+    # поэтому размер HTML не растёт с возрастом аккаунта
+    user = request.user
     return render(request, 'dashboard.html', {
-        'latest_assessments': latest_assessments,
-        'all_assessments_by_date': normalized_assessments_by_date,
-        'all_dates': all_dates,
-        'all_spheres': all_spheres,
-        'chart_series': chart_series,
-        'active_goals': active_goals,
-        'has_history': len(all_dates) > 1,
+        'chart_series': recent_chart_series(assessment_series(user)),
+        'active_goals': upcoming_goals(user),
     })
 
 
+@login_required
+@user_conditional
+def chart_data(request):
+    """История оценок для графиков главной страницы.
+
+    GET-параметры: resolution — day, week или month (средние по периоду);
+    points — максимум точек в каждом ряду series (прореживание LTTB) и периодов
+    в dates/by_date; без points отдаётся вся история.
+    """
+    try:
+        resolution, max_points = parse_chart_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'error': str(e)}, status=400)
+    rows = bucketed_averages(SphereAssessment.objects.filter(user=request.user), resolution)
+    return JsonResponse(chart_payload(list(rows), sphere_registry.all(), resolution, max_points))
+
+
+@login_required
+@user_conditional
+def analytics_data(request):
+    """Тренды, серии, корреляции и индекс баланса по оценкам пользователя."""
+    return JsonResponse(user_analytics(request.user))
+
+
+@login_required
+@user_conditional
+def api_state(request):
+    """Несколько ресурсов пользователя одним запросом.
+
+    GET-параметры: include — ресурсы через запятую (assessments, charts, goals,
+    reminders, diary, notes; по умолчанию все), fields[ресурс] — нужные поля,
+    limit[ресурс] — число записей. Число запросов к БД не зависит от набора.
+    """
+    try:
+        query = parse_query(request.GET)
+    except ApiError as e:
+        return JsonResponse({'status': 'error', 'error': str(e)}, status=400)
+    return JsonResponse(build_state(request.user, query))
+
+
 def validate_password(password):
     errors = []
     if len(password) < 8:
@@ -110,6 +148,7 @@ def validate_password(password):
     return errors
 
 
+@throttle_post('register', 'registration/register.html')
 def register(request):
     if request.method == 'POST':
         email = request.POST.get('email')
@@ -137,7 +176,7 @@ def register(request):
                 field_errors['password_confirm'] = "Пароли не совпадают"
 
         if field_errors:
-            logger.warning(f"Ошибки регистрации: {field_errors}")
+            logger.warning("Ошибки регистрации: %s", field_errors)
             return render(request, 'registration/register.html', {
                 'field_errors': field_errors,
                 'email': email,
@@ -146,11 +185,12 @@ def register(request):
         else:
             try:
                 user = User.objects.create_user(email=email, name=name, password=password)
-                login(request, user)
-                logger.info(f"Успешная регистрация: {email} (ID: {user.id})")
+                # Пользователь не прошёл через authenticate(), а бэкендов два — указываем явно
+                login(request, user, backend='lifemanager.backends.CachedModelBackend')
+                logger.info("Успешная регистрация: %s (ID: %s)", email, user.id)
                 return redirect('dashboard')
             except Exception as e:
-                logger.error(f"Ошибка при регистрации пользователя {email}: {e}", exc_info=True)
+                logger.error("Ошибка при регистрации пользователя %s: %s", email, e, exc_info=True)
                 field_errors['non_field'] = "Произошла ошибка при регистрации"
                 return render(request, 'registration/register.html', {
                     'field_errors': field_errors,
@@ -161,6 +201,7 @@ def register(request):
     return render(request, 'registration/register.html')
 
 
+@throttle_post('login', 'registration/login.html')
 def user_login(request):
     field_errors = {}
     if request.method == 'POST':
@@ -176,11 +217,11 @@ def user_login(request):
             user = authenticate(request, username=email, password=password)
             if user is not None:
                 login(request, user)
-                logger.info(f"Успешный вход: {email}")
+                logger.info("Успешный вход: %s", email)
                 return redirect('dashboard')
             else:
                 field_errors['non_field'] = "Неверный email или пароль"
-                logger.warning(f"Неудачная попытка входа: {email}")
+                logger.warning("Неудачная попытка входа: %s", email)
 
     return render(request, 'registration/login.html', {'field_errors': field_errors})
 
@@ -188,49 +229,54 @@ def user_login(request):
 def user_logout(request):
     user_email = request.user.email
     logout(request)
-    logger.info(f"Выход из системы: {user_email}")
+    logger.info("Выход из системы: %s", user_email)
     return redirect('login')
 
 
-@login_required
-def profile(request):
-    user = request.user
+def profile_stats(series):
+    week_ago = date.today() - timedelta(days=7)
+    avg_score = series.mean()
+    return {
+        'total_assessments': series.count(),
+        'last_week_count': series.count(start=week_ago),
+        'average_score': round(avg_score, 1) if avg_score else 0,
+    }
 
-    assessments = SphereAssessment.objects.filter(user=user).order_by('-date')
-    total_assessments = assessments.count()
 
-    week_ago = date.today() - timedelta(days=7)
-    last_week_count = assessments.filter(date__gte=week_ago).count()
+def recent_goals_queryset(user):
+    return Goal.objects.filter(user=user).select_related('sphere').order_by('-deadline')[:3]
+
 
-    avg_score = assessments.aggregate(avg=Avg('value'))['avg']
-    average_score = round(avg_score, 1) if avg_score else 0
+def recent_entries_queryset(user):
+    return DiaryEntry.objects.filter(user=user).select_related('sphere', 'goal').order_by('-created_at')[:3]
 
-    recent_goals = Goal.objects.filter(user=user).order_by('-deadline')[:3]
-    recent_entries = DiaryEntry.objects.filter(user=user).order_by('-created_at')[:3]
 
+@login_required
+def profile(request):
+    user = request.user
     return render(request, 'profile/profile.html', {
-        'total_assessments': total_assessments,
-        'last_week_count': last_week_count,
-        'average_score': average_score,
-        'recent_goals': recent_goals,
-        'recent_entries': recent_entries,
+        **profile_stats(assessment_series(user)),
+        'recent_goals': recent_goals_queryset(user),
+        'recent_entries': recent_entries_queryset(user),
     })
 
 
+def assessed_sphere_ids(user, day):
+    return SphereAssessment.objects.filter(user=user, date=day).values_list('sphere_id', flat=True)
+
+
+def sphere_assessments_queryset(user, sphere):
+    return SphereAssessment.objects.filter(user=user, sphere=sphere).order_by('-date')
+
+
 @login_required
 def sphere_list(request):
     sort_by = request.GET.get('sort', '')
 
-    if sort_by == 'alpha':
-        spheres = LifeSphere.objects.all().order_by('title')
-    else:
-        spheres = LifeSphere.objects.all()
+    spheres = sphere_registry.all(sort_by=sort_by)
 
     today = date.today()
-    assessed_today = SphereAssessment.objects.filter(
-        user=request.user,
-        date=today
-    ).values_list('sphere_id', flat=True)
+    assessed_today = assessed_sphere_ids(request.user, today)
 
     return render(request, 'spheres/sphere_list.html', {
         'spheres': spheres,
@@ -240,32 +286,51 @@ def sphere_list(request):
     })
 
 
+def save_assessments(user, values_by_sphere, day):
+    """Сохраняет оценки сфер за день одним INSERT ... ON CONFLICT DO UPDATE.
+
+    Вторая запись — отметка data_changed_at для ETag и кэшей страниц: это
+    другая таблица, а при шардировании и другая БД, в тот же запрос её не свести.
+    """
+    SphereAssessment.objects.bulk_create(
+        [
+            SphereAssessment(user=user, sphere=sphere, date=day, value=value)
+            for sphere, value in values_by_sphere.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['user', 'sphere', 'date'],
+        update_fields=['value'],
+    )
+    # bulk_create не отправляет post_save — отмечаем изменение данных явно
+    touch_user_data(pk=user.pk)
+
+
+def parse_assessment_value(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if 1 <= value <= 10 else None
+
+
 @login_required
 def create_assessment(request, sphere_id):
-    sphere = get_object_or_404(LifeSphere, id=sphere_id)
+    sphere = sphere_registry.get_or_404(sphere_id)
     user = request.user
 
     if request.method == 'POST':
-        value = request.POST.get('value')
-        if value and 1 <= int(value) <= 10:
-            obj, created = SphereAssessment.objects.update_or_create(
-                user=user,
-                sphere=sphere,
-                date=date.today(),
-                defaults={'value': int(value)}
-            )
-            action = "создана" if created else "обновлена"
-            logger.info(f"Оценка сферы '{sphere.title}' {action} пользователем {user.email}: {value}/10")
+        value = parse_assessment_value(request.POST.get('value'))
+        if value is not None:
+            save_assessments(user, {sphere: value}, date.today())
+            logger.info("Оценка сферы '%s' сохранена пользователем %s: %s/10", sphere.title, user.email, value)
             return redirect('sphere_list')
         else:
-            logger.warning(f"Некорректная оценка от {user.email}: {value}")
+            logger.warning("Некорректная оценка от %s: %s", user.email, request.POST.get('value'))
             error = "Пожалуйста, выберите оценку от 1 до 10."
     else:
         error = None
 
-    last_assessment = SphereAssessment.objects.filter(
-        user=user, sphere=sphere
-    ).order_by('-date').first()
+    last_assessment = sphere_assessments_queryset(user, sphere).first()
 
     return render(request, 'spheres/create_assessment.html', {
         'sphere': sphere,
@@ -275,11 +340,59 @@ def create_assessment(request, sphere_id):
 
 
 @login_required
+@require_POST
+def assess_all(request):
+    """Сохраняет оценки всех сфер за сегодня одним запросом.
+
+    Ожидает поля value_<sphere_id>; пустые поля пропускаются. На AJAX-запрос
+    отвечает JSON с сохранёнными оценками, иначе возвращает к списку сфер.
+    """
+    user = request.user
+    values = {}
+    errors = []
+    for sphere in sphere_registry.all():
+        raw = request.POST.get(f'value_{sphere.id}')
+        if not raw:
+            continue
+        value = parse_assessment_value(raw)
+        if value is None:
+            errors.append(sphere.title)
+        else:
+            values[sphere] = value
+
+    wants_json = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+    if errors or not values:
+        logger.warning("Некорректная пакетная оценка от %s: %s", user.email, errors)
+        error = "Пожалуйста, выберите оценку от 1 до 10."
+        if wants_json:
+            return JsonResponse({'status': 'error', 'error': error, 'spheres': errors}, status=400)
+        messages.error(request, error)
+        return redirect('sphere_list')
+
+    today = date.today()
+    save_assessments(user, values, today)
+    logger.info("Пользователь %s оценил %s сфер за %s", user.email, len(values), today)
+
+    if wants_json:
+        return JsonResponse({
+            'status': 'ok',
+            'date': today.isoformat(),
+            'assessments': {str(sphere.id): value for sphere, value in values.items()},
+        })
+    messages.success(request, "Оценки сохранены!")
+    return redirect('sphere_list')
+
+
+def assessment_history_queryset(user):
+    return SphereAssessment.objects.filter(user=user).select_related('sphere').order_by('-date')
+
+
+@login_required
+@user_conditional
 def assessment_history(request):
     # Получаем все оценки
-    assessments = SphereAssessment.objects.filter(
-        user=request.user
-    ).select_related('sphere').order_by('-date')
+    assessments = assessment_history_queryset(request.user)
 
     # Статистика
     total_count = assessments.count()
@@ -292,11 +405,8 @@ def assessment_history(request):
 
     # Пагинация (8 оценок на страницу)
     paginator = Paginator(assessments, 8)
-    page_number = request.GET.get('page')
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (PageNotAnInteger, EmptyPage):
-        page_obj = paginator.get_page(1)
+    paginator.count = total_count
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     return render(request, 'spheres/assessment_history.html', {
         'assessments': page_obj.object_list,  # Только оценки текущей страницы
@@ -307,16 +417,51 @@ def assessment_history(request):
     })
 
 @login_required
-def goal_list(request):
-    goals = Goal.objects.filter(user=request.user).select_related('sphere')
+@user_conditional
+def weekly_report(request):
+    # Отчёт собран заранее командой weekly_reports — здесь только чтение одной строки
+    reports = WeeklyReport.objects.filter(user=request.user)
+    weeks = list(reports.order_by('-week_start').values_list('week_start', flat=True)[:12])
+    week = request.GET.get('week')
+    if week:
+        try:
+            week = date.fromisoformat(week)
+        except ValueError:
+            raise Http404("Неверная дата недели")
+    elif weeks:
+        week = weeks[0]
+    report = reports.filter(week_start=week).first() if week else None
+    if week and report is None and request.GET.get('week'):
+        raise Http404("Отчёта за эту неделю нет")
+
+    spheres, due_soon = [], []
+    if report:
+        for sphere_id, average, previous in report.spheres:
+            sphere = sphere_registry.get(sphere_id)
+            if sphere:
+                delta = round(average - previous, 1) if previous is not None else None
+                spheres.append({'title': sphere.title, 'average': average, 'delta': delta})
+        due_soon = [
+            {'id': goal_id, 'title': title, 'deadline': date.fromisoformat(deadline)}
+            for goal_id, title, deadline in report.due_soon
+        ]
+
+    return render(request, 'reports/weekly_report.html', {
+        'report': report,
+        'week_end': report.week_start + timedelta(days=6) if report else None,
+        'weeks': weeks,
+        'spheres': spheres,
+        'due_soon': due_soon,
+    })
+
+def goal_list_queryset(user, status_filter=None, search_query=None):
+    goals = Goal.objects.filter(user=user).select_related('sphere')
 
-    status_filter = request.GET.get('status')
     if status_filter in ['active', 'completed', 'postponed']:
         goals = goals.filter(status=status_filter)
     elif status_filter == 'all' or not status_filter:
         pass
 
-    search_query = request.GET.get('search')
     if search_query:
         goals = goals.filter(
             Q(title__icontains=search_query) |
@@ -333,44 +478,55 @@ def goal_list(request):
             output_field=models.IntegerField()
         )
     ).order_by('sort_order', '-deadline')
+    return goals
 
-    paginator = Paginator(goals, 5)
-    page_number = request.GET.get('page')
-    try:
-        page_obj = paginator.get_page(page_number)
-    except (EmptyPage, PageNotAnInteger):
-        page_obj = paginator.get_page(1)
 
-    all_goals = Goal.objects.filter(user=request.user)
-    total_count = all_goals.count()
-    active_count = all_goals.filter(status='active').count()
-    completed_count = all_goals.filter(status='completed').count()
-    overdue_count = all_goals.filter(deadline__lt=date.today(), status='active').count()
+@login_required
+@user_conditional
+def goal_list(request):
+    status_filter = request.GET.get('status')
+    search_query = request.GET.get('search')
+    goals = goal_list_queryset(request.user, status_filter, search_query)
+
+    paginator = Paginator(goals, 5)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    counters = goal_counters(request.user)
 
     return render(request, 'goals/goal_list.html', {
         'page_obj': page_obj,
-        'total_count': total_count,
-        'active_count': active_count,
-        'completed_count': completed_count,
-        'overdue_count': overdue_count,
+        'total_count': counters['total'],
+        'active_count': counters['active'],
+        'completed_count': counters['completed'],
+        'overdue_count': counters['overdue'],
         'current_status': status_filter or 'all',
         'search_query': search_query or '',
-        'today': date.today(),
     })
 
 
+def posted_state(request):
+    """Состояние флага, которое видел клиент (поле current: 1 или 0), для toggle_boolean."""
+    return {'1': True, '0': False}.get(request.POST.get('current'))
+
+
 @login_required
+@require_POST
 def toggle_pin_goal(request, goal_id):
-    goal = get_object_or_404(Goal, id=goal_id, user=request.user)
-    goal.is_pinned = not goal.is_pinned
-    goal.save()
-    logger.info(f"Пользователь {request.user.email} {'закрепил' if goal.is_pinned else 'открепил'} цель: {goal.title}")
+    is_pinned = toggle_boolean(
+        Goal.objects.filter(id=goal_id, user=request.user), 'is_pinned', posted_state(request),
+    )
+    if is_pinned is None:
+        raise Http404("Цель не найдена")
+    touch_user_data(pk=request.user.pk)
+    logger.info("Пользователь %s %s цель %s",
+                request.user.email, 'закрепил' if is_pinned else 'открепил', goal_id)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'status': 'ok', 'is_pinned': is_pinned})
     return redirect('goal_list')
 
 
 @login_required
 def create_goal(request):
-    spheres = LifeSphere.objects.all()
+    spheres = sphere_registry.all()
 
     if request.method == 'POST':
         title = request.POST.get('title')
@@ -381,15 +537,15 @@ def create_goal(request):
 
         if not title or not sphere_id or not deadline_str:
             messages.error(request, "Все обязательные поля должны быть заполнены.")
-            logger.warning(f"Пользователь {request.user.email} попытался создать цель без обязательных полей")
+            logger.warning("Пользователь %s попытался создать цель без обязательных полей", request.user.email)
         else:
             try:
                 deadline = date.fromisoformat(deadline_str)
                 if deadline < date.today():
                     messages.error(request, "Дедлайн не может быть в прошлом.")
-                    logger.warning(f"Пользователь {request.user.email} указал дедлайн в прошлом: {deadline}")
+                    logger.warning("Пользователь %s указал дедлайн в прошлом: %s", request.user.email, deadline)
                 else:
-                    sphere = get_object_or_404(LifeSphere, id=sphere_id)
+                    sphere = sphere_registry.get_or_404(sphere_id)
                     goal = Goal.objects.create(
                         user=request.user,
                         title=title,
@@ -439,18 +595,18 @@ def create_goal(request):
                             goal=goal,
                             is_enabled=True
                         )
-                        logger.info(f"Создано напоминание по дедлайну для цели: {goal.title}")
+                        logger.info("Создано напоминание по дедлайну для цели: %s", goal.title)
 
-                    logger.info(f"Пользователь {request.user.email} создал цель: '{goal.title}' (ID: {goal.id})")
+                    logger.info("Пользователь %s создал цель: '%s' (ID: %s)", request.user.email, goal.title, goal.id)
                     messages.success(request, "Цель успешно создана!")
                     return redirect('goal_list')
 
             except ValueError as e:
                 messages.error(request, "Некорректная дата.")
-                logger.error(f"Ошибка при разборе даты: {e}", exc_info=True)
+                logger.error("Ошибка при разборе даты: %s", e, exc_info=True)
             except Exception as e:
                 messages.error(request, "Произошла ошибка при создании цели.")
-                logger.error(f"Неожиданная ошибка при создании цели: {e}", exc_info=True)
+                logger.error("Неожиданная ошибка при создании цели: %s", e, exc_info=True)
 
     return render(request, 'goals/create_goal.html', {
         'spheres': spheres,
@@ -461,7 +617,7 @@ def create_goal(request):
 @login_required
 def edit_goal(request, goal_id):
     goal = get_object_or_404(Goal, id=goal_id, user=request.user)
-    spheres = LifeSphere.objects.all()
+    spheres = sphere_registry.all()
 
     if request.method == 'POST':
         title = request.POST.get('title')
@@ -477,7 +633,7 @@ def edit_goal(request, goal_id):
                 deadline = date.fromisoformat(deadline_str)
                 if deadline < date.today() and status != 'completed':
                     messages.warning(request, "Дедлайн в прошлом — возможно, стоит завершить цель?")
-                sphere = get_object_or_404(LifeSphere, id=sphere_id)
+                sphere = sphere_registry.get_or_404(sphere_id)
                 goal.title = title
                 goal.description = description
                 goal.sphere = sphere
@@ -513,7 +669,7 @@ def edit_goal(request, goal_id):
                         pass
 
                 goal.save()
-                logger.info(f"Пользователь {request.user.email} обновил цель: {goal.title} (ID: {goal.id})")
+                logger.info("Пользователь %s обновил цель: %s (ID: %s)", request.user.email, goal.title, goal.id)
                 messages.success(request, "Цель обновлена!")
                 return redirect('goal_list')
             except ValueError:
@@ -534,37 +690,43 @@ def delete_goal(request, goal_id):
     if request.method == 'POST':
         goal_title = goal.title
         goal.delete()
-        logger.info(f"Пользователь {request.user.email} удалил цель: {goal_title}")
+        logger.info("Пользователь %s удалил цель: %s", request.user.email, goal_title)
         messages.success(request, "Цель удалена.")
         return redirect('goal_list')
     return render(request, 'goals/delete_goal.html', {'goal': goal})
 
 
-@login_required
-def diary_list(request):
-    entries = DiaryEntry.objects.filter(user=request.user) \
+def diary_list_queryset(user):
+    return DiaryEntry.objects.filter(user=user) \
         .select_related('sphere', 'goal') \
         .order_by('-created_at')
 
-    total_count = entries.count()
-    with_media_count = entries.exclude(media_file='').count()
-    with_goal_count = entries.exclude(goal=None).count()
 
+def diary_counters(entries):
+    """Счётчики страницы дневника методами count: шаблон вызовет их, только если
+    фрагмент статистики не найден в кэше."""
     thirty_days_ago = timezone.now() - timedelta(days=30)
-    last_30_days = entries.filter(created_at__gte=thirty_days_ago).count()
+    counted = entries.order_by()
+    return {
+        'with_media_count': counted.exclude(media_file='').count,
+        'with_goal_count': counted.exclude(goal=None).count,
+        'last_30_days': counted.filter(created_at__gte=thirty_days_ago).count,
+    }
+
 
+@login_required
+@user_conditional
+def diary_list(request):
+    entries = diary_list_queryset(request.user)
     return render(request, 'diary/diary_list.html', {
         'entries': entries,
-        'total_count': total_count,
-        'with_media_count': with_media_count,
-        'with_goal_count': with_goal_count,
-        'last_30_days': last_30_days,
+        **diary_counters(entries),
     })
 
 
 @login_required
 def create_diary_entry(request):
-    spheres = LifeSphere.objects.all()
+    spheres = sphere_registry.all()
     goals = Goal.objects.filter(user=request.user, status__in=['active', 'postponed'])
 
     if request.method == 'POST':
@@ -575,7 +737,7 @@ def create_diary_entry(request):
 
         if not text:
             messages.error(request, "Текст записи обязателен.")
-            logger.warning(f"Пустая запись от {request.user.email}")
+            logger.warning("Пустая запись от %s", request.user.email)
         else:
             entry = DiaryEntry(
                 user=request.user,
@@ -587,7 +749,7 @@ def create_diary_entry(request):
             if goal_id:
                 entry.goal_id = goal_id
             entry.save()
-            logger.info(f"Пользователь {request.user.email} создал запись в дневнике (ID: {entry.id})")
+            logger.info("Пользователь %s создал запись в дневнике (ID: %s)", request.user.email, entry.id)
             messages.success(request, "Запись добавлена!")
             return redirect('diary_list')
 
@@ -600,7 +762,7 @@ def create_diary_entry(request):
 @login_required
 def edit_diary_entry(request, entry_id):
     entry = get_object_or_404(DiaryEntry, id=entry_id, user=request.user)
-    spheres = LifeSphere.objects.all()
+    spheres = sphere_registry.all()
     goals = Goal.objects.filter(user=request.user, status__in=['active', 'postponed'])
 
     if request.method == 'POST':
@@ -618,7 +780,7 @@ def edit_diary_entry(request, entry_id):
             if media_file:
                 entry.media_file = media_file
             entry.save()
-            logger.info(f"Пользователь {request.user.email} обновил запись в дневнике (ID: {entry.id})")
+            logger.info("Пользователь %s обновил запись в дневнике (ID: %s)", request.user.email, entry.id)
             messages.success(request, "Запись обновлена!")
             return redirect('diary_list')
 
@@ -634,36 +796,32 @@ def delete_diary_entry(request, entry_id):
     entry = get_object_or_404(DiaryEntry, id=entry_id, user=request.user)
     if request.method == 'POST':
         entry.delete()
-        logger.info(f"Пользователь {request.user.email} удалил запись в дневнике (ID: {entry.id})")
+        logger.info("Пользователь %s удалил запись в дневнике (ID: %s)", request.user.email, entry.id)
         messages.success(request, "Запись удалена.")
         return redirect('diary_list')
     return render(request, 'diary/delete_diary_entry.html', {'entry': entry})
 
 
+def reminder_list_queryset(user):
+    return Reminder.objects.filter(user=user).order_by('type', 'time')
+
+
 @login_required
+@user_conditional
 def reminder_list(request):
-    reminders = Reminder.objects.filter(user=request.user).order_by('type', 'time')
-
-    total_count = reminders.count()
-    active_count = reminders.filter(is_enabled=True).count()
-    daily_count = reminders.filter(type='daily').count()
+    reminders = reminder_list_queryset(request.user)
 
     paginator = Paginator(reminders, 5)
-    page_number = request.GET.get('page', 1)
-
-    try:
-        page_obj = paginator.page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     return render(request, 'reminders/reminder_list.html', {
         'page_obj': page_obj,
         'reminders': page_obj.object_list,
-        'total_count': total_count,
-        'active_count': active_count,
-        'daily_count': daily_count,
+        # Счётчики передаются методами: шаблон вызовет их, только если фрагмент
+        # статистики не найден в кэше
+        'total_count': paginator.count,
+        'active_count': reminders.filter(is_enabled=True).count,
+        'daily_count': reminders.filter(type='daily').count,
         'paginator': paginator,
     })
 
@@ -688,7 +846,7 @@ def create_reminder(request):
                 goal_id=goal_id,
                 is_enabled=True
             )
-            logger.info(f"Пользователь {request.user.email} создал напоминание: тип={type}, время={time}")
+            logger.info("Пользователь %s создал напоминание: тип=%s, время=%s", request.user.email, type, time)
             messages.success(request, "Напоминание создано!")
             return redirect('dashboard')
     return render(request, 'reminders/create_reminder.html', {'goals': goals})
@@ -700,30 +858,40 @@ def delete_reminder(request, reminder_id):
     if request.method == 'POST':
         reminder_type = reminder.get_type_display()
         reminder.delete()
-        logger.info(f"Пользователь {request.user.email} удалил напоминание: {reminder_type}")
+        logger.info("Пользователь %s удалил напоминание: %s", request.user.email, reminder_type)
         messages.success(request, "Напоминание удалено.")
         return redirect('reminder_list')
     return render(request, 'reminders/delete_reminder.html', {'reminder': reminder})
 
 
 @login_required
+@require_POST
 def toggle_reminder(request, reminder_id):
-    reminder = get_object_or_404(Reminder, id=reminder_id, user=request.user)
-    reminder.is_enabled = not reminder.is_enabled
-    reminder.save()
-    status = "включено" if reminder.is_enabled else "выключено"
-    logger.info(f"Пользователь {request.user.email} {status} напоминание: {reminder.get_type_display()}")
-    return redirect('dashboard')
-
-
-@login_required
-def export_data(request):
-    logger.info(f"Пользователь {request.user.email} запросил экспорт данных")
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="life_balance_export.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow([
+    is_enabled = toggle_boolean(
+        Reminder.objects.filter(id=reminder_id, user=request.user), 'is_enabled', posted_state(request),
+    )
+    if is_enabled is None:
+        raise Http404("Напоминание не найдено")
+    touch_user_data(pk=request.user.pk)
+    status = "включил" if is_enabled else "выключил"
+    logger.info("Пользователь %s %s напоминание %s", request.user.email, status, reminder_id)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'status': 'ok', 'is_enabled': is_enabled})
+    return redirect('reminder_list')
+
+
+class _Echo:
+    """Буфер для csv.writer: writerow() сразу возвращает готовую строку."""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(user):
+    # Ответ потоковый: строки читаются уже после выхода из UserShardMiddleware,
+    # поэтому шард пользователя указываем явно
+    alias = user.shard or DEFAULT_DB_ALIAS
+    yield [
         smart_str("Тип"),
         smart_str("Дата/Дедлайн"),
         smart_str("Название/Сфера"),
@@ -731,53 +899,85 @@ def export_data(request):
         smart_str("Статус/Прогресс"),
         smart_str("Привязка"),
         smart_str("Медиафайл")
-    ])
+    ]
 
-    assessments = SphereAssessment.objects.filter(user=request.user).select_related('sphere').order_by('-date')
-    for a in assessments:
-        writer.writerow([
+    assessments = SphereAssessment.objects.using(alias).filter(user=user).order_by('-date')
+    for a in assessments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        sphere = sphere_registry.get(a.sphere_id)
+        yield [
             smart_str("Оценка сферы"),
             smart_str(a.date.strftime('%Y-%m-%d')),
-            smart_str(a.sphere.title),
+            smart_str(sphere.title if sphere else ""),
             smart_str(a.value),
             smart_str(""),
             smart_str(""),
             smart_str("")
-        ])
+        ]
 
-    goals = Goal.objects.filter(user=request.user).select_related('sphere').order_by('deadline')
-    for goal in goals:
+    goals = Goal.objects.using(alias).filter(user=user).prefetch_related('steps').order_by('deadline')
+    for goal in goals.iterator(chunk_size=EXPORT_CHUNK_SIZE):
         steps_text = "; ".join([f"{'✓' if s.is_completed else '☐'} {s.title}" for s in goal.steps.all()])
         description = f"{goal.description or ''}\nШаги: {steps_text}".strip()
-        writer.writerow([
+        sphere = sphere_registry.get(goal.sphere_id) if goal.sphere_id else None
+        yield [
             smart_str("Цель"),
             smart_str(goal.deadline.strftime('%Y-%m-%d')),
             smart_str(goal.title),
             smart_str(description),
             smart_str(f"{goal.get_status_display()} ({goal.progress}%)"),
-            smart_str(goal.sphere.title if goal.sphere else ""),
+            smart_str(sphere.title if sphere else ""),
             smart_str("")
-        ])
+        ]
 
-    entries = DiaryEntry.objects.filter(user=request.user).select_related('sphere', 'goal').order_by('-created_at')
-    for entry in entries:
-        writer.writerow([
+    entries = DiaryEntry.objects.using(alias).filter(user=user).select_related('goal').order_by('-created_at')
+    for entry in entries.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        sphere = sphere_registry.get(entry.sphere_id) if entry.sphere_id else None
+        yield [
             smart_str("Запись в дневнике"),
             smart_str(entry.created_at.strftime('%Y-%m-%d %H:%M')),
-            smart_str(entry.sphere.title if entry.sphere else "—"),
+            smart_str(sphere.title if sphere else "—"),
             smart_str(entry.text),
             smart_str(""),
             smart_str(entry.goal.title if entry.goal else ""),
             smart_str(entry.media_file.url if entry.media_file else "")
-        ])
+        ]
+
 
+def _export_chunks(user):
+    # Строки склеиваются пачками: каждый кусок потока сжимается со сбросом
+    # буфера, и на куске в одну строку сжатие почти не работает
+    writer = csv.writer(_Echo())
+    batch = []
+    for row in _export_rows(user):
+        batch.append(writer.writerow(row))
+        if len(batch) == EXPORT_CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    yield ''.join(batch)
+
+
+@login_required
+def export_data(request):
+    logger.info("Пользователь %s запросил экспорт данных", request.user.email)
+    # Строки отдаются по мере чтения из БД — CompressionMiddleware сжимает их
+    # на лету, и весь CSV не собирается в памяти
+    chunks = _export_chunks(request.user)
+    if isinstance(request, ASGIRequest):
+        # Под ASGI синхронный итератор был бы собран в список до первого байта
+        chunks = aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="life_balance_export.csv"'
     return response
 
 
+def note_list_queryset(user):
+    return Note.objects.filter(user=user).prefetch_related('items').order_by('-created_at')
+
+
 @login_required
+@user_conditional
 def note_list(request):
-    notes = Note.objects.filter(user=request.user).prefetch_related('items').order_by('-created_at')
-    return render(request, 'notes/note_list.html', {'notes': notes})
+    return render(request, 'notes/note_list.html', {'notes': note_list_queryset(request.user)})
 
 
 @login_required
@@ -793,7 +993,7 @@ def create_note(request):
             for text in item_texts:
                 if text.strip():
                     NoteItem.objects.create(note=note, text=text.strip())
-            logger.info(f"Пользователь {request.user.email} создал заметку: '{title}'")
+            logger.info("Пользователь %s создал заметку: '%s'", request.user.email, title)
             messages.success(request, "Заметка создана!")
             return redirect('note_list')
 
@@ -839,7 +1039,7 @@ def edit_note(request, note_id):
                 if item_id not in updated_item_ids:
                     item.delete()
 
-            logger.info(f"Пользователь {request.user.email} обновил заметку: '{note.title}'")
+            logger.info("Пользователь %s обновил заметку: '%s'", request.user.email, note.title)
             messages.success(request, "Заметка обновлена!")
             return redirect('note_list')
 
@@ -852,7 +1052,7 @@ def delete_note(request, note_id):
     if request.method == 'POST':
         note_title = note.title
         note.delete()
-        logger.info(f"Пользователь {request.user.email} удалил заметку: '{note_title}'")
+        logger.info("Пользователь %s удалил заметку: '%s'", request.user.email, note_title)
         messages.success(request, "Заметка удалена.")
         return redirect('note_list')
     return render(request, 'notes/delete_note.html', {'note': note})
@@ -868,7 +1068,7 @@ def toggle_note_item(request, note_id, item_id):
         item.is_completed = data.get('completed', False)
         item.save()
         logger.debug(
-            f"Пользователь {request.user.email} обновил пункт заметки {item_id}: completed={item.is_completed}")
+            "Пользователь %s обновил пункт заметки %s: completed=%s", request.user.email, item_id, item.is_completed)
         return JsonResponse({'status': 'ok'})
 
     return JsonResponse({'status': 'error'}, status=400)
\ No newline at end of file